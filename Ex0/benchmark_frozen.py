@@ -0,0 +1,44 @@
+"""Measures the per-node construction cost of the immutable classes that are
+decorated with `logic_utils.frozen`.
+
+Run from the root of the code tree (next to logic_utils.py and the
+propositions and predicates packages):
+
+    python benchmark_frozen.py
+"""
+
+import timeit
+
+from propositions.syntax import Formula
+from propositions.proofs import InferenceRule, Proof
+from predicates.syntax import Formula as PredicateFormula, Term
+
+NUMBER = 200000
+
+def report(name: str, statement, number: int = NUMBER) -> None:
+    best = min(timeit.repeat(statement, number=number, repeat=5))
+    print('%-28s %8.3f usec/node' % (name, best / number * 1e6))
+
+def main() -> None:
+    p = Formula('p')
+    q = Formula('q')
+    rule = InferenceRule([p], q)
+    x = Term('x')
+    c = Term('c')
+    relation = PredicateFormula('R', [x, c])
+    report('propositional variable', lambda: Formula('p12'))
+    report('propositional unary', lambda: Formula('~', p))
+    report('propositional binary', lambda: Formula('->', p, q))
+    report('inference rule', lambda: InferenceRule((p,), q))
+    report('proof line (assumption)', lambda: Proof.Line(p))
+    report('proof line (rule)', lambda: Proof.Line(q, rule, (0,)))
+    report('term (variable)', lambda: Term('x'))
+    report('term (function)', lambda: Term('f', (x, c)))
+    report('predicate relation', lambda: PredicateFormula('R', (x, c)))
+    report('predicate binary', lambda: PredicateFormula('&', relation,
+                                                        relation))
+    report('predicate quantifier', lambda: PredicateFormula('A', 'x',
+                                                            relation))
+
+if __name__ == '__main__':
+    main()
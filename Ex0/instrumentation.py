@@ -0,0 +1,353 @@
+"""Opt-in instrumentation of proof generation and checking in propositional
+and predicate logic.
+
+Nothing is instrumented outside of an `instrument` block, so the code runs at
+full speed unless statistics are requested::
+
+    with instrument() as stats:
+        proof = prove_tautology(formula)
+    print(stats.to_json())
+
+Inside the block, the hot paths and entry points listed in `COUNTED`,
+`MEASURED` and `TIMED` are temporarily wrapped, wherever they are bound (including the
+modules that star-import them), and restored on exit. Only the modules that
+are already imported when the block is entered are instrumented, so entering
+it imports (and counts) nothing. Work done in other processes (e.g., by
+``Proof.is_valid(parallel=True)``) is not counted.
+"""
+
+from contextlib import contextmanager
+import functools
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, \
+                   Tuple
+
+#: The functions whose calls are counted, each specified by the module in
+#: which it is defined, its (possibly qualified) name in that module, and the
+#: counter to increment on each call.
+COUNTED = (
+    ('propositions.syntax', 'Formula.__init__', 'formula_nodes'),
+    ('propositions.proofs', 'run_matcher', 'specialization_map_calls'),
+    ('predicates.syntax', 'Formula.__init__', 'formula_nodes'),
+    ('predicates.syntax', 'Term.__init__', 'term_nodes'),
+    ('predicates.proofs', 'Schema.instantiate', 'instantiation_calls'),
+)
+
+#: The methods that walk the formula or term that they are called on, each
+#: specified by the module in which it is defined, its qualified name in that
+#: module, the counter of the calls to increment, and the counter to which to
+#: add the number of nodes of the formula or term. Only the outermost of nested
+#: calls to these methods is counted, so a substitution is counted once, with
+#: all the nodes that it visits, however it recurses (the propositional one
+#: looks some leaves up directly instead of recursing into them).
+MEASURED = (
+    ('propositions.syntax', 'Formula.copy_and_substitute_variables',
+     'substitutions', 'substituted_nodes'),
+    ('predicates.syntax', 'Formula.substitute', 'substitutions',
+     'substituted_nodes'),
+    ('predicates.syntax', 'Term.substitute', 'substitutions',
+     'substituted_nodes'),
+)
+
+#: The functions whose calls are timed, each specified by the module in which
+#: it is defined and its (possibly qualified) name in that module. The lines of
+#: the proofs returned by the outermost timed calls are tallied per rule.
+TIMED = (
+    ('propositions.proofs', 'Proof.is_valid'),
+    ('propositions.proofs', 'prove_specialization'),
+    ('propositions.proofs', 'inline_proof'),
+    ('propositions.proofs', 'inline_all'),
+    ('propositions.proofs', 'compact'),
+    ('propositions.deduction', 'prove_corollary'),
+    ('propositions.deduction', 'combine_proofs'),
+    ('propositions.deduction', 'remove_assumption'),
+    ('propositions.deduction', 'proof_from_inconsistency'),
+    ('propositions.deduction', 'prove_by_contradiction'),
+    ('propositions.tautology', 'prove_in_model'),
+    ('propositions.tautology', 'reduce_assumption'),
+    ('propositions.tautology', 'prove_tautology'),
+    ('propositions.tautology', 'proof_or_counterexample'),
+    ('propositions.tautology', 'prove_sound_inference'),
+    ('propositions.tautology', 'model_or_inconsistency'),
+    ('predicates.proofs', 'Proof.is_valid'),
+    ('predicates.proofs', 'prove_from_skeleton_proof'),
+    ('predicates.prover', 'Prover.qed'),
+    ('predicates.prover', 'Prover.add_tautology'),
+    ('predicates.prover', 'Prover.add_proof'),
+    ('predicates.prover', 'Prover.add_universal_instantiation'),
+    ('predicates.prover', 'Prover.add_tautological_implication'),
+    ('predicates.prover', 'Prover.add_existential_derivation'),
+    ('predicates.prover', 'Prover.add_free_instantiation'),
+    ('predicates.prover', 'Prover.add_substituted_equality'),
+    ('predicates.prover', 'Prover.add_chained_equality'),
+)
+
+class Statistics:
+    """Statistics gathered during an `instrument` block.
+
+    Attributes:
+        counters (`~typing.Dict`\\[`str`, `int`]): the number of calls to
+            the counted functions, and the calls to and nodes visited by the
+            measured functions, per counter.
+        lines_per_rule (`~typing.Dict`\\[`str`, `int`]): the number of lines
+            justified by each rule (or, for predicate proofs, by each kind of
+            line and assumption/axiom) in the proofs returned by the outermost
+            timed calls.
+        calls (`~typing.Dict`\\[`str`, `int`]): the number of calls to each
+            timed function.
+        wall_time (`~typing.Dict`\\[`str`, `float`]): the total wall time, in
+            seconds, spent in each timed function, including the time spent in
+            the timed functions that it calls.
+    """
+    counters: Dict[str, int]
+    lines_per_rule: Dict[str, int]
+    calls: Dict[str, int]
+    wall_time: Dict[str, float]
+
+    def __init__(self) -> None:
+        """Initializes an empty `Statistics` object."""
+        self.counters = {}
+        self.lines_per_rule = {}
+        self.calls = {}
+        self.wall_time = {}
+
+    def tally_lines(self, proof: Any) -> None:
+        """Adds the lines of the given proof to `lines_per_rule`.
+
+        Parameters:
+            proof: propositional or predicate proof.
+        """
+        for line in proof.lines:
+            if hasattr(line, 'rule'):
+                key = 'assumption' if line.rule is None else str(line.rule)
+            elif hasattr(line, 'assumption'):
+                key = type(line).__name__ + ' ' + str(line.assumption)
+            else:
+                key = type(line).__name__
+            self.lines_per_rule[key] = self.lines_per_rule.get(key, 0) + 1
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Collects the statistics into a dictionary.
+
+        Returns:
+            A dictionary from the name of each attribute of the current object
+            to its value.
+        """
+        return {'counters': dict(self.counters),
+                'lines_per_rule': dict(self.lines_per_rule),
+                'calls': dict(self.calls),
+                'wall_time': dict(self.wall_time)}
+
+    def to_json(self) -> str:
+        """Computes a JSON representation of the statistics.
+
+        Returns:
+            The JSON representation of `to_dict`.
+        """
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+    def dump(self, file: TextIO) -> None:
+        """Writes the JSON representation of the statistics to the given file.
+
+        Parameters:
+            file: text file open for writing.
+        """
+        file.write(self.to_json())
+        file.write('\n')
+
+def counting(function: Callable, statistics: Statistics, counter: str) -> \
+        Callable:
+    """Wraps the given function so that each call to it is counted.
+
+    Parameters:
+        function: function to wrap.
+        statistics: statistics to count the calls in.
+        counter: name of the counter to increment on each call.
+
+    Returns:
+        The wrapped function.
+    """
+    counters = statistics.counters
+    counters.setdefault(counter, 0)
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        counters[counter] += 1
+        return function(*args, **kwargs)
+    return wrapper
+
+def count_nodes(root: Any) -> int:
+    """Counts the nodes of the given formula or term.
+
+    Parameters:
+        root: propositional or predicate formula, or term.
+
+    Returns:
+        The number of formulae and terms in the given one, including itself.
+    """
+    count = 0
+    stack = [root]
+    while len(stack) > 0:
+        node = stack.pop()
+        count += 1
+        for name in ('first', 'second', 'predicate'):
+            child = getattr(node, name, None)
+            if child is not None:
+                stack.append(child)
+        stack.extend(getattr(node, 'arguments', None) or ())
+    return count
+
+def measuring(function: Callable, statistics: Statistics, counter: str,
+              nodes_counter: str, depth: List[int]) -> Callable:
+    """Wraps the given method so that each call to it that is not nested in
+    another measured call is counted, along with the number of nodes of the
+    formula or term that it is called on.
+
+    Parameters:
+        function: method to wrap.
+        statistics: statistics to count the calls and nodes in.
+        counter: name of the counter to increment on each outermost call.
+        nodes_counter: name of the counter to which to add the number of nodes
+            on each outermost call.
+        depth: single-element list holding the current nesting depth of
+            measured calls, shared by all measured functions.
+
+    Returns:
+        The wrapped method.
+    """
+    counters = statistics.counters
+    counters.setdefault(counter, 0)
+    counters.setdefault(nodes_counter, 0)
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        if depth[0] == 0:
+            counters[counter] += 1
+            counters[nodes_counter] += count_nodes(self)
+        depth[0] += 1
+        try:
+            return function(self, *args, **kwargs)
+        finally:
+            depth[0] -= 1
+    return wrapper
+
+def timing(function: Callable, statistics: Statistics, name: str,
+           depth: List[int]) -> Callable:
+    """Wraps the given function so that each call to it is counted and timed,
+    and the lines of the proof returned by it are tallied if it is not called
+    from within another timed function.
+
+    Parameters:
+        function: function to wrap.
+        statistics: statistics to record the calls in.
+        name: name under which to record the calls.
+        depth: single-element list holding the current nesting depth of timed
+            calls, shared by all timed functions.
+
+    Returns:
+        The wrapped function.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        depth[0] += 1
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            depth[0] -= 1
+            statistics.calls[name] = statistics.calls.get(name, 0) + 1
+            statistics.wall_time[name] = \
+                statistics.wall_time.get(name, 0.0) + elapsed
+        if depth[0] == 0 and hasattr(result, 'lines'):
+            statistics.tally_lines(result)
+        return result
+    return wrapper
+
+def find(module_name: str, qualified_name: str) -> \
+        Optional[Tuple[Any, str, Any]]:
+    """Finds the specified function.
+
+    Parameters:
+        module_name: name of the module in which the function is defined.
+        qualified_name: name of the function in that module, qualified by the
+            name of its class if it is a method.
+
+    Returns:
+        A triple of the module or class that holds the function, the name of
+        the function in it, and the function, or ``None`` if the module is not
+        imported or does not define the function.
+    """
+    owner = sys.modules.get(module_name)
+    if owner is None:
+        return None
+    *path, name = qualified_name.split('.')
+    for attribute in path:
+        owner = getattr(owner, attribute, None)
+    if owner is None or name not in vars(owner):
+        return None
+    return owner, name, vars(owner)[name]
+
+def rebind(owner: Any, name: str, original: Any, replacement: Any,
+           patched: List[Tuple[Any, str, Any]]) -> None:
+    """Binds the given replacement in lieu of the given function, in the given
+    module or class and, for a module-level function, in every loaded module
+    that imported it.
+
+    Parameters:
+        owner: the module or class that holds the function.
+        name: the name of the function in it.
+        original: the function.
+        replacement: the function to bind instead.
+        patched: list to which to append the ``(namespace, name, original)``
+            triple of every rebinding, for restoring it.
+    """
+    namespaces = [owner]
+    if not isinstance(owner, type):
+        namespaces.extend(module for module in list(sys.modules.values())
+                          if module is not owner and
+                          getattr(module, '__dict__', {}).get(name) is
+                          original)
+    for namespace in namespaces:
+        setattr(namespace, name, replacement)
+        patched.append((namespace, name, original))
+
+@contextmanager
+def instrument() -> Iterator[Statistics]:
+    """Instruments the functions in `COUNTED`, `MEASURED` and `TIMED` for the
+    duration of the ``with`` block.
+
+    Returns:
+        A context manager that yields the `Statistics` gathered in the block,
+        which remain available after the block.
+    """
+    statistics = Statistics()
+    patched = []
+    depth = [0]
+    measured_depth = [0]
+    try:
+        for module_name, qualified_name, counter in COUNTED:
+            found = find(module_name, qualified_name)
+            if found is not None:
+                owner, name, function = found
+                rebind(owner, name, function,
+                       counting(function, statistics, counter), patched)
+        for module_name, qualified_name, counter, nodes_counter in MEASURED:
+            found = find(module_name, qualified_name)
+            if found is not None:
+                owner, name, function = found
+                rebind(owner, name, function,
+                       measuring(function, statistics, counter, nodes_counter,
+                                 measured_depth), patched)
+        for module_name, qualified_name in TIMED:
+            found = find(module_name, qualified_name)
+            if found is not None:
+                owner, name, function = found
+                rebind(owner, name, function,
+                       timing(function, statistics,
+                              module_name + '.' + qualified_name, depth),
+                       patched)
+        yield statistics
+    finally:
+        for namespace, name, original in reversed(patched):
+            setattr(namespace, name, original)
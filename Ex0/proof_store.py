@@ -0,0 +1,281 @@
+"""A content-addressed store of proofs, for reusing the proofs of lemmas that
+are proved again and again.
+
+Propositional proofs are stored as templates: the proof of a statement is
+stored with the variables of the statement renamed to canonical names (in the
+order of their first occurrence), so that a lookup of any statement that only
+renames these variables is answered by specializing the stored template.
+Predicate proofs are stored as they are, and keyed by their exact assumptions
+and conclusion: a lookup finds a predicate proof only if its statement is
+exactly the same, not if it only renames variables, constants or relations.
+
+The most recently used proofs are held in memory. If a directory is given,
+all stored propositional proofs are also persisted there, one proof file (see
+`propositions.proof_files`) per proof, named by the hash of the key of the
+proof. Proof files are plain text, so reading one runs no code from it, and a
+proof read back from a file is used only if it is a valid proof of the
+statement that it was looked up for, so the directory need not be trusted.
+Predicate proofs are held in memory only.
+"""
+
+from collections import OrderedDict
+import hashlib
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from propositions.syntax import Formula as PropositionalFormula, OP_VARIABLE
+from propositions.proofs import InferenceRule, Proof, SpecializedProofView
+from propositions.proof_files import read_proof_file, write_proof_file
+
+# the prefix of the keys of propositional proofs
+PROPOSITIONAL_KEY = 'propositional '
+
+def ordered_variables(formulas: List[PropositionalFormula]) -> List[str]:
+    """Computes the variables of the given formulae, in the order of their
+    first occurrence.
+
+    Parameters:
+        formulas: propositional formulae to scan, in order.
+
+    Returns:
+        The variables of the given formulae, each once.
+    """
+    variables = {}
+    for formula in formulas:
+        to_visit = [formula]
+        while len(to_visit) > 0:
+            node = to_visit.pop()
+            if node.opcode == OP_VARIABLE:
+                variables.setdefault(node.root, None)
+            else:
+                if node.second is not None:
+                    to_visit.append(node.second)
+                if node.first is not None:
+                    to_visit.append(node.first)
+    return list(variables)
+
+def canonical_renaming(statement: InferenceRule) -> Dict[str, str]:
+    """Computes the renaming of the variables of the given inference rule into
+    canonical names.
+
+    Parameters:
+        statement: propositional inference rule to rename.
+
+    Returns:
+        A map from the variables of the given rule, in the order of their first
+        occurrence in its assumptions and then in its conclusion, to
+        ``'z1'``, ``'z2'``, and so on.
+    """
+    variables = ordered_variables(list(statement.assumptions) +
+                                  [statement.conclusion])
+    return {variable: 'z' + str(index)
+            for index, variable in enumerate(variables, 1)}
+
+def rules_key(rules: Any) -> str:
+    """Computes the part of a store key that identifies the given rules or
+    assumptions/axioms.
+
+    Parameters:
+        rules: collection of rules or schemas.
+
+    Returns:
+        A string that identifies the given collection regardless of its order.
+    """
+    return '|'.join(sorted(str(rule) for rule in rules))
+
+def proof_key(proof: Any) -> Tuple[str, Optional[Dict[str, str]]]:
+    """Computes the store key of the given proof.
+
+    Parameters:
+        proof: propositional or predicate proof.
+
+    Returns:
+        A pair of the key, and of the canonical renaming of the statement of
+        the given proof if it is a propositional proof, or ``None`` otherwise.
+    """
+    if isinstance(proof, Proof):
+        return statement_key(proof.statement, proof.rules)
+    return statement_key((proof.assumptions, proof.conclusion), ())
+
+def statement_key(statement: Any, rules: Any) -> \
+        Tuple[str, Optional[Dict[str, str]]]:
+    """Computes the store key of the given statement with the given rules.
+
+    Parameters:
+        statement: propositional inference rule, or a pair of the assumptions
+            and conclusion of a predicate proof.
+        rules: the inference rules of a propositional proof, ignored for a
+            predicate proof (whose assumptions are part of its statement).
+
+    Returns:
+        A pair of the key, and of the canonical renaming of the given statement
+        if it is a propositional inference rule, or ``None`` otherwise.
+    """
+    if isinstance(statement, InferenceRule):
+        renaming = canonical_renaming(statement)
+        canonical = statement.specialize(
+            {variable: PropositionalFormula(name)
+             for variable, name in renaming.items()})
+        return PROPOSITIONAL_KEY + str(canonical) + ' via ' + \
+               rules_key(rules), renaming
+    assumptions, conclusion = statement
+    return 'predicate ' + rules_key(assumptions) + ' ==> ' + str(conclusion), \
+           None
+
+class ProofStore:
+    """A store of proofs, keyed by the canonical forms of their statements,
+    with least-recently-used eviction from memory and optional persistence.
+
+    Attributes:
+        capacity (`int`): the maximal number of proofs held in memory.
+        directory (`~typing.Optional`\\[`str`]): the directory in which the
+            propositional proofs are persisted, or ``None``.
+        hits (`int`): the number of lookups that found a proof.
+        misses (`int`): the number of lookups that found no proof.
+        _proofs (`~collections.OrderedDict`): the proofs held in memory, by
+            key, from the least recently used to the most recently used.
+    """
+    capacity: int
+    directory: Optional[str]
+    hits: int
+    misses: int
+    _proofs: 'OrderedDict[str, Any]'
+
+    def __init__(self, capacity: int = 1024,
+                 directory: Optional[str] = None) -> None:
+        """Initializes an empty `ProofStore`, or one backed by the proofs
+        already persisted in the given directory.
+
+        Parameters:
+            capacity: the maximal number of proofs to hold in memory.
+            directory: directory in which to persist the propositional proofs,
+                created if missing, or ``None`` to hold them in memory only.
+        """
+        assert capacity > 0
+        self.capacity = capacity
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._proofs = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory,
+                            hashlib.sha256(key.encode()).hexdigest() +
+                            '.proof')
+
+    def _remember(self, key: str, proof: Any) -> None:
+        self._proofs[key] = proof
+        self._proofs.move_to_end(key)
+        if len(self._proofs) > self.capacity:
+            self._proofs.popitem(last=False)
+
+    def _lookup(self, key: str) -> Any:
+        proof = self._proofs.get(key)
+        if proof is not None:
+            self._proofs.move_to_end(key)
+            return proof
+        if self.directory is None or not key.startswith(PROPOSITIONAL_KEY):
+            return None
+        try:
+            with open(self._path(key)) as file:
+                proof = read_proof_file(file)
+        except FileNotFoundError:
+            return None
+        except (ValueError, UnicodeDecodeError):
+            return None
+        # the directory may be stale or foreign, so the proof must prove the
+        # statement of the key, and be valid
+        if proof_key(proof)[0] != key or not proof.is_valid():
+            return None
+        self._remember(key, proof)
+        return proof
+
+    def put(self, proof: Any) -> None:
+        """Stores the given proof.
+
+        Parameters:
+            proof: valid propositional or predicate proof.
+        """
+        key, renaming = proof_key(proof)
+        if renaming is not None:
+            # store the template, i.e., the proof with canonical variables
+            proof = SpecializedProofView(
+                proof, {variable: PropositionalFormula(name)
+                        for variable, name in renaming.items()}).materialize()
+        self._remember(key, proof)
+        if self.directory is not None and renaming is not None:
+            path = self._path(key)
+            with open(path + '.tmp', 'w') as file:
+                write_proof_file(proof, file)
+            os.replace(path + '.tmp', path)
+
+    def get(self, statement: Any, rules: Any = ()) -> Any:
+        """Looks up a proof of the given statement.
+
+        Parameters:
+            statement: propositional inference rule, or a pair of the
+                assumptions and conclusion of a predicate proof.
+            rules: the inference rules of the propositional proof to look up,
+                ignored for a predicate proof.
+
+        Returns:
+            A valid proof of the given statement (via the given rules), or
+            ``None`` if none is stored. A stored propositional template is
+            specialized to the given statement without validating it again:
+            `put` takes valid proofs only, and a proof read from the directory
+            is validated when read.
+        """
+        key, renaming = statement_key(statement, rules)
+        proof = self._lookup(key)
+        if proof is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if renaming is not None:
+            proof = SpecializedProofView(
+                proof, {name: PropositionalFormula(variable)
+                        for variable, name in renaming.items()}).materialize()
+        return proof
+
+    def location(self, statement: Any, rules: Any = ()) -> Optional[str]:
+        """Computes the path of the file in which a proof of the given
+        statement is persisted (once it is stored).
+
+        Parameters:
+            statement: propositional inference rule, or a pair of the
+                assumptions and conclusion of a predicate proof.
+            rules: the inference rules of the propositional proof, ignored for
+                a predicate proof.
+
+        Returns:
+            The path of the file, which is the same for all the statements
+            that only rename the variables of the given one, or ``None`` if
+            the current store does not persist proofs of such statements.
+        """
+        if self.directory is None or not isinstance(statement, InferenceRule):
+            return None
+        return self._path(statement_key(statement, rules)[0])
+
+    def prove(self, statement: Any, rules: Any, build: Callable[[], Any]) -> \
+            Any:
+        """Looks up a proof of the given statement, and if none is stored,
+        builds one and stores it.
+
+        Parameters:
+            statement: propositional inference rule, or a pair of the
+                assumptions and conclusion of a predicate proof.
+            rules: the inference rules of the propositional proof to look up,
+                ignored for a predicate proof.
+            build: function that builds a valid proof of the given statement
+                (via the given rules).
+
+        Returns:
+            A valid proof of the given statement.
+        """
+        proof = self.get(statement, rules)
+        if proof is None:
+            proof = build()
+            self.put(proof)
+        return proof
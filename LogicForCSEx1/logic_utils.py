@@ -5,49 +5,336 @@
 
 """Python infrastructure for our logic course."""
 
-from functools import wraps
-from typing import Any, Dict, Iterator, Set, Type, TypeVar
+from __future__ import annotations
+from collections.abc import ItemsView
+from typing import Any, Iterator, Mapping, Tuple, Type, TypeVar
 
 T = TypeVar('T')
 
+def _frozen_setattr(self, name, value):
+    raise Exception("Cannot assign to field '" + name +
+                    "' of immutable class '" + type(self).__name__ + "'")
+
+def _frozen_delattr(self, name):
+    raise Exception("Cannot delete field '" + name +
+                    "' of immutable class '" + type(self).__name__ + "'")
+
+def _frozen_setstate(self, state):
+    # used by pickle and copy, which would otherwise restore the slots through
+    # the blocked __setattr__
+    if isinstance(state, tuple):
+        state = state[1]
+    if state is not None:
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
 def frozen(cls: Type[T]) -> Type[T]:
     """A class decorator that disallows assignment to instance variables after
-    construction."""
-    original_init = cls.__init__
-    original_setattr = cls.__setattr__
-    original_delattr = cls.__delattr__
-    mutable_ids: Set[int] = set()
-    @wraps(cls.__setattr__)
-    def setattr_wrapper(self, name, value):
-        if id(self) in mutable_ids:
-            original_setattr(self, name, value)
+    construction.
+
+    The decorated class is recreated with a ``__slots__`` entry for each of its
+    annotated instance variables (unless it already defines ``__slots__``), so
+    its instances have no ``__dict__``, and with ``__setattr__`` and
+    ``__delattr__`` that always raise. The ``__init__`` of the decorated class
+    should therefore populate the instance variables via
+    ``object.__setattr__``."""
+    namespace = dict(cls.__dict__)
+    if '__slots__' not in namespace:
+        namespace['__slots__'] = tuple(namespace.get('__annotations__', {}))
+    namespace.pop('__dict__', None)
+    namespace.pop('__weakref__', None)
+    namespace['__setattr__'] = _frozen_setattr
+    namespace['__delattr__'] = _frozen_delattr
+    namespace['__setstate__'] = _frozen_setstate
+    frozen_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+    frozen_cls.__qualname__ = cls.__qualname__
+    return frozen_cls
+
+# The persistent mapping below is a hash array mapped trie: every trie node
+# consumes _BITS bits of the key hash, and keeps only the children that are
+# actually present, packed in an entries tuple indexed through a bitmap.
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_MASK = (1 << 64) - 1
+_MISSING = object()
+
+def _bit_count(n: int) -> int:
+    return bin(n).count('1')
+
+class _TrieNode:
+    """An immutable trie node, whose entries are either ``(hash, key, value)``
+    leaf tuples or sub nodes."""
+    __slots__ = ('bitmap', 'entries')
+
+    def __init__(self, bitmap: int, entries: Tuple[Any, ...]) -> None:
+        self.bitmap = bitmap
+        self.entries = entries
+
+class _CollisionNode:
+    """An immutable trie node holding the ``(key, value)`` pairs of different
+    keys that have exactly the same hash."""
+    __slots__ = ('key_hash', 'items')
+
+    def __init__(self, key_hash: int, items: Tuple[Tuple[Any, Any], ...]) -> \
+            None:
+        self.key_hash = key_hash
+        self.items = items
+
+def _merge_leaves(shift: int, leaf1: Tuple[int, Any, Any],
+                  leaf2: Tuple[int, Any, Any]) -> Any:
+    # both leaves fall in the same slot of the parent node, so push them one
+    # level down (or into a collision node if their full hashes are equal)
+    if leaf1[0] == leaf2[0]:
+        return _CollisionNode(leaf1[0], ((leaf1[1], leaf1[2]),
+                                         (leaf2[1], leaf2[2])))
+    index1 = (leaf1[0] >> shift) & _MASK
+    index2 = (leaf2[0] >> shift) & _MASK
+    if index1 == index2:
+        return _TrieNode(1 << index1,
+                         (_merge_leaves(shift + _BITS, leaf1, leaf2),))
+    if index1 < index2:
+        return _TrieNode((1 << index1) | (1 << index2), (leaf1, leaf2))
+    return _TrieNode((1 << index1) | (1 << index2), (leaf2, leaf1))
+
+def _trie_get(node: Any, key_hash: int, key: Any) -> Any:
+    shift = 0
+    while node is not None:
+        if type(node) is _CollisionNode:
+            if node.key_hash == key_hash:
+                for item_key, item_value in node.items:
+                    if item_key is key or item_key == key:
+                        return item_value
+            return _MISSING
+        bit = 1 << ((key_hash >> shift) & _MASK)
+        if not node.bitmap & bit:
+            return _MISSING
+        entry = node.entries[_bit_count(node.bitmap & (bit - 1))]
+        if type(entry) is tuple:
+            if entry[0] == key_hash and (entry[1] is key or entry[1] == key):
+                return entry[2]
+            return _MISSING
+        node = entry
+        shift += _BITS
+    return _MISSING
+
+def _trie_set(node: Any, shift: int, key_hash: int, key: Any, value: Any) -> \
+        Tuple[Any, bool]:
+    """Returns the node obtained from the given one by mapping the given key
+    to the given value, and whether the key is new. Only the nodes on the path
+    to the key are copied, all others are shared with the given node."""
+    if node is None:
+        return _TrieNode(1 << ((key_hash >> shift) & _MASK),
+                         ((key_hash, key, value),)), True
+    if type(node) is _CollisionNode:
+        if node.key_hash != key_hash:
+            # the collision node is now just one child of a regular node
+            wrapper = _TrieNode(1 << ((node.key_hash >> shift) & _MASK),
+                                (node,))
+            return _trie_set(wrapper, shift, key_hash, key, value)
+        for index, (item_key, item_value) in enumerate(node.items):
+            if item_key is key or item_key == key:
+                if item_value is value:
+                    return node, False
+                items = node.items[:index] + ((key, value),) + \
+                        node.items[index + 1:]
+                return _CollisionNode(key_hash, items), False
+        return _CollisionNode(key_hash, node.items + ((key, value),)), True
+    bit = 1 << ((key_hash >> shift) & _MASK)
+    index = _bit_count(node.bitmap & (bit - 1))
+    entries = node.entries
+    if not node.bitmap & bit:
+        return _TrieNode(node.bitmap | bit,
+                         entries[:index] + ((key_hash, key, value),) +
+                         entries[index:]), True
+    entry = entries[index]
+    if type(entry) is tuple:
+        if entry[0] == key_hash and (entry[1] is key or entry[1] == key):
+            if entry[2] is value:
+                return node, False
+            new_entry, added = (key_hash, key, value), False
         else:
-            raise Exception("Cannot assign to field '" + name +
-                            "' of immutable class '" + cls.__name__ + "'")
-    @wraps(cls.__delattr__)
-    def delattr_wrapper(self, name, value):
-        if id(self) in mutable_ids:
-            original_delattr(self, name, value)
+            new_entry, added = _merge_leaves(shift + _BITS, entry,
+                                             (key_hash, key, value)), True
+    else:
+        new_entry, added = _trie_set(entry, shift + _BITS, key_hash, key,
+                                     value)
+        if new_entry is entry:
+            return node, False
+    return _TrieNode(node.bitmap,
+                     entries[:index] + (new_entry,) + entries[index + 1:]), \
+        added
+
+def _trie_delete(node: Any, shift: int, key_hash: int, key: Any) -> Any:
+    """Returns the node obtained from the given one by removing the given key,
+    the given node itself if the key is not in it, or ``None`` if the
+    resulting node is empty."""
+    if type(node) is _CollisionNode:
+        if node.key_hash != key_hash:
+            return node
+        items = tuple(item for item in node.items
+                      if not (item[0] is key or item[0] == key))
+        if len(items) == len(node.items):
+            return node
+        return _CollisionNode(key_hash, items)
+    bit = 1 << ((key_hash >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return node
+    index = _bit_count(node.bitmap & (bit - 1))
+    entries = node.entries
+    entry = entries[index]
+    if type(entry) is tuple:
+        if not (entry[0] == key_hash and (entry[1] is key or entry[1] == key)):
+            return node
+        new_entry = None
+    else:
+        new_entry = _trie_delete(entry, shift + _BITS, key_hash, key)
+        if new_entry is entry:
+            return node
+        # a child left with a single pair is pulled up into this node
+        if type(new_entry) is _CollisionNode and len(new_entry.items) == 1:
+            new_entry = (new_entry.key_hash,) + new_entry.items[0]
+        elif type(new_entry) is _TrieNode and len(new_entry.entries) == 1 \
+                and type(new_entry.entries[0]) is tuple:
+            new_entry = new_entry.entries[0]
+    if new_entry is None:
+        if node.bitmap == bit:
+            return None
+        return _TrieNode(node.bitmap & ~bit,
+                         entries[:index] + entries[index + 1:])
+    return _TrieNode(node.bitmap,
+                     entries[:index] + (new_entry,) + entries[index + 1:])
+
+def _trie_items(node: Any) -> Iterator[Tuple[Any, Any]]:
+    if node is None:
+        return
+    if type(node) is _CollisionNode:
+        yield from node.items
+        return
+    for entry in node.entries:
+        if type(entry) is tuple:
+            yield entry[1], entry[2]
         else:
-            raise Exception("Cannot delete field '" + name +
-                            "' of immutable class '" + cls.__name__ + "'")
-    @wraps(cls.__init__)
-    def init_wrapper(self, *args, **kwargs):
-        mutable_ids.add(id(self))
-        original_init(self, *args, **kwargs)
-        mutable_ids.remove(id(self))
-
-    setattr(cls, '__setattr__', setattr_wrapper)
-    setattr(cls, '__delattr__',  delattr_wrapper)
-    setattr(cls, '__init__', init_wrapper)
-    return cls
-
-class frozendict(Dict[Any, Any]):
-    """An immutable variant of the built-in dict class."""
-
-    def __init__(self, *args, **kwargs):
-        super().update(dict(*args, **kwargs))
-        
+            yield from _trie_items(entry)
+
+class _ItemsView(ItemsView):
+    """The items view of a `frozendict`, which iterates over the trie
+    directly rather than looking up every key."""
+    __slots__ = ()
+
+    def __iter__(self) -> Iterator[Tuple[Any, Any]]:
+        return _trie_items(self._mapping._root)
+
+class frozendict(Mapping[Any, Any]):
+    """An immutable and hashable mapping, implemented as a persistent hash
+    array mapped trie.
+
+    `set` and `delete` return new mappings in O(log n), sharing all the
+    untouched parts of the trie with the current mapping, so extending a
+    mapping never copies it. The hash of a mapping is computed once, on first
+    use.
+
+    Unlike a `dict` (which the former `frozendict` derived from), a
+    `frozendict` is iterated in the order of the hashes of its keys rather
+    than in insertion order, and is not serialized by `json` as is; the
+    callers that need an order sort the keys, and ``dict(mapping)`` converts
+    one for `json`."""
+    __slots__ = ('_root', '_size', '_hash')
+
+    def __init__(self, *args, **kwargs) -> None:
+        if hasattr(self, '_root'):
+            raise Exception('Cannot modify a frozendict')
+        if len(args) == 1 and not kwargs and isinstance(args[0], frozendict):
+            root, size = args[0]._root, args[0]._size
+        else:
+            root, size = None, 0
+            for key, value in dict(*args, **kwargs).items():
+                root, added = _trie_set(root, 0, hash(key) & _HASH_MASK, key,
+                                        value)
+                size += added
+        object.__setattr__(self, '_root', root)
+        object.__setattr__(self, '_size', size)
+        object.__setattr__(self, '_hash', None)
+
+    @staticmethod
+    def _from_root(root: Any, size: int) -> frozendict:
+        new = frozendict.__new__(frozendict)
+        object.__setattr__(new, '_root', root)
+        object.__setattr__(new, '_size', size)
+        object.__setattr__(new, '_hash', None)
+        return new
+
+    def __getitem__(self, key: Any) -> Any:
+        value = _trie_get(self._root, hash(key) & _HASH_MASK, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        value = _trie_get(self._root, hash(key) & _HASH_MASK, key)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key: Any) -> bool:
+        return _trie_get(self._root, hash(key) & _HASH_MASK, key) is not \
+               _MISSING
+
+    def __iter__(self) -> Iterator[Any]:
+        for key, _ in _trie_items(self._root):
+            yield key
+
+    def __len__(self) -> int:
+        return self._size
+
+    def items(self) -> ItemsView:
+        return _ItemsView(self)
+
+    def set(self, key: Any, value: Any) -> frozendict:
+        """Returns a copy of the current mapping in which the given key is
+        mapped to the given value."""
+        root, added = _trie_set(self._root, 0, hash(key) & _HASH_MASK, key,
+                                value)
+        if root is self._root:
+            return self
+        return frozendict._from_root(root, self._size + added)
+
+    def delete(self, key: Any) -> frozendict:
+        """Returns a copy of the current mapping without the given key (or the
+        current mapping itself, if it does not contain the key)."""
+        if self._root is None:
+            return self
+        root = _trie_delete(self._root, 0, hash(key) & _HASH_MASK, key)
+        if root is self._root:
+            return self
+        return frozendict._from_root(root, self._size - 1)
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, Mapping) or len(other) != self._size:
+            return False
+        if isinstance(other, frozendict) and self._hash is not None and \
+                other._hash is not None and self._hash != other._hash:
+            return False
+        for key, value in _trie_items(self._root):
+            if other.get(key, _MISSING) != value:
+                return False
+        return True
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            object.__setattr__(self, '_hash',
+                               hash(frozenset(_trie_items(self._root))))
+        return self._hash
+
+    def __repr__(self) -> str:
+        return '{' + ', '.join(repr(key) + ': ' + repr(value) for key, value
+                               in _trie_items(self._root)) + '}'
+
+    def __reduce__(self):
+        return frozendict, (dict(_trie_items(self._root)),)
+
     def update(self, *args, **kwargs):
         raise Exception('Cannot modify a frozendict')
 
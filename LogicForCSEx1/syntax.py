@@ -277,14 +277,17 @@ class Formula:
         """
         if is_variable(root) or is_constant(root):
             assert first is None and second is None
-            self.root = root
+            object.__setattr__(self, 'root', root)
         elif is_unary(root):
             assert type(first) is Formula and second is None
-            self.root, self.first = root, first
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'first', first)
         else:
             assert is_binary(root) and type(first) is Formula and \
                    type(second) is Formula
-            self.root, self.first, self.second = root, first, second
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'first', first)
+            object.__setattr__(self, 'second', second)
 
     def __eq__(self, other: object) -> bool:
         """Compares the current formula with the given one.
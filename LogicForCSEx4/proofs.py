@@ -104,8 +104,8 @@ class InferenceRule:
             assumptions: the assumptions for the rule.
             conclusion: the conclusion for the rule.
         """
-        self.assumptions = tuple(assumptions)
-        self.conclusion = conclusion
+        object.__setattr__(self, 'assumptions', tuple(assumptions))
+        object.__setattr__(self, 'conclusion', conclusion)
 
     def __eq__(self, other: object) -> bool:
         """Compares the current inference rule with the given one.
@@ -324,7 +324,7 @@ class Proof:
             the proof.
         lines (`~typing.Tuple`\\[`Line`]): the lines of the proof.
     """
-    statment: InferenceRule
+    statement: InferenceRule
     rules: FrozenSet[InferenceRule]
     lines: Tuple[Proof.Line, ...]
     
@@ -339,9 +339,9 @@ class Proof:
             rules: the allowed rules for the proof.
             lines: the lines for the proof.
         """
-        self.statement = statement
-        self.rules = frozenset(rules)
-        self.lines = tuple(lines)
+        object.__setattr__(self, 'statement', statement)
+        object.__setattr__(self, 'rules', frozenset(rules))
+        object.__setattr__(self, 'lines', tuple(lines))
 
     @frozen
     class Line:
@@ -388,10 +388,10 @@ class Proof:
             """
             assert (rule is None and assumptions is None) or \
                    (rule is not None and assumptions is not None)
-            self.formula = formula
-            self.rule = rule
+            object.__setattr__(self, 'formula', formula)
+            object.__setattr__(self, 'rule', rule)
             if assumptions is not None:
-                self.assumptions = tuple(assumptions)
+                object.__setattr__(self, 'assumptions', tuple(assumptions))
 
         def __repr__(self) -> str:
             """Computes a string representation of the current proof line.
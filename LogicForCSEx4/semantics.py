@@ -5,7 +5,7 @@
 
 """Semantic analysis of propositional-logic constructs."""
 
-from typing import AbstractSet, Iterable, Iterator, List, Mapping
+from typing import AbstractSet, Iterable, Iterator, List, Mapping, Optional
 
 import itertools
 
@@ -50,8 +50,8 @@ handle the case that we need to evaluate (X binary_operation Y)
 
 
 def evaluate_binary_operation_handler(formula: Formula, model: Model) -> bool:
-    first = evaluate(formula.first, model)  # the X
-    second = evaluate(formula.second, model)  # the Y
+    first = evaluate_helper(formula.first, model)  # the X
+    second = evaluate_helper(formula.second, model)  # the Y
     if formula.root == '&':
         if first is False or second is False:
             return False
@@ -102,20 +102,82 @@ def evaluate(formula: Formula, model: Model) -> bool:
     assert is_model(model)
     assert formula.variables().issubset(variables(model))
     # Task 2.1
-    if is_unary(formula.root):
-        return not evaluate(formula.first, model)
-    elif is_constant(formula.root):
+    # the recursion does not check the model again at every subformula
+    return evaluate_helper(formula, model)
+
+
+def evaluate_helper(formula: Formula, model: Model) -> bool:
+    opcode = formula.opcode
+    if opcode == OP_UNARY:
+        return not evaluate_helper(formula.first, model)
+    elif opcode == OP_CONSTANT:
         if formula.root == 'T':
             return True
         return False  # if its not 'T' than it must be 'F'
-    elif is_variable(formula.root):
+    elif opcode == OP_VARIABLE:
         return model.get(formula.root)
     else:
         # if we got here, than it must be binary operation
-        assert (is_binary(formula.root))
+        assert (opcode == OP_BINARY)
         return evaluate_binary_operation_handler(formula, model)
 
 
+def evaluate_in_partial_model(formula: Formula, model: Model) -> \
+        Optional[bool]:
+    """Calculates the truth value of the given formula in the given model,
+    which need not be defined over all the variables of the formula, if that
+    model determines it.
+
+    Parameters:
+        formula: formula to calculate the truth value of.
+        model: model over some (or all, or none) of the variables of the
+            formula, to calculate the truth value in.
+
+    Returns:
+        The truth value of the given formula in every model that extends the
+        given one, if it follows from the truth values of the operands of the
+        formula that the given model determines, ``None`` otherwise.
+
+    Examples:
+        >>> evaluate_in_partial_model(Formula.parse('(p->q)'), {'p': False})
+        True
+        >>> evaluate_in_partial_model(Formula.parse('(p->q)'), {'p': True})
+        >>> evaluate_in_partial_model(Formula.parse('(p|~p)'), {})
+    """
+    assert is_model(model)
+    # the recursion does not check the model again at every subformula
+    return evaluate_in_partial_model_helper(formula, model)
+
+def evaluate_in_partial_model_helper(formula: Formula, model: Model) -> \
+        Optional[bool]:
+    opcode = formula.opcode
+    if opcode == OP_VARIABLE:
+        return model.get(formula.root)
+    elif opcode == OP_CONSTANT:
+        return formula.root == 'T'
+    elif opcode == OP_UNARY:
+        value = evaluate_in_partial_model_helper(formula.first, model)
+        if value is None:
+            return None
+        return not value
+    # binary operation, one operand may be enough to determine it
+    first = evaluate_in_partial_model_helper(formula.first, model)
+    if first is False and formula.root in ('&', '->', '-&'):
+        return formula.root != '&'
+    if first is True and formula.root in ('|', '-|'):
+        return formula.root == '|'
+    second = evaluate_in_partial_model_helper(formula.second, model)
+    if second is False and formula.root in ('&', '-&'):
+        return formula.root == '-&'
+    if second is True and formula.root in ('|', '->', '-|'):
+        return formula.root != '-|'
+    if first is None or second is None:
+        return None
+    return evaluate_binary_operation_handler(
+        Formula(formula.root, Formula('T' if first else 'F'),
+                Formula('T' if second else 'F')), {})
+
+
 def all_models(variables: List[str], sorted_bool=False) -> Iterable[Model]:
     """Calculates all possible models over the given variables.
 
@@ -294,25 +356,13 @@ def synthesize_for_model(model: Model) -> Formula:
     """
     assert is_model(model)
     # Task 2.6
-    first = True
-    str_formula = ""
+    literals = list()
     for key, value in model.items():
-        if first:
-            first = False
-            if not value:
-                str_formula += '~'
-            str_formula += key
-        else:
-            str_formula = "(" + str_formula + "&"
-            if not value:
-                str_formula += '~'
-            str_formula += key
-            str_formula += ")"
-    # creating a list, that list[0] contain the string, because that what
-    # list_to_string function is required
-    list_of_string = list()
-    list_of_string.append(str_formula)
-    return str_to_form(list_of_string)
+        literal = Formula(key)
+        if not value:
+            literal = Formula('~', literal)
+        literals.append(literal)
+    return conjoin(literals)
 
 
 def edge_case(values):
@@ -351,44 +401,21 @@ def synthesize(variables: List[str], values: Iterable[bool]) -> Formula:
     assert len(variables) > 0
     # TODO: change set to Order Set
     # Task 2.7
-    first = True
-    final_formula = ""
-    formula_local = ""
-    # ((x, y) for x in A for y in B)
+    values = list(values)
+    if edge_case(values):
+        # return formula which always False
+        return Formula('&', Formula(variables[0]),
+                       Formula('~', Formula(variables[0])))
+    clauses = list()
     for model, bool_val in zip(all_models(variables), values):
-        if edge_case(values):
-            # return formula which always False
-            edge_case_str = "(" + variables[0] + "&" + "~" + variables[0] + ")"
-            list_of_string = list()
-            list_of_string.append(edge_case_str)
-            return str_to_form(list_of_string)
-
         # if its False, there is no need to add to the formula,
         # it already give False to anything that wasn't before classified
         # as true, if it true, than we need to add to the returned formula
-        if not bool_val:
-            continue
-        if not first:
-            final_formula = "(" + final_formula + "|"
-        # return formula that return first for the model
-
-        formula_local = str(synthesize_for_model(model))
-
-        # if we need that for this model to return False
-        # if not bool_val:
-        #     formula_local = "~" + formula_local
-        final_formula += formula_local
-        if not first:
-            final_formula += ")"
-        if first:
-            first = False
-
-    final_formula = final_formula.replace("~~", "")
-    # creating a list, that list[0] contain the string, because that what
-    # list_to_string function is required
-    list_of_string = list()
-    list_of_string.append(final_formula)
-    return str_to_form(list_of_string)
+        if bool_val:
+            clauses.append(synthesize_for_model(model))
+    # a balanced disjunction keeps the depth of the formula logarithmic in the
+    # number of clauses
+    return disjoin(clauses)
 
 
 # Tasks for Chapter 4
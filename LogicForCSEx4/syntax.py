@@ -6,13 +6,24 @@
 """Syntactic handling of propositional formulae."""
 
 from __future__ import annotations
-from typing import Mapping, Optional, Set, Tuple, Union
+from typing import Iterable, Mapping, Optional, Set, Tuple, Union
 
 from logic_utils import frozen
 import re
 
 VAR = 1
 OPERATOR = 2
+
+# Opcodes of the kind of the root of a formula, stored in every `Formula` so
+# that traversals do not need to classify the root string again
+OP_VARIABLE = 0
+OP_CONSTANT = 1
+OP_UNARY = 2
+OP_BINARY = 3
+
+# The opcode of every distinct root string seen so far, filled by `root_opcode`
+_root_opcodes = {}
+
 EMPTY_INPUT_ERR = "The given string in empty"
 UNARY_FOLLOWED_BY_NOTHING_ERR = "unary must be followed by valid" \
                                 "propositional formulae "
@@ -79,6 +90,32 @@ def is_binary(s: str) -> bool:
     # For Chapter 3:
     return s in {'&', '|',  '->', '+', '<->', '-&', '-|'}
 
+def root_opcode(s: str) -> Optional[int]:
+    """Classifies the given string as a root of a formula, caching the result
+    per distinct string.
+
+    Parameters:
+        s: string to classify.
+
+    Returns:
+        One of `OP_VARIABLE`, `OP_CONSTANT`, `OP_UNARY` and `OP_BINARY`, or
+        ``None`` if the given string is none of those.
+    """
+    opcode = _root_opcodes.get(s)
+    if opcode is None:
+        if is_variable(s):
+            opcode = OP_VARIABLE
+        elif is_constant(s):
+            opcode = OP_CONSTANT
+        elif is_unary(s):
+            opcode = OP_UNARY
+        elif is_binary(s):
+            opcode = OP_BINARY
+        else:
+            return None
+        _root_opcodes[s] = opcode
+    return opcode
+
 # return true if the given string is valid propositional formula
 def is_valid_propositional_formula(s: str) -> bool:
     list_str = [s]
@@ -88,34 +125,64 @@ def is_valid_propositional_formula(s: str) -> bool:
 
 
 def in_order_repr_helper(formula_obj, list_to_return) -> None:
-    need_to_close = False # True if need to close the parentheses - ')'
     if formula_obj is None:
         return
-    try:
-        # case where there is root both left and right son.
-        if is_binary(formula_obj.root) and type(formula_obj.first) is Formula\
-            and type(formula_obj.second) is Formula:
-            list_to_return[0] += "("
-            need_to_close = True
-        # case where there is root and left son, and no right son,
-        # for example ~F
-        elif is_unary(formula_obj.root):
-                list_to_return[0] += formula_obj.root
-                in_order_repr_helper(formula_obj.first, list_to_return)
-                return
-    except AttributeError:
-        pass
-    try:
+    opcode = formula_obj.opcode
+    # case where there is root both left and right son.
+    if opcode == OP_BINARY:
+        list_to_return[0] += "("
         in_order_repr_helper(formula_obj.first, list_to_return)
-    except AttributeError:
-        pass
-    list_to_return[0] += formula_obj.root
-    try:
+        list_to_return[0] += formula_obj.root
         in_order_repr_helper(formula_obj.second, list_to_return)
-    except AttributeError:
-        pass
-    if need_to_close:
         list_to_return[0] += ")"
+    # case where there is root and left son, and no right son,
+    # for example ~F
+    elif opcode == OP_UNARY:
+        list_to_return[0] += formula_obj.root
+        in_order_repr_helper(formula_obj.first, list_to_return)
+    else:
+        list_to_return[0] += formula_obj.root
+
+# appends the parts of the polish notation of the given formula to the given
+# list (the root first, and then the operands)
+def polish_helper(formula_obj, parts) -> None:
+    parts.append(formula_obj.root)
+    if formula_obj.first is not None:
+        polish_helper(formula_obj.first, parts)
+    if formula_obj.second is not None:
+        polish_helper(formula_obj.second, parts)
+
+POLISH_BINARY_OPERATORS = ('<->', '->', '-&', '-|', '&', '|', '+')
+
+# parses the formula in polish notation that starts at the given index of the
+# given string, and returns it with the index after it, or None and an error
+# message
+def polish_prefix_helper(s: str, start: int) -> \
+        Tuple[Optional[Formula], Union[int, str]]:
+    if start == len(s):
+        return None, EMPTY_INPUT_ERR
+    if s[start] == '~':
+        first, end = polish_prefix_helper(s, start + 1)
+        if first is None:
+            return None, end
+        return Formula('~', first), end
+    for operator in POLISH_BINARY_OPERATORS:
+        if s.startswith(operator, start):
+            first, middle = polish_prefix_helper(s, start + len(operator))
+            if first is None:
+                return None, middle
+            second, end = polish_prefix_helper(s, middle)
+            if second is None:
+                return None, end
+            return Formula(operator, first, second), end
+    if is_constant(s[start]):
+        return Formula(s[start]), start + 1
+    if 'p' <= s[start] <= 'z':
+        end = start + 1
+        while end < len(s) and s[end].isdigit():
+            end += 1
+        return Formula(s[start:end]), end
+    return None, VAR_ERR
 
 """
 This function traverse the tree, and add to the given set all the
@@ -126,30 +193,19 @@ OPERATOR = 2
 def in_order_traverse(formula_obj, set_to_store : Set[str], _type):
     if formula_obj is None:
         return
-    try:
-        in_order_traverse(formula_obj.first, set_to_store, _type)
-    except AttributeError:
-        pass
+    in_order_traverse(formula_obj.first, set_to_store, _type)
 
-    if _type == VAR and is_variable(formula_obj.root):
+    if _type == VAR and formula_obj.opcode == OP_VARIABLE:
         set_to_store.add(formula_obj.root)
-    elif _type == OPERATOR and\
-            (is_unary(formula_obj.root) or is_binary(formula_obj.root) or\
-             is_constant(formula_obj.root)):
+    elif _type == OPERATOR and formula_obj.opcode != OP_VARIABLE:
         set_to_store.add(formula_obj.root)
 
-    try:
-        in_order_traverse(formula_obj.second, set_to_store, _type)
-    except AttributeError:
-        pass
+    in_order_traverse(formula_obj.second, set_to_store, _type)
 
 def in_order_traverse_substitute_variables_helper(formula_obj, dict, lst):
     if formula_obj is None:
         return
-    try:
-        in_order_traverse_substitute_variables_helper(formula_obj.first, dict, lst)
-    except AttributeError:
-        pass
+    in_order_traverse_substitute_variables_helper(formula_obj.first, dict, lst)
     print("Formula Obj is : ", formula_obj)
     if str(formula_obj) in dict:
         print("Change this : ", formula_obj)
@@ -162,10 +218,7 @@ def in_order_traverse_substitute_variables_helper(formula_obj, dict, lst):
         print("Added this : ", str(formula_obj))
         lst.append(formula_obj.root)
 
-    try:
-        in_order_traverse_substitute_variables_helper(formula_obj.second, dict, lst)
-    except AttributeError:
-        pass
+    in_order_traverse_substitute_variables_helper(formula_obj.second, dict, lst)
     print("The end is : ", str(formula_obj))
     return formula_obj
 
@@ -209,13 +262,15 @@ def handle_parenthesis_case(list_str):
     part1 = str_to_form(list_str)
     part2 = handle_binary(list_str) # should be binary operator
     part3 = str_to_form(list_str)
-    if part1 is None or not (is_valid_propositional_formula(str(part1))):
+    # the parts are formulae built by str_to_form, so they need no re-parsing
+    # of their string representations (which took exponential time in depth)
+    if part1 is None:
         list_str[0] = PROPOSITIONAL_FORMULAE_ERR
         return None
     elif part2 is None:
         list_str[0] = OPERATOR_ERR
         return None
-    elif part3 is None or not is_valid_propositional_formula(str(part3)):
+    elif part3 is None:
         list_str[0] = PROPOSITIONAL_FORMULAE_ERR
         return None
     # need to end with ')'
@@ -281,17 +336,7 @@ def str_to_form(list_str):
         return None
 
 def check_for_null(formula):
-    first = False
-    second = False
-    try:
-        tmp1 = formula.first
-    except AttributeError:
-        first = True
-    try:
-        tmp2 = formula.second
-    except AttributeError:
-        second = True
-    return first, second
+    return formula.first is None, formula.second is None
 
 # this function check if self.first exist or not, and return the formula
 #  according to it (if it does not exist change the dict according to it)
@@ -336,13 +381,16 @@ class Formula:
         root (`str`): the constant, atomic proposition, or operator at the root
             of the formula tree.
         first (`~typing.Optional`\\[`Formula`]): the first operand to the root,
-            if the root is a unary or binary operator.
+            if the root is a unary or binary operator, ``None`` otherwise.
         second (`~typing.Optional`\\[`Formula`]): the second operand to the
-            root, if the root is a binary operator.
+            root, if the root is a binary operator, ``None`` otherwise.
+        opcode (`int`): the kind of the root, one of `OP_VARIABLE`,
+            `OP_CONSTANT`, `OP_UNARY` and `OP_BINARY`.
     """
     root: str
     first: Optional[Formula]
     second: Optional[Formula]
+    opcode: int
 
     def __init__(self, root: str, first: Optional[Formula] = None,
                  second: Optional[Formula] = None) -> None:
@@ -355,19 +403,23 @@ class Formula:
             second: the second operand to the root, if the root is a binary
                 operator.
         """
-        if is_variable(root) or is_constant(root):
+        opcode = root_opcode(root)
+        if opcode == OP_VARIABLE or opcode == OP_CONSTANT:
             assert first is None and second is None
-            self.root = root
-        elif is_unary(root):
+        elif opcode == OP_UNARY:
             if type(first) is not Formula:
                 print("first is : ", first, "  And root is : ", root)
             assert type(first) is Formula and second is None
-            self.root, self.first = root, first
         else:
             # print("Second is : ", second, "\n And type is : ", str(type(second)))
-            assert is_binary(root) and type(first) is Formula and \
+            assert opcode == OP_BINARY and type(first) is Formula and \
                    type(second) is Formula
-            self.root, self.first, self.second = root, first, second
+        # every field is populated, operands that the root does not take are
+        # None
+        object.__setattr__(self, 'root', root)
+        object.__setattr__(self, 'first', first)
+        object.__setattr__(self, 'second', second)
+        object.__setattr__(self, 'opcode', opcode)
 
     def __eq__(self, other: object) -> bool:
         """Compares the current formula with the given one.
@@ -494,6 +546,28 @@ class Formula:
             The polish notation representation of the current formula.
         """
         # Optional Task 1.7
+        parts = []
+        polish_helper(self, parts)
+        return ''.join(parts)
+
+    @staticmethod
+    def parse_polish_prefix(s: str) -> Tuple[Union[Formula, None], str]:
+        """Parses a prefix of the given string, in polish notation, into a
+        formula.
+
+        Parameters:
+            s: string to parse.
+
+        Returns:
+            A pair of the parsed formula and the unparsed suffix of the string,
+            as in `parse_prefix`. If no prefix of the given string is a valid
+            polish notation representation of a formula, then the returned pair
+            is of ``None`` and an error message.
+        """
+        formula, end = polish_prefix_helper(s, 0)
+        if formula is None:
+            return None, end
+        return formula, s[end:]
 
     @staticmethod
     def parse_polish(s: str) -> Formula:
@@ -506,6 +580,9 @@ class Formula:
             A formula whose polish notation representation is the given string.
         """
         # Optional Task 1.8
+        formula, remainder = Formula.parse_polish_prefix(s)
+        assert formula is not None and remainder == ''
+        return formula
 
 # Tasks for Chapter 3
 
@@ -515,29 +592,24 @@ class Formula:
         value = self.root
         left = None
         right = None
-        try:
-            if self.first is not None:
-                if str(self.first) in dict:
-                    left = dict[str(self.first)]
-                else:
-                    left = self.first.copy_and_substitute_variables(dict)
-        except AttributeError:
-            pass
-        try:
-            if self.second is not None:
-                if str(self.second) in dict:
-                    right = dict[str(self.second)]
-                else:
-                    right = self.second.copy_and_substitute_variables(dict)
-        except AttributeError:
-            pass
+        # the keys are variables or constants, so only a leaf can be
+        # substituted, and there is no need to compute the string of each
+        # operand
+        if self.first is not None:
+            if self.first.first is None and self.first.root in dict:
+                left = dict[self.first.root]
+            else:
+                left = self.first.copy_and_substitute_variables(dict)
+        if self.second is not None:
+            if self.second.first is None and self.second.root in dict:
+                right = dict[self.second.root]
+            else:
+                right = self.second.copy_and_substitute_variables(dict)
         if value in dict:
-            valueInDict = str(dict[value])
-            if not (is_variable(valueInDict) or is_binary(valueInDict)
-                    or is_constant(valueInDict)):
+            if dict[value].first is not None:
                 return dict[value]
             else:
-                value = valueInDict
+                value = dict[value].root
 
         return Formula(value, left, right)
 
@@ -580,22 +652,19 @@ class Formula:
         value = self.root
         left = None
         right = None
-        try:
-            if self.first is not None:
-                if str(self.first) in dict:
-                   left = operator_substitute_helper(self, dict, "left")
-                else:
-                    left = self.first.copy_and_substitute_operator(dict)
-        except AttributeError:
-            pass
-        try:
-            if self.second is not None:
-                if str(self.second) in dict:
-                    right =  operator_substitute_helper(self, dict, "right")
-                else:
-                    right = self.second.copy_and_substitute_operator(dict)
-        except AttributeError:
-            pass
+        # the keys are operators, so only a constant operand can be
+        # substituted as a whole
+        if self.first is not None:
+            if self.first.opcode == OP_CONSTANT and self.first.root in dict:
+               left = operator_substitute_helper(self, dict, "left")
+            else:
+                left = self.first.copy_and_substitute_operator(dict)
+        if self.second is not None:
+            if self.second.opcode == OP_CONSTANT and \
+                    self.second.root in dict:
+                right =  operator_substitute_helper(self, dict, "right")
+            else:
+                right = self.second.copy_and_substitute_operator(dict)
         if value in dict:
             return dict[value].substitute_variables({'p' : left, 'q' : right}, True)
 
@@ -628,3 +697,85 @@ class Formula:
         # Task 3.4
 
         return self.copy_and_substitute_operator(substitution_map)
+
+
+def join_formulas(operator: str, formulas: Iterable[Formula],
+                  shape: str = 'balanced') -> Formula:
+    """Joins the given formulas, in order, with the given binary operator.
+
+    Parameters:
+        operator: binary operator to join the formulas with.
+        formulas: nonempty formulas to join.
+        shape: ``'left'`` for a chain nested to the left, e.g.,
+            ``((f1&f2)&f3)``, ``'right'`` for a chain nested to the right,
+            e.g., ``(f1&(f2&f3))``, or ``'balanced'`` for a tree whose depth
+            is logarithmic in the number of formulas, e.g.,
+            ``((f1&f2)&(f3&f4))``.
+
+    Returns:
+        The joined formula, or the single given formula if only one is given.
+
+    Examples:
+        >>> join_formulas('->', [Formula('p'), Formula('q'), Formula('r')],
+        ...               'right')
+        (p->(q->r))
+    """
+    assert is_binary(operator)
+    assert shape in ('balanced', 'left', 'right')
+    formulas = tuple(formulas)
+    assert len(formulas) > 0
+    if shape == 'left':
+        joined = formulas[0]
+        for formula in formulas[1:]:
+            joined = Formula(operator, joined, formula)
+        return joined
+    if shape == 'right':
+        joined = formulas[-1]
+        for formula in reversed(formulas[:-1]):
+            joined = Formula(operator, formula, joined)
+        return joined
+    return join_balanced_helper(operator, formulas, 0, len(formulas))
+
+# join formulas[start:end] by splitting it in the middle, so the recursion is
+# only as deep as the returned formula
+def join_balanced_helper(operator, formulas, start, end):
+    if end - start == 1:
+        return formulas[start]
+    middle = (start + end) // 2
+    return Formula(operator,
+                   join_balanced_helper(operator, formulas, start, middle),
+                   join_balanced_helper(operator, formulas, middle, end))
+
+def conjoin(formulas: Iterable[Formula], shape: str = 'balanced') -> Formula:
+    """Computes the conjunction of the given formulas.
+
+    Parameters:
+        formulas: nonempty formulas to conjoin.
+        shape: the nesting of the conjunction, as in `join_formulas`.
+
+    Returns:
+        The conjunction of the given formulas.
+
+    Examples:
+        >>> conjoin([Formula('p'), Formula('q'), Formula('r'), Formula('s')])
+        ((p&q)&(r&s))
+        >>> conjoin([Formula('p'), Formula('q'), Formula('r')], 'left')
+        ((p&q)&r)
+    """
+    return join_formulas('&', formulas, shape)
+
+def disjoin(formulas: Iterable[Formula], shape: str = 'balanced') -> Formula:
+    """Computes the disjunction of the given formulas.
+
+    Parameters:
+        formulas: nonempty formulas to disjoin.
+        shape: the nesting of the disjunction, as in `join_formulas`.
+
+    Returns:
+        The disjunction of the given formulas.
+
+    Examples:
+        >>> disjoin([Formula('p'), Formula('q'), Formula('r')], 'right')
+        (p|(q|r))
+    """
+    return join_formulas('|', formulas, shape)
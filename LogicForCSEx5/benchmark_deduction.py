@@ -0,0 +1,55 @@
+"""Measures the size of the proofs produced by repeated applications of the
+Deduction Theorem (`propositions.deduction.remove_assumption`), and the time
+that they take.
+
+The proof used is of ``'p20'`` from ``'p0'``, ``'(p0->p1)'``, ...,
+``'(p19->p20)'``, and the last 1 to 20 of its assumptions are removed one
+after the other. The time that it takes to remove the same number of
+assumptions at once with `propositions.deduction.remove_assumptions` is shown
+next to it.
+
+Run from the root of the code tree (next to logic_utils.py and the
+propositions package):
+
+    python benchmark_deduction.py
+"""
+
+import time
+
+from propositions.syntax import Formula
+from propositions.proofs import InferenceRule, Proof
+from propositions.axiomatic_systems import MP
+from propositions.deduction import remove_assumption, remove_assumptions
+
+LENGTH = 20
+
+def chain_proof(length: int) -> Proof:
+    assumptions = [Formula('p0')]
+    lines = [Proof.Line(Formula('p0'))]
+    for index in range(1, length + 1):
+        conditional = Formula('->', Formula('p' + str(index - 1)),
+                              Formula('p' + str(index)))
+        assumptions.append(conditional)
+        lines.append(Proof.Line(conditional))
+        lines.append(Proof.Line(conditional.second, MP,
+                                [len(lines) - 2, len(lines) - 1]))
+    return Proof(InferenceRule(assumptions, lines[-1].formula), {MP}, lines)
+
+def main() -> None:
+    original = chain_proof(LENGTH)
+    proof = original
+    print('%8s %10s %12s %12s' % ('removed', 'lines', 'msec', 'batch msec'))
+    print('%8d %10d %12s %12s' % (0, len(proof.lines), '-', '-'))
+    elapsed = 0.0
+    for removed in range(1, LENGTH + 1):
+        start = time.perf_counter()
+        proof = remove_assumption(proof)
+        elapsed += time.perf_counter() - start
+        start = time.perf_counter()
+        remove_assumptions(original, removed)
+        batch_elapsed = time.perf_counter() - start
+        print('%8d %10d %12.1f %12.1f' % (removed, len(proof.lines),
+                                          elapsed * 1e3, batch_elapsed * 1e3))
+
+if __name__ == '__main__':
+    main()
@@ -5,9 +5,12 @@
 
 """Useful proof manipulation maneuvers in propositional logic."""
 
+from typing import Callable, Tuple
+
 from propositions.syntax import *
 from propositions.proofs import *
 from propositions.axiomatic_systems import *
+from propositions.prover import *
 
 def prove_corollary(antecedent_proof: Proof, consequent: Formula,
                     conditional: InferenceRule) -> Proof:
@@ -37,12 +40,9 @@ def prove_corollary(antecedent_proof: Proof, consequent: Formula,
     statement = InferenceRule(antecedent_proof.statement.assumptions,
                                        consequent)
 
-    all_lines = list()
-    count = 0
-    # coping all the antecedent_proof
-    for line in antecedent_proof.lines:
-        count +=1
-        all_lines.append(line)
+    # coping all the antecedent_proof (the lines themselves are shared)
+    all_lines = list(antecedent_proof.lines)
+    count = len(all_lines)
     # copying the right (p->q) using the conditional rule
     all_lines.append(Proof.Line(Formula('->', antecedent_proof.statement.conclusion,
                                         statement.conclusion),conditional, []))
@@ -103,18 +103,14 @@ def combine_proofs(antecedent1_proof: Proof, antecedent2_proof: Proof,
         all_rules.append(rule)
     all_rules.append(double_conditional)
 
-    all_lines = list()
-    count = 0
-    for line in antecedent1_proof.lines:
-        count +=1
-        all_lines.append(line)
-    part1_idx = count
-    for line in antecedent2_proof.lines:
-        count+=1
-        # because all of this proof come after antecedent1_proof, need to
-        # shift all the assumptions idx by number of line in the antecedent1_proof
-        shift_line_assumptions(all_lines, part1_idx, line)
-    part2_idx = count
+    all_lines = list(antecedent1_proof.lines)
+    part1_idx = len(all_lines)
+    # because all of this proof come after antecedent1_proof, need to
+    # shift all the assumptions idx by number of line in the antecedent1_proof
+    # (only the lines that cite other lines are copied for that)
+    all_lines.extend(ShiftedProofView(antecedent2_proof, part1_idx))
+    part2_idx = len(all_lines)
+    count = part2_idx
     # (part1->(part2->c)) = (a->(b->c))
     # part3 = (part2->c) = (part2->consequent)
     part3 = Formula('->',all_lines[part2_idx - 1].formula, consequent)
@@ -138,6 +134,118 @@ def convert_assumption_line(new_line_proof, old_proof_idx):
         to_return.append(new_line_proof[idx])
     return to_return
 
+def assumption_remover(assumption: Formula,
+                       append_line: Callable[[Proof.Line], int]) -> \
+        Tuple[Callable[[Proof.Line], int], Callable[[], None],
+              Callable[[int, int], None]]:
+    """Creates the functions by which `remove_assumption` converts the lines of
+    a proof, one at a time, into the lines of a proof without the given
+    assumption.
+
+    Parameters:
+        assumption: the assumption `p` to remove.
+        append_line: function that appends a given line to the new proof, and
+            returns its line number there.
+
+    Returns:
+        A triple of functions: one that converts the given next line of the
+        proof (whose assumptions are the numbers of earlier lines given to it)
+        and returns its line number among the lines given to it, one to call
+        after the last line of the proof, which appends
+        ``'(``\ `p`\ ``->``\ `conclusion`\ ``)'`` as the last line of the new
+        proof, where `conclusion` is the formula of that last line, and one
+        that forgets what is kept about the given lines from the given first
+        line number up to (and excluding) the given last one, which must not
+        be cited by any line that is given later.
+    """
+    # the formulas of the lines given so far (and not forgotten), by number
+    formulas = dict()
+    # only the lines that (transitively) depend on the removed assumption
+    # (lets call it p) need to be turned into 'p->a'. every other line 'a' is
+    # copied once, and wrapped into 'p->a' only if a dependent line needs it.
+    # plain_lines[i] = the index in the new proof of a, if the line i of the
+    #                  old proof (a) does not depend on p, otherwise None
+    # implied_lines[i] = the index in the new proof of p->a, or None if it was
+    #                    not needed (yet)
+    plain_lines = dict()
+    implied_lines = dict()
+    count = 0
+
+    def implication_line(idx):
+        # returns the index of p->a where a is the line idx of the old proof,
+        # adding it from a if it is not there yet
+        if implied_lines[idx] is None:
+            formula = formulas[idx]
+            #(a->(p->a)), lets mark part2 = (p->a)
+            part2 = Formula('->', assumption, formula)
+            i1_idx = append_line(Proof.Line(Formula('->', formula, part2), I1,
+                                            []))
+            implied_lines[idx] = append_line(Proof.Line(
+                part2, MP, [plain_lines[idx], i1_idx]))
+        return implied_lines[idx]
+
+    def add_line(line):
+        # we want to prove that 'p->statement.conclusion' where p is the
+        #  removed assumption
+        nonlocal count
+        idx = count
+        count += 1
+        formulas[idx] = line.formula
+        plain_lines[idx] = None
+        implied_lines[idx] = None
+        if line.formula == assumption:
+            # if it is the assumption that we  removed from the
+            # list of assumption (lest call it p)
+            # we can write '(p->p)' and its valid from I0
+            implied_lines[idx] = append_line(Proof.Line(
+                Formula('->', assumption, assumption), I0, []))
+
+        elif line.is_assumption() or line.rule != MP:
+            # an assumption or a rule without assumptions, does not depend
+            # on p
+            plain_lines[idx] = append_line(line)
+
+        elif plain_lines[line.assumptions[0]] is not None and \
+                plain_lines[line.assumptions[1]] is not None:
+            # MP on lines that do not depend on p, does not depend on p
+            plain_lines[idx] = append_line(Proof.Line(
+                line.formula, MP, [plain_lines[line.assumptions[0]],
+                                   plain_lines[line.assumptions[1]]]))
+
+        else: # line rule is MP, on at least one line that depends on p
+            # ((p ->(a->b))->((p->a)->(p->b)))
+            # part3 = ((p ->(a->b))
+            # part4 = (p->a)
+            # part5 = (p->b)
+            part3_idx = implication_line(line.assumptions[1])
+            part4_idx = implication_line(line.assumptions[0])
+            part3 = Formula('->', assumption, formulas[line.assumptions[1]])
+            part4 = Formula('->', assumption, formulas[line.assumptions[0]])
+
+            part5 = Formula("->", assumption , line.formula)
+
+            d_idx = append_line(Proof.Line(
+                Formula('->', part3, Formula('->', part4, part5)), D, []))
+            mp_idx = append_line(Proof.Line(Formula('->', part4, part5), MP,
+                                            [part3_idx, d_idx]))
+            implied_lines[idx] = append_line(Proof.Line(part5, MP,
+                                                        [part4_idx, mp_idx]))
+        return idx
+
+    def finish():
+        # the conclusion itself may not depend on p
+        implication_line(count - 1)
+
+    def forget(first, last):
+        # only the lines that are still kept are looked at, so forgetting
+        # takes no longer than the lines that were kept
+        for idx in [idx for idx in formulas if first <= idx < last]:
+            del formulas[idx]
+            del plain_lines[idx]
+            del implied_lines[idx]
+
+    return add_line, finish, forget
+
 def remove_assumption(proof: Proof) -> Proof:
     """Converts a proof of some `conclusion` formula, the last assumption of
     which is an assumption `assumption`, into a proof of
@@ -163,78 +271,21 @@ def remove_assumption(proof: Proof) -> Proof:
     for rule in proof.rules:
         assert rule == MP or len(rule.assumptions) == 0
     # Task 5.4
-    # count - represent the number of line that we added so far compare to the
-    #         original proof.
-    count = 0
     last_assumption = proof.statement.assumptions[-1]
     # the new set of assumption is : (same without last assumption)
     assumption_without_last = proof.statement.assumptions[:-1]
     new_statement = InferenceRule(assumption_without_last, Formula('->', last_assumption, proof.statement.conclusion))
     all_lines = list()
-    # represent at the arr[1] = the index in the new proof where p->a
-    # where a is old_proof[1] = a
-    new_lines_of_proof = list()
-    for idx,line in enumerate(proof.lines):
-        # we want to prove that 'p->statement.conclusion' where p is the
-        #  last assumption
-        if line.formula == last_assumption:
-            # if it is the assumption that we  removed from the
-            # list of assumption (lest call it p)
-            # we can write '(p->p)' and its valid from I0
-            all_lines.append(Proof.Line(
-                Formula('->', last_assumption, last_assumption),
-                I0, []))
-            new_lines_of_proof.append(idx + count)
-
-
-        elif line in assumption_without_last or line.rule != MP:
-            # I would mark the assumption by 'q'
-            all_lines.append(line) # adding the assumption it self
-                                   #  or the rule (without assumption)
-            count +=1
 
-            #(q->(p->q)), lets mark part2 = (p->q)
-            part2 = Formula('->',last_assumption,line.formula)
-            pqp = Formula('->', line.formula, part2)
-
-            all_lines.append(Proof.Line(pqp, I1, []))
-
-            # all_lines.append(Proof.Line(pqp, I1, []))
-            count +=1
-
-            # no need to shift, using the last two lines.
-            all_lines.append(Proof.Line(part2, MP , [(len(all_lines) - 2), (len(all_lines) - 1)]))
-            new_lines_of_proof.append(idx + count)
-
-
-        else: # line rule is MP
-            # ((p ->(a->b))->((p->a)->(p->b)))
-            # part3 = ((p ->(a->b))
-            # part4 = (p->a)
-            # part5 = (p->b)
-
-
-            part3 = all_lines[new_lines_of_proof[line.assumptions[1]]]
-
-            part4 = all_lines[new_lines_of_proof[line.assumptions[0]]]
-
-            part5 = Formula("->", last_assumption , line.formula)
-
-            all_lines.append(Proof.Line(Formula('->', part3.formula,
-                                                Formula('->',part4.formula,part5))
-                                        , D, []))
-            count +=1
-
-            all_lines.append(Proof.Line(Formula('->',part4.formula,part5), MP,
-                                        [new_lines_of_proof[line.assumptions[1]]
-                                            , len(all_lines)-1]))
-            count+=1
-
-            all_lines.append(Proof.Line(part5, MP,
-                                        [new_lines_of_proof[line.assumptions[0]],
-                                         len(all_lines) - 1]))
-            new_lines_of_proof.append(idx + count)
+    def append_line(line):
+        all_lines.append(line)
+        return len(all_lines) - 1
 
+    # the lines are converted one by one by the functions below
+    add_line, finish, _ = assumption_remover(last_assumption, append_line)
+    for line in proof.lines:
+        add_line(line)
+    finish()
 
     # adding to the rules I0,I1,D,MP
     rule_to_append = [I0,I1,D,MP]
@@ -248,6 +299,67 @@ def remove_assumption(proof: Proof) -> Proof:
 
     return Proof(new_statement, new_rules, all_lines)
 
+def remove_assumptions(proof: Proof, k: int) -> Proof:
+    """Converts a proof of some `conclusion` formula, the last `k` assumptions
+    of which are `assumption1`, ..., `assumptionk`, into a proof of
+    ``'(``\ `assumption1`\ ``->(``...\ ``->(``\ `assumptionk`\ ``->``\ `conclusion`\ ``)``...\ ``))'``
+    from the same assumptions except these `k`, in a single pass over the
+    lines of the given proof.
+
+    The result is the same as that of `k` consecutive calls to
+    `remove_assumption`, but each line of the given proof is converted with
+    respect to all `k` assumptions as soon as it is read, so none of the
+    intermediate proofs is built or validated.
+
+    Parameters:
+        proof: valid proof to convert, with at least `k` assumptions, via some
+            set of inference rules all of which have no assumptions except
+            perhaps `~propositions.axiomatic_systems.MP`.
+        k: the number of assumptions to remove, at least one.
+
+    Return:
+        A valid proof of the above nested implication from the same
+        assumptions as the given proof except the last `k`, via the same
+        inference rules as the given proof and in addition
+        `~propositions.axiomatic_systems.MP`,
+        `~propositions.axiomatic_systems.I0`,
+        `~propositions.axiomatic_systems.I1`, and
+        `~propositions.axiomatic_systems.D`.
+    """
+    assert proof.is_valid()
+    assert 0 < k <= len(proof.statement.assumptions)
+    for rule in proof.rules:
+        assert rule == MP or len(rule.assumptions) == 0
+    kept_assumptions = proof.statement.assumptions[:-k]
+    removed_assumptions = proof.statement.assumptions[-k:]
+    conclusion = proof.statement.conclusion
+    for assumption in reversed(removed_assumptions):
+        conclusion = Formula('->', assumption, conclusion)
+    all_lines = list()
+
+    def append_line(line):
+        all_lines.append(line)
+        return len(all_lines) - 1
+
+    # one remover per removed assumption, each feeding its lines to the one of
+    # the assumption before it, so the remover of the last assumption gets
+    # the lines of the proof and the remover of the first one writes the
+    # lines of the new proof
+    add_line = append_line
+    finishes = list()
+    for assumption in removed_assumptions:
+        add_line, finish, _ = assumption_remover(assumption, add_line)
+        finishes.append(finish)
+    for line in proof.lines:
+        add_line(line)
+    # the last assumption is removed first, and finishing its remover may
+    # still feed lines to the removers of the assumptions before it
+    for finish in reversed(finishes):
+        finish()
+
+    return Proof(InferenceRule(kept_assumptions, conclusion),
+                 proof.rules.union({MP, I0, I1, D}), all_lines)
+
 
 def proof_from_inconsistency(proof_of_affirmation: Proof,
                              proof_of_negation: Proof, conclusion: Formula) -> \
@@ -283,14 +395,12 @@ def proof_from_inconsistency(proof_of_affirmation: Proof,
     # I mark the conclusion as 'q' in my explanation
     statement = InferenceRule(proof_of_affirmation.statement.assumptions, conclusion)
     # adding all of the affirmation proof
-    for line in proof_of_affirmation.lines:
-        all_lines.append(line)
+    all_lines.extend(proof_of_affirmation.lines)
     shift_by = len(all_lines)
     affirmation_last_line = shift_by
     # shift by is the last line of the affirmation proof an contain 'p'
     # adding all of the negation proof
-    for line in proof_of_negation.lines:
-        shift_line_assumptions(all_lines, shift_by, line)
+    all_lines.extend(ShiftedProofView(proof_of_negation, shift_by))
     # last line contain '~p'
     negation_last_line = len(all_lines)
 
@@ -337,49 +447,34 @@ def prove_by_contradiction(proof: Proof) -> Proof:
     for rule in proof.rules:
         assert rule == MP or len(rule.assumptions) == 0
     # Task 5.7
+    rules = set(proof.rules)
+    rules.update([I0, I1, D, N, MP])
 
-    all_lines = list()
-    rules = list()
-    for rule in proof.rules:
-        if rule == MP:
-            continue
-        rules.append(rule)
-    for rule in [I0,I1,D,N,MP]:
-        rules.append(rule)
-
-    conclusion = proof.statement.assumptions[-1].first
-    q = conclusion
-    assumptions = proof.statement.assumptions[:-1]
-    statement = InferenceRule(assumptions, conclusion)
+    q = proof.statement.assumptions[-1].first
+    prover = PropositionalProver(proof.statement.assumptions[:-1], rules)
 
     # proof where the conclusion is :
     # (proof.last_assumption -> proof.conclusion) with out the last
     # assumption as assumption (~q->conclusion) = (~q->~(p->p))
     # we want to prove 'q' (formula/last assumption) - conclusion
-    remove_last_assumption_proof = remove_assumption(proof)
-
-    # in order to prove 'q' from remove_last_assumption (~q->~(p->p))
-    # I would need to prove the following lemma : assumption : ~q->~(p->p)
-    #                                             conclusion : q
-    for line in remove_last_assumption_proof.lines:
-        all_lines.append(line)
-    last_line = len(all_lines) # this line contain (~q->~(p->p))
+    # (the lines of this proof are appended as they are, without validating
+    #  or copying them)
+    last_line = prover.add_proof(remove_assumption(proof))
 
     # adding ((~q->~(p->p))->((p->p)->q) using N axiom with the
     # map {q:'q' ,p:'(p->p)'}
     # which is :
     part2 = Formula('->', Formula.parse("(p->p)"), q)
-    formula_to_add = Formula('->', all_lines[last_line - 1].formula, part2)
-    all_lines.append(Proof.Line(formula_to_add, N, []))
+    n_line = prover.add_inference(
+        Formula('->', prover.formula_of(last_line), part2), N)
 
     # using MP on the last two line would get ((p->p)->q)
-    all_lines.append(Proof.Line(part2, MP, [len(all_lines) - 2 , len(all_lines) - 1]))
+    part2_line = prover.add_mp(part2, last_line, n_line)
 
     # using IO (p->p)
-    all_lines.append(Proof.Line(Formula('->', Formula('p'), Formula('p')),
-                                I0, []))
+    i0_line = prover.add_inference(Formula('->', Formula('p'), Formula('p')),
+                                   I0)
 
     # using MP of the last two lines will get 'q' which the final result.
-    all_lines.append(Proof.Line(q, MP, [len(all_lines) - 1, len(all_lines) - 2]))
-
-    return Proof(statement, rules, all_lines)
\ No newline at end of file
+    prover.add_mp(q, i0_line, part2_line)
+    return prover.qed()
\ No newline at end of file
@@ -0,0 +1,314 @@
+# File name: propositions/proof_files.py
+
+"""Writing propositional proofs to text files, reading such files back, and
+verifying them line by line without loading the whole proof into memory.
+
+A proof file consists of one record per line, whose fields are separated by
+single spaces (the string representation of a formula contains no spaces):
+
+* ``S <n> <assumption 1> ... <assumption n> <conclusion>`` - the statement of
+  the proof, which is the first record of the file.
+* ``R <n> <assumption 1> ... <assumption n> <conclusion>`` - an allowed
+  inference rule of the proof. Rules are numbered from zero in the order of
+  their records, and all of them precede the lines of the proof.
+* ``A <uses> <formula>`` - a line justified as an assumption of the proof.
+* ``L <uses> <formula> <rule> <line 1> ... <line k>`` - a line justified by
+  the specified rule from the specified previous lines.
+* ``F <first> <last>`` - a note that the lines from line `first` up to (and
+  excluding) line `last` are not cited by any later line.
+
+Lines are numbered from zero in the order of their records. The ``<uses>``
+field of every line is the number of times that later lines cite it, which is
+what lets `verify_proof_file` forget a formula as soon as it is last cited.
+A proof that is written while it is generated (see `write_proof_lines`) does
+not know yet how many times each line will be cited, so its ``<uses>`` fields
+are ``*`` instead, and such a line is forgotten when a ``F`` record covers it.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, \
+                   TextIO, Tuple, Union
+
+from propositions.syntax import *
+from propositions.proofs import *
+
+STATEMENT_RECORD = 'S'
+RULE_RECORD = 'R'
+ASSUMPTION_LINE_RECORD = 'A'
+RULE_LINE_RECORD = 'L'
+FORGET_RECORD = 'F'
+UNKNOWN_USES = '*'
+
+def rule_fields(rule: InferenceRule) -> List[str]:
+    """Computes the fields by which the given inference rule is written.
+
+    Parameters:
+        rule: inference rule to write.
+
+    Returns:
+        The number of assumptions of the given rule, followed by the string
+        representations of its assumptions and conclusion.
+    """
+    return [str(len(rule.assumptions))] + \
+           [str(assumption) for assumption in rule.assumptions] + \
+           [str(rule.conclusion)]
+
+def parse_formula(s: str) -> Formula:
+    """Parses the given string representation of a formula, as written in a
+    proof file.
+
+    Parameters:
+        s: string to parse.
+
+    Returns:
+        The parsed formula.
+
+    Raises:
+        ValueError: if the given string is not a formula.
+    """
+    formula, remainder = Formula.parse_prefix(s)
+    if formula is None or remainder != '':
+        raise ValueError('Not a formula: ' + s)
+    return formula
+
+def parse_rule(fields: Sequence[str]) -> InferenceRule:
+    """Parses an inference rule from the given fields of a statement or a rule
+    record.
+
+    Parameters:
+        fields: the fields of the record, without the record type.
+
+    Returns:
+        The parsed inference rule.
+
+    Raises:
+        ValueError: if the given fields are not an inference rule.
+    """
+    if len(fields) == 0 or len(fields) != int(fields[0]) + 2:
+        raise ValueError('Malformed inference rule: ' + ' '.join(fields))
+    return InferenceRule([parse_formula(field) for field in fields[1:-1]],
+                         parse_formula(fields[-1]))
+
+def write_proof_file(proof: Proof, file: TextIO) -> None:
+    """Writes the given proof to the given text file.
+
+    Parameters:
+        proof: proof to write.
+        file: text file open for writing.
+    """
+    uses = [0] * len(proof.lines)
+    for line in proof.lines:
+        if not line.is_assumption():
+            for assumption in line.assumptions:
+                uses[assumption] += 1
+    rule_numbers = write_header(proof.statement, proof.rules, file)
+    for line_number, line in enumerate(proof.lines):
+        write_line(line, str(uses[line_number]), rule_numbers, file)
+
+def write_header(statement: InferenceRule, rules: Iterable[InferenceRule],
+                 file: TextIO) -> Dict[InferenceRule, int]:
+    """Writes the records of the given statement and allowed inference rules
+    of a proof to the given text file.
+
+    Parameters:
+        statement: statement of the proof.
+        rules: allowed inference rules of the proof.
+        file: text file open for writing.
+
+    Returns:
+        The numbers of the written rules.
+    """
+    file.write(' '.join([STATEMENT_RECORD] + rule_fields(statement)) + '\n')
+    rule_numbers = {}
+    for rule in rules:
+        rule_numbers[rule] = len(rule_numbers)
+        file.write(' '.join([RULE_RECORD] + rule_fields(rule)) + '\n')
+    return rule_numbers
+
+def write_line(line: Proof.Line, uses: str,
+               rule_numbers: Dict[InferenceRule, int], file: TextIO) -> None:
+    """Writes the record of the given proof line to the given text file.
+
+    Parameters:
+        line: proof line to write.
+        uses: the ``<uses>`` field of the line.
+        rule_numbers: the numbers of the rules written so far, to which the
+            rule of the given line is added if it is not there.
+        file: text file open for writing.
+    """
+    if line.is_assumption():
+        file.write('%s %s %s\n' % (ASSUMPTION_LINE_RECORD, uses, line.formula))
+    else:
+        # a rule that is not allowed is still written, so that the file is
+        # exactly as (in)valid as the proof
+        if line.rule not in rule_numbers:
+            rule_numbers[line.rule] = len(rule_numbers)
+        file.write(' '.join(
+            [RULE_LINE_RECORD, uses, str(line.formula),
+             str(rule_numbers[line.rule])] +
+            [str(assumption) for assumption in line.assumptions]) + '\n')
+
+def write_proof_lines(statement: InferenceRule,
+                      rules: Iterable[InferenceRule],
+                      lines: Iterable[Union[Proof.Line, Tuple[int, int]]],
+                      file: TextIO) -> int:
+    """Writes a proof to the given text file while its lines are generated.
+
+    Parameters:
+        statement: statement of the proof.
+        rules: allowed inference rules of the proof.
+        lines: the lines of the proof in order, each citing lines by their
+            numbers in the proof, between which there may be pairs of line
+            numbers `first` and `last` such that the lines from `first` up to
+            (and excluding) `last` are not cited by any later line.
+        file: text file open for writing.
+
+    Returns:
+        The number of lines written.
+    """
+    rule_numbers = write_header(statement, rules, file)
+    count = 0
+    for line in lines:
+        if isinstance(line, tuple):
+            file.write('%s %d %d\n' % (FORGET_RECORD, line[0], line[1]))
+        else:
+            write_line(line, UNKNOWN_USES, rule_numbers, file)
+            count += 1
+    return count
+
+def read_records(file: TextIO) -> Iterator[List[str]]:
+    """Iterates over the records of the given proof file.
+
+    Parameters:
+        file: text file open for reading.
+
+    Returns:
+        An iterator over the fields of the nonempty records of the file.
+    """
+    for record in file:
+        fields = record.split()
+        if len(fields) > 0:
+            yield fields
+
+def read_proof_file(file: TextIO) -> Proof:
+    """Reads the proof in the given proof file into memory, without checking
+    that it is valid.
+
+    Parameters:
+        file: text file open for reading.
+
+    Returns:
+        The proof in the given file, via the rules that the file allows.
+
+    Raises:
+        ValueError: if the file is not a well-formed proof file, or has a line
+            that cites a rule that the file does not allow, or a line that is
+            not before it.
+    """
+    records = read_records(file)
+    fields = next(records, None)
+    if fields is None or fields[0] != STATEMENT_RECORD:
+        raise ValueError('Missing statement record')
+    statement = parse_rule(fields[1:])
+    rules = []
+    lines = []
+    for fields in records:
+        record_type = fields[0]
+        if record_type == RULE_RECORD and len(lines) == 0:
+            rules.append(parse_rule(fields[1:]))
+        elif record_type == FORGET_RECORD and len(fields) == 3:
+            continue
+        elif record_type == ASSUMPTION_LINE_RECORD and len(fields) == 3:
+            lines.append(Proof.Line(parse_formula(fields[2])))
+        elif record_type == RULE_LINE_RECORD and len(fields) >= 4:
+            rule_number = int(fields[3])
+            cited = [int(field) for field in fields[4:]]
+            if not 0 <= rule_number < len(rules) or \
+                    not all(0 <= number < len(lines) for number in cited):
+                raise ValueError('Bad citation: ' + ' '.join(fields))
+            lines.append(Proof.Line(parse_formula(fields[2]),
+                                    rules[rule_number], cited))
+        else:
+            raise ValueError('Malformed record: ' + ' '.join(fields))
+    if len(lines) == 0:
+        raise ValueError('No lines')
+    return Proof(statement, rules, lines)
+
+def verify_proof_file(file: TextIO) -> bool:
+    """Checks if the proof in the given proof file is a valid proof of its
+    statement via its allowed inference rules, reading it one record at a time.
+
+    Only the formulae of the lines that are still to be cited by later lines
+    (or, for lines with unknown uses, that are not yet covered by a forget
+    record) are kept in memory, so the memory used is bounded by the largest
+    number of such lines at any point of the proof, rather than by its length.
+
+    Parameters:
+        file: text file open for reading.
+
+    Returns:
+        ``True`` if the file contains a valid proof, in the same sense as
+        `~propositions.proofs.Proof.is_valid`, ``False`` if the proof is not
+        valid or the file is not a well-formed proof file.
+    """
+    records = read_records(file)
+    try:
+        fields = next(records, None)
+        if fields is None or fields[0] != STATEMENT_RECORD:
+            return False
+        statement = parse_rule(fields[1:])
+        statement_assumptions = frozenset(statement.assumptions)
+        # rules are numbered by the file, but a rule line may also cite a rule
+        # with no record (that is, one that is not allowed)
+        rules = []
+        # lines with unknown uses are kept with None uses
+        live: Dict[int, Tuple[Formula, Optional[int]]] = {}
+        line_number = 0
+        formula = None
+        for fields in records:
+            record_type = fields[0]
+            if record_type == RULE_RECORD:
+                if line_number > 0:
+                    return False
+                rules.append(parse_rule(fields[1:]))
+                continue
+            if len(fields) < 3:
+                return False
+            if record_type == FORGET_RECORD:
+                if len(fields) != 3:
+                    return False
+                first, last = int(fields[1]), int(fields[2])
+                for cited in [cited for cited in live
+                              if first <= cited < last]:
+                    del live[cited]
+                continue
+            uses = None if fields[1] == UNKNOWN_USES else int(fields[1])
+            formula = parse_formula(fields[2])
+            if record_type == ASSUMPTION_LINE_RECORD:
+                if len(fields) != 3 or formula not in statement_assumptions:
+                    return False
+            elif record_type == RULE_LINE_RECORD:
+                rule_number = int(fields[3])
+                if not 0 <= rule_number < len(rules):
+                    return False
+                assumptions = []
+                for field in fields[4:]:
+                    cited = int(field)
+                    if cited not in live:
+                        # a later line, or a line whose uses are exhausted
+                        return False
+                    cited_formula, cited_uses = live[cited]
+                    if cited_uses == 1:
+                        del live[cited]
+                    elif cited_uses is not None:
+                        live[cited] = (cited_formula, cited_uses - 1)
+                    assumptions.append(cited_formula)
+                if rules[rule_number].match(assumptions, formula) is None:
+                    return False
+            else:
+                return False
+            if uses is None or uses > 0:
+                live[line_number] = (formula, uses)
+            line_number += 1
+        return formula is not None and formula == statement.conclusion
+    except (ValueError, IndexError):
+        return False
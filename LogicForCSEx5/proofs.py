@@ -6,8 +6,11 @@
 """Proofs by deduction in propositional logic."""
 
 from __future__ import annotations
-from typing import AbstractSet, Iterable, FrozenSet, List, Mapping, Optional, \
-                   Set, Tuple, Union
+from typing import AbstractSet, Dict, Iterable, Iterator, FrozenSet, List, \
+                   Mapping, Optional, Sequence, Set, Tuple, Union
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
 
 from logic_utils import frozen
 
@@ -15,72 +18,94 @@ from propositions.syntax import *
 
 SpecializationMap = Mapping[str, Formula]
 
-NOT_SPECIALISATION = 1
-"""
-    helper function for formula_specialization_map
-input:
-    obj1 - the general formula
-    obj2 - the specialisation of obj1
-    dict - empty dict to add the mapping that make obj2 specialisation of obj1
-output:    
-    return NOT_SPECIALISATION if obj2 is not specialisation of obj1
-    else, return nothing (and update the dict to the mapping that make 
-    obj2 specialisation of obj1
-"""
+# Instructions of a compiled matcher program, see `compile_matcher`
+MATCH_ROOT = 0  # the formula must have the given root, its operands are next
+BIND = 1        # first occurrence of a variable - bind the formula to its slot
+CHECK = 2       # later occurrence - the formula must equal the bound one
 
-"""
-This function gets a list of formula - assumptions
-and connect it by '&' (and) and connect the conclusion with '->'
-and return it as one formula 
-"""
-def specialization_map_helper(list_of_assumptions, conclusion):
-    to_return = list_of_assumptions
-    first = True
-    for formula in list_of_assumptions:
-        if first:
-            to_return = formula
-            first = False
-        else:
-            to_return = Formula('&',to_return, formula)
-    if not first:
-        return Formula('->',to_return, conclusion)
-    else:
-        return conclusion
+Matcher = Tuple[Tuple[Tuple[int, Union[str, int]], ...], Tuple[str, ...]]
 
-"""
-Traverse the tree in preorder and find the minimal mapping between 
-obj1( general formula and it's specialization - obj2)  
-"""
-def preorder_traverse(obj1 : Formula, obj2 : Formula, dict):
-    if obj1 is not None and obj2 is not None:
-        if obj1.root != obj2.root:
-            if not is_variable(obj1.root):
-                return NOT_SPECIALISATION
-            else:
-                # case where the same variable gets two different values
-                if obj1.root in dict and dict[obj1.root] != obj2:
-                    return NOT_SPECIALISATION
-                else:
-                    dict.update({obj1.root : obj2})
-        elif is_variable(obj1.root):
-            # case where the same variable gets two different values
-            if obj1.root in dict and dict[obj1.root] != obj2:
-                return NOT_SPECIALISATION
+def compile_matcher(formulas: Sequence[Formula]) -> Matcher:
+    """Compiles the given general formulae into a matcher program, which
+    checks in a single pass whether a sequence of formulae specializes them.
+
+    Parameters:
+        formulas: the general formulae, in order.
+
+    Returns:
+        A pair of a flat tuple of ``(instruction, argument)`` pairs, one per
+        node of the given formulae in preorder, and of the variable names in
+        the order of their slots.
+    """
+    program = list()
+    variables = list()
+    slots = dict()
+    stack = list(reversed(formulas))
+    while len(stack) > 0:
+        formula = stack.pop()
+        if formula.opcode == OP_VARIABLE:
+            slot = slots.get(formula.root)
+            if slot is None:
+                slot = slots[formula.root] = len(variables)
+                variables.append(formula.root)
+                program.append((BIND, slot))
             else:
-                dict.update({obj1.root : Formula(obj2.root)})
-        try:
-            if preorder_traverse(obj1.first, obj2.first, dict) == \
-                    NOT_SPECIALISATION:
-                return NOT_SPECIALISATION
-        except AttributeError:
-            pass
+                program.append((CHECK, slot))
+        else:
+            program.append((MATCH_ROOT, formula.root))
+            if formula.second is not None:
+                stack.append(formula.second)
+            if formula.first is not None:
+                stack.append(formula.first)
+    return tuple(program), tuple(variables)
 
-        try:
-            if preorder_traverse(obj1.second, obj2.second, dict) == \
-                    NOT_SPECIALISATION:
-                return NOT_SPECIALISATION
-        except AttributeError:
-            pass
+def run_matcher(matcher: Matcher, formulas: Sequence[Formula]) -> \
+        Union[SpecializationMap, None]:
+    """Runs the given matcher program over the given formulae.
+
+    Parameters:
+        matcher: matcher program compiled by `compile_matcher` from as many
+            general formulae as given here.
+        formulas: the candidate specializations of the general formulae.
+
+    Returns:
+        The minimal specialization map by which the general formulae
+        specialize to the given ones, or ``None`` if they do not.
+    """
+    program, variables = matcher
+    bindings = [None] * len(variables)
+    stack = list(reversed(formulas))
+    for instruction, argument in program:
+        formula = stack.pop()
+        if instruction == MATCH_ROOT:
+            # equal roots take the same number of operands, so the stack stays
+            # aligned with the program
+            if formula.root != argument:
+                return None
+            if formula.second is not None:
+                stack.append(formula.second)
+            if formula.first is not None:
+                stack.append(formula.first)
+        elif instruction == BIND:
+            bindings[argument] = formula
+        elif not same_formula(bindings[argument], formula):
+            return None
+    return dict(zip(variables, bindings))
+
+# structural equality of the two formulae, without computing their strings
+def same_formula(formula1: Formula, formula2: Formula) -> bool:
+    stack = [(formula1, formula2)]
+    while len(stack) > 0:
+        formula1, formula2 = stack.pop()
+        if formula1 is formula2:
+            continue
+        if formula1.root != formula2.root:
+            return False
+        if formula1.first is not None:
+            stack.append((formula1.first, formula2.first))
+        if formula1.second is not None:
+            stack.append((formula1.second, formula2.second))
+    return True
 
 @frozen
 class InferenceRule:
@@ -95,6 +120,7 @@ class InferenceRule:
     """
     assumptions: Tuple[Formula, ...]
     conclusion: Formula
+    _matcher: Matcher
 
     def __init__(self, assumptions: Iterable[Formula], conclusion: Formula) -> \
         None:
@@ -104,8 +130,8 @@ class InferenceRule:
             assumptions: the assumptions for the rule.
             conclusion: the conclusion for the rule.
         """
-        self.assumptions = tuple(assumptions)
-        self.conclusion = conclusion
+        object.__setattr__(self, 'assumptions', tuple(assumptions))
+        object.__setattr__(self, 'conclusion', conclusion)
 
     def __eq__(self, other: object) -> bool:
         """Compares the current inference rule with the given one.
@@ -252,11 +278,7 @@ class InferenceRule:
             in fact not a specialization of `general`.
         """
         # Task 4.5b
-        my_dict = dict()
-        if preorder_traverse(general, specialization, my_dict) ==\
-                NOT_SPECIALISATION:
-            return None
-        return my_dict
+        return run_matcher(compile_matcher((general,)), (specialization,))
 
     def specialization_map(self, specialization: InferenceRule) -> \
             Union[SpecializationMap, None]:
@@ -271,15 +293,43 @@ class InferenceRule:
             in fact not a specialization of the current rule.
         """
         # Task 4.5c
+        return self.match(specialization.assumptions, specialization.conclusion)
+
+    def matcher(self) -> Matcher:
+        """Returns the matcher program of the current inference rule, compiling
+        it on first use.
+
+        Returns:
+            The program compiled by `compile_matcher` from the assumptions and
+            then the conclusion of the current inference rule.
+        """
+        try:
+            return self._matcher
+        except AttributeError:
+            matcher = compile_matcher(self.assumptions + (self.conclusion,))
+            object.__setattr__(self, '_matcher', matcher)
+            return matcher
+
+    def match(self, assumptions: Sequence[Formula], conclusion: Formula) -> \
+            Union[SpecializationMap, None]:
+        """Computes the minimal specialization map by which the current
+        inference rule specializes to the inference rule with the given
+        assumptions and conclusion, without constructing that rule.
+
+        Parameters:
+            assumptions: the assumptions of the specialization, in order.
+            conclusion: the conclusion of the specialization.
+
+        Returns:
+            The computed specialization map, or ``None`` if the given
+            assumptions and conclusion are in fact not a specialization of the
+            current rule.
+        """
         # if one conclusion require different number of assumption from the
         # other conclusion, than it cant be specialization of one another
-        if len(self.assumptions) != len(specialization.assumptions):
+        if len(self.assumptions) != len(assumptions):
             return None
-        general = specialization_map_helper(self.assumptions, self.conclusion)
-        my_specialization = specialization_map_helper(
-            specialization.assumptions, specialization.conclusion)
-
-        return self.formula_specialization_map(general, my_specialization)
+        return run_matcher(self.matcher(), tuple(assumptions) + (conclusion,))
 
 
     def is_specialization_of(self, general: InferenceRule) -> bool:
@@ -295,6 +345,211 @@ class InferenceRule:
         """
         return general.specialization_map(self) is not None
 
+# Keys of the discrimination tree of a `RuleIndex`
+INDEX_WILDCARD = '*'  # a variable of a conclusion, matches any subformula
+INDEX_RULES = ''      # the rules whose conclusions end at this node
+
+class RuleIndex:
+    """An index of inference rules by the shapes of their conclusions.
+
+    The conclusions are stored in a discrimination tree: the path to a rule is
+    the preorder sequence of the roots of its conclusion, where each variable
+    is replaced by a wildcard that stands for a whole subformula.
+
+    Attributes:
+        rules (`~typing.FrozenSet`\\[`InferenceRule`]): the indexed rules.
+    """
+    rules: FrozenSet[InferenceRule]
+
+    def __init__(self, rules: AbstractSet[InferenceRule]) -> None:
+        """Indexes the given inference rules.
+
+        Parameters:
+            rules: the rules to index.
+        """
+        self.rules = frozenset(rules)
+        self._tree = dict()
+        for rule in self.rules:
+            node = self._tree
+            stack = [rule.conclusion]
+            while len(stack) > 0:
+                formula = stack.pop()
+                if formula.opcode == OP_VARIABLE:
+                    key = INDEX_WILDCARD
+                else:
+                    key = formula.root
+                    if formula.second is not None:
+                        stack.append(formula.second)
+                    if formula.first is not None:
+                        stack.append(formula.first)
+                node = node.setdefault(key, dict())
+            node.setdefault(INDEX_RULES, list()).append(rule)
+
+    def candidates(self, formula: Formula) -> List[InferenceRule]:
+        """Finds the indexed rules that could conclude the given formula.
+
+        Parameters:
+            formula: formula to find rules for.
+
+        Returns:
+            The indexed rules whose conclusions have the same roots as the
+            given formula wherever they do not have a variable. These are all
+            the rules that have a specialization whose conclusion is the given
+            formula, and possibly a few more whose variables do not
+            specialize consistently.
+        """
+        found = list()
+        # pairs of a node of the tree, and the subformulae still to be matched
+        # from it, as a linked list of (next subformula, rest) pairs that ends
+        # with None, so that pushing and popping a subformula copies nothing
+        work = [(self._tree, (formula, None))]
+        while len(work) > 0:
+            node, pending = work.pop()
+            if pending is None:
+                found.extend(node.get(INDEX_RULES, ()))
+                continue
+            formula, rest = pending
+            child = node.get(INDEX_WILDCARD)
+            if child is not None:
+                work.append((child, rest))
+            child = node.get(formula.root)
+            if child is not None:
+                if formula.second is not None:
+                    rest = (formula.second, rest)
+                if formula.first is not None:
+                    rest = (formula.first, rest)
+                work.append((child, rest))
+        return found
+
+# the `RuleIndex` of each rule set that an index was requested for, so that all
+# the callers with the same rules (e.g., with
+# `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM`) share one index
+_rule_indexes: Dict[FrozenSet[InferenceRule], RuleIndex] = dict()
+# the number of rule sets to keep indexes for, after which they are all dropped
+RULE_INDEXES_CAPACITY = 128
+
+def rule_index(rules: AbstractSet[InferenceRule]) -> RuleIndex:
+    """Returns the index of the given inference rules, building it only on the
+    first request for that rule set.
+
+    Parameters:
+        rules: the rules to index.
+
+    Returns:
+        The `RuleIndex` of the given rules.
+    """
+    # frozenset() of a frozenset is the same object, whose hash is kept, so
+    # looking up the rules of a proof hashes nothing
+    rules = frozenset(rules)
+    index = _rule_indexes.get(rules)
+    if index is None:
+        if len(_rule_indexes) >= RULE_INDEXES_CAPACITY:
+            _rule_indexes.clear()
+        index = _rule_indexes[rules] = RuleIndex(rules)
+    return index
+
+class LineMemo:
+    """A memo of the lines of a proof checked so far, by which each distinct
+    instance of each rule is checked only once.
+
+    Formulae are hashed and compared by their strings, which costs more than
+    matching an instance against a compiled rule. The memo instead numbers the
+    formulae of the proof so that equal formulae get the same number, visiting
+    each formula object once and looking up each subformula object by its id,
+    and then looks an instance up by the id of its rule and the numbers of its
+    formulae.
+
+    Attributes:
+        _numbers (`~typing.Dict`\\[`int`, `int`]): the number of each formula
+            numbered so far, by the id of the formula.
+        _numbers_of_parts (`~typing.Dict`\\[`~typing.Tuple`\\[`str`, `~typing.Optional`\\[`int`], `~typing.Optional`\\[`int`]], `int`]):
+            the number of each distinct formula numbered so far, by its root
+            and the numbers of its operands.
+        _verdicts (`~typing.Dict`\\[`~typing.Tuple`\\[`int`, ...], `bool`]):
+            whether each instance checked so far is a specialization of an
+            allowed rule of the proof, by the id of the rule, the number of
+            the conclusion and the numbers of the assumptions.
+    """
+    _numbers: Dict[int, int]
+    _numbers_of_parts: Dict[Tuple[str, Optional[int], Optional[int]], int]
+    _verdicts: Dict[Tuple[int, ...], bool]
+
+    def __init__(self) -> None:
+        """Initializes an empty `LineMemo`. The formulae and rules that it
+        numbers must stay alive while it is used, as they do as parts of the
+        lines of a proof, so that their ids are not reused."""
+        self._numbers = dict()
+        self._numbers_of_parts = dict()
+        self._verdicts = dict()
+
+    def number(self, formula: Formula) -> int:
+        """Numbers the given formula.
+
+        Parameters:
+            formula: formula to number.
+
+        Returns:
+            The number of the given formula, which is the number of every
+            formula equal to it.
+        """
+        numbers = self._numbers
+        number = numbers.get(id(formula))
+        if number is not None:
+            return number
+        # the formulae to number, each after its operands
+        stack = [formula]
+        while len(stack) > 0:
+            current = stack[-1]
+            first = second = None
+            if current.first is not None:
+                first = numbers.get(id(current.first))
+                if first is None:
+                    stack.append(current.first)
+            if current.second is not None:
+                second = numbers.get(id(current.second))
+                if second is None:
+                    stack.append(current.second)
+            if stack[-1] is not current:
+                continue
+            stack.pop()
+            parts = (current.root, first, second)
+            number = self._numbers_of_parts.get(parts)
+            if number is None:
+                number = len(self._numbers_of_parts)
+                self._numbers_of_parts[parts] = number
+            numbers[id(current)] = number
+        return numbers[id(formula)]
+
+    def is_instance(self, proof: Proof, line: Proof.Line) -> bool:
+        """Checks if the given line of the given proof is justified by a
+        specialization of an allowed rule of the proof, checking each distinct
+        instance of each rule only once.
+
+        Parameters:
+            proof: proof whose lines the memo remembers.
+            line: line of the given proof, justified by an inference rule whose
+                assumptions come before it.
+
+        Returns:
+            ``True`` if the rule of the given line is one of the allowed rules
+            of the given proof, and some specialization of it has the formula
+            justified by the line as its conclusion and the formulae justified
+            by the lines specified as its assumptions as its assumptions,
+            ``False`` otherwise.
+        """
+        assumptions = tuple(proof.lines[index].formula
+                            for index in line.assumptions)
+        key = (id(line.rule), self.number(line.formula)) + \
+            tuple(self.number(assumption) for assumption in assumptions)
+        verdict = self._verdicts.get(key)
+        if verdict is None:
+            # whether the rule is allowed is remembered too, as looking it up
+            # hashes its string
+            verdict = line.rule in proof.rules and \
+                line.rule.match(assumptions, line.formula) is not None
+            self._verdicts[key] = verdict
+        return verdict
+
 """
 Input:
 lst_of_assumptions_line - list of line of assumptions that needed in order to
@@ -324,7 +579,7 @@ class Proof:
             the proof.
         lines (`~typing.Tuple`\\[`Line`]): the lines of the proof.
     """
-    statment: InferenceRule
+    statement: InferenceRule
     rules: FrozenSet[InferenceRule]
     lines: Tuple[Proof.Line, ...]
     
@@ -339,9 +594,9 @@ class Proof:
             rules: the allowed rules for the proof.
             lines: the lines for the proof.
         """
-        self.statement = statement
-        self.rules = frozenset(rules)
-        self.lines = tuple(lines)
+        object.__setattr__(self, 'statement', statement)
+        object.__setattr__(self, 'rules', frozenset(rules))
+        object.__setattr__(self, 'lines', tuple(lines))
 
     @frozen
     class Line:
@@ -388,10 +643,10 @@ class Proof:
             """
             assert (rule is None and assumptions is None) or \
                    (rule is not None and assumptions is not None)
-            self.formula = formula
-            self.rule = rule
+            object.__setattr__(self, 'formula', formula)
+            object.__setattr__(self, 'rule', rule)
             if assumptions is not None:
-                self.assumptions = tuple(assumptions)
+                object.__setattr__(self, 'assumptions', tuple(assumptions))
 
         def __repr__(self) -> str:
             """Computes a string representation of the current proof line.
@@ -458,11 +713,15 @@ class Proof:
             assumption_to_return.append(self.lines[assumption_line_index].formula)
         return InferenceRule(assumption_to_return, self.lines[line_number].formula)
 
-    def is_line_valid(self, line_number: int) -> bool:
+    def is_line_valid(self, line_number: int,
+                      memo: Optional[LineMemo] = None) -> bool:
         """Checks if the specified line validly follows from its justifications.
 
         Parameters:
             line_number: index of the line to check.
+            memo: optional memo of the lines of the current proof checked so
+                far, by which to check each distinct instance of each rule only
+                once.
 
         Returns:
             If the specified line is justified as an assumption, then ``True``
@@ -493,31 +752,103 @@ class Proof:
             # 2.checking that all of the assumptions come before the line that
             # need them
             # 3. checking from specialization
-            if self.lines[line_number].rule in self.rules and \
-                    valid_index_assumptions(
-                        self.lines[line_number].assumptions, line_number) \
-                and self.rule_for_line(line_number).is_specialization_of(self.lines[line_number].rule):
-                return True
+            line = self.lines[line_number]
+            if memo is not None:
+                return valid_index_assumptions(line.assumptions,
+                                               line_number) and \
+                    memo.is_instance(self, line)
+            if line.rule in self.rules and \
+                    valid_index_assumptions(line.assumptions, line_number):
+                assumptions = tuple(self.lines[index].formula
+                                    for index in line.assumptions)
+                return line.rule.match(assumptions, line.formula) is not None
         return False
 
 
         
-    def is_valid(self) -> bool:
+    def is_valid(self, parallel: bool = False, workers: Optional[int] = None,
+                 memoize: bool = False) -> bool:
         """Checks if the current proof is a valid proof of its claimed statement
         via its inference rules.
 
+        Parameters:
+            parallel: whether to check the lines in chunks over a pool of
+                processes, stopping at the first invalid chunk. Each line is
+                checked against its own justifications only, so the lines
+                can be checked in any order.
+            workers: number of processes to check the lines in, if `parallel`
+                is ``True``. Defaults to the number of CPUs.
+            memoize: whether to check each distinct instance of each rule
+                only once, with a `LineMemo` (one for each chunk, if
+                `parallel` is ``True``). This pays off for generated proofs,
+                which repeat a few axiom instances over many lines.
+
         Returns:
             ``True`` if the current proof is a valid proof of its claimed
             statement via its inference rules, ``False`` otherwise.
         """
         # Task 4.6c
+        if self.statement.conclusion != self.lines[len(self.lines) - 1].formula:
+             return False
+        if parallel:
+            return are_lines_valid_in_parallel(self, workers, memoize)
+        memo = LineMemo() if memoize else None
         # if one of the lines is invalid than the proof is invalid.
         for line_index in range(len(self.lines)):
-            if not self.is_line_valid(line_index):
+            if not self.is_line_valid(line_index, memo):
                 return False
-        if self.statement.conclusion != self.lines[len(self.lines) - 1].formula:
-             return False
         return True
+
+# The proof whose lines a worker process of `are_lines_valid_in_parallel`
+# checks
+_worker_proof = None
+
+def _init_worker(proof: Proof) -> None:
+    global _worker_proof
+    _worker_proof = proof
+
+def _are_lines_valid(start: int, end: int, memoize: bool) -> bool:
+    memo = LineMemo() if memoize else None
+    for line_index in range(start, end):
+        if not _worker_proof.is_line_valid(line_index, memo):
+            return False
+    return True
+
+def are_lines_valid_in_parallel(proof: Proof, workers: Optional[int] = None,
+                                memoize: bool = False) -> bool:
+    """Checks if all the lines of the given proof are valid, in chunks over a
+    pool of processes.
+
+    Parameters:
+        proof: proof to check the lines of.
+        workers: number of processes to check the lines in. Defaults to the
+            number of CPUs.
+        memoize: whether to check each distinct instance of each rule only
+            once in each chunk, with a `LineMemo`.
+
+    Returns:
+        ``True`` if all the lines of the given proof are valid, ``False``
+        otherwise, as soon as one of the chunks has an invalid line.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    number_of_lines = len(proof.lines)
+    # a few chunks per process, so that an invalid line is found early, and
+    # the processes stay busy
+    chunk_size = max(1, -(-number_of_lines // (4 * workers)))
+    # the proof is sent once to each process, and the chunks only by their
+    # line numbers
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(proof,)) as executor:
+        futures = [executor.submit(_are_lines_valid, start,
+                                   min(start + chunk_size, number_of_lines),
+                                   memoize)
+                   for start in range(0, number_of_lines, chunk_size)]
+        for future in as_completed(futures):
+            if not future.result():
+                executor.shutdown(wait=False, cancel_futures=True)
+                return False
+    return True
 # Chapter 5 tasks
 
 def prove_specialization(proof: Proof, specialization: InferenceRule) -> Proof:
@@ -538,20 +869,190 @@ def prove_specialization(proof: Proof, specialization: InferenceRule) -> Proof:
 
     # the minimal specialization map by which the given formula
     # specializes to the given specialization Inference Rule
-    map_of_specialization = InferenceRule(proof.statement.assumptions,
-                                        proof.statement.conclusion).specialization_map(specialization)
+    map_of_specialization = proof.statement.specialization_map(specialization)
+    return SpecializedProofView(proof, map_of_specialization).materialize()
 
-    # return the specialization of the proof statement
-    specialization_statement = proof.statement.specialize(map_of_specialization)
-    new_lines = []
-    for l_line in proof.lines:
-        if l_line.is_assumption():
-            new_lines.append(Proof.Line(l_line.formula.substitute_variables(map_of_specialization)))
+class SpecializedProofView:
+    """A view of the specialization of a proof by a specialization map, the
+    lines of which are computed only when accessed.
+
+    Attributes:
+        proof (`Proof`): the proof being specialized.
+        specialization_map (`SpecializationMap`): the map by which the proof
+            is specialized.
+        _substituted (`~typing.Dict`\\[`int`, `~propositions.syntax.Formula`]):
+            the specialization of each subformula of the proof specialized so
+            far, by the id of the subformula.
+    """
+    proof: Proof
+    specialization_map: SpecializationMap
+    _substituted: Dict[int, Formula]
+
+    def __init__(self, proof: Proof,
+                 specialization_map: SpecializationMap) -> None:
+        """Initializes a `SpecializedProofView` from the proof to specialize
+        and the map by which to specialize it.
+
+        Parameters:
+            proof: proof to specialize.
+            specialization_map: map by which to specialize the given proof.
+        """
+        self.proof = proof
+        self.specialization_map = specialization_map
+        self._substituted = {}
+
+    def substitute(self, formula: Formula) -> Formula:
+        """Specializes the given subformula of the proof.
+
+        Subformulae that the lines of the proof share (as the same objects)
+        are specialized only once, and their specializations are shared in
+        the same way, as are the subformulae that the specialization does not
+        change.
+
+        Parameters:
+            formula: a subformula of a line of the proof.
+
+        Returns:
+            The specialization of the given subformula.
+        """
+        substituted = self._substituted.get(id(formula))
+        if substituted is not None:
+            return substituted
+        if formula.opcode == OP_VARIABLE:
+            substituted = self.specialization_map.get(formula.root, formula)
+        elif formula.opcode == OP_CONSTANT:
+            substituted = formula
         else:
-            new_formula = l_line.formula.substitute_variables(map_of_specialization)
-            new_lines.append(Proof.Line(new_formula, l_line.rule, l_line.assumptions))
+            first = self.substitute(formula.first)
+            second = None if formula.second is None \
+                     else self.substitute(formula.second)
+            if first is formula.first and second is formula.second:
+                substituted = formula
+            else:
+                substituted = Formula(formula.root, first, second)
+        self._substituted[id(formula)] = substituted
+        return substituted
+
+    def __len__(self) -> int:
+        return len(self.proof.lines)
+
+    def __getitem__(self, line_number: int) -> Proof.Line:
+        """Computes the specified line of the specialized proof.
 
-    return Proof(specialization_statement,proof.rules, new_lines)
+        Parameters:
+            line_number: index of the line to compute.
+
+        Returns:
+            The specified line of the proof, with its formula specialized.
+        """
+        line = self.proof.lines[line_number]
+        if len(self.specialization_map) == 0:
+            return line
+        formula = self.substitute(line.formula)
+        if line.is_assumption():
+            return Proof.Line(formula)
+        return Proof.Line(formula, line.rule, line.assumptions)
+
+    def __iter__(self) -> Iterator[Proof.Line]:
+        for line_number in range(len(self.proof.lines)):
+            yield self[line_number]
+
+    def formula(self, line_number: int) -> Formula:
+        """Computes the formula justified by the specified line of the
+        specialized proof, without computing the line itself.
+
+        Parameters:
+            line_number: index of the line.
+
+        Returns:
+            The specialized formula of the specified line of the proof.
+        """
+        return self.substitute(self.proof.lines[line_number].formula)
+
+    def statement(self) -> InferenceRule:
+        """Computes the statement of the specialized proof.
+
+        Returns:
+            The specialization of the statement of the proof.
+        """
+        return self.proof.statement.specialize(self.specialization_map)
+
+    def materialize(self) -> Proof:
+        """Computes all lines of the specialized proof.
+
+        Returns:
+            The specialized proof, via the same inference rules as the proof.
+        """
+        return Proof(self.statement(), self.proof.rules, self)
+
+class ShiftedProofView:
+    """A view of the lines of a proof, as they should be when appended after
+    some other lines, i.e., with the line numbers that they cite shifted by the
+    number of these other lines. The lines are computed only when accessed, and
+    lines that cite no line are not copied at all.
+
+    Attributes:
+        proof (`Proof`): the proof whose lines are shifted.
+        offset (`int`): the number to add to each cited line number.
+    """
+    proof: Proof
+    offset: int
+
+    def __init__(self, proof: Proof, offset: int) -> None:
+        """Initializes a `ShiftedProofView` from the proof whose lines to shift
+        and the number by which to shift them.
+
+        Parameters:
+            proof: proof whose lines to shift.
+            offset: the number to add to each line number cited by the lines of
+                the given proof.
+        """
+        self.proof = proof
+        self.offset = offset
+
+    def __len__(self) -> int:
+        return len(self.proof.lines)
+
+    def __getitem__(self, line_number: int) -> Proof.Line:
+        """Computes the specified shifted line.
+
+        Parameters:
+            line_number: index of the line in the proof.
+
+        Returns:
+            The specified line of the proof, citing the line numbers that it
+            cites plus the offset.
+        """
+        line = self.proof.lines[line_number]
+        if self.offset == 0 or line.is_assumption() or \
+                len(line.assumptions) == 0:
+            return line
+        return Proof.Line(line.formula, line.rule,
+                          [assumption + self.offset
+                           for assumption in line.assumptions])
+
+    def __iter__(self) -> Iterator[Proof.Line]:
+        for line_number in range(len(self.proof.lines)):
+            yield self[line_number]
+
+    def formula(self, line_number: int) -> Formula:
+        """Finds the formula justified by the specified line.
+
+        Parameters:
+            line_number: index of the line in the proof.
+
+        Returns:
+            The formula of the specified line of the proof.
+        """
+        return self.proof.lines[line_number].formula
+
+    def materialize(self) -> Tuple[Proof.Line, ...]:
+        """Computes all shifted lines.
+
+        Returns:
+            The lines of the proof, with their cited line numbers shifted.
+        """
+        return tuple(self)
 
 # getting array and shift all the numbers inside by 'shift_by'
 def array_number_adder(arr, shift_by, line_number = 0, only_after_shift_by_line = False):
@@ -650,9 +1151,68 @@ def inline_proof_once(main_proof: Proof, line_number: int, lemma_proof: Proof, d
             shift_line_assumptions(new_lines, shift_by, line, line_number, True)
     return Proof(main_proof.statement, total_rules, new_lines)
 
+def inline_lines(proof: Proof, specialization_map: SpecializationMap,
+                 cited_lines: Optional[Mapping[Formula, int]],
+                 lemmas: Mapping[InferenceRule, Proof],
+                 new_lines: List[Proof.Line]) -> List[int]:
+    """Appends the lines of the given proof, specialized by the given map, to
+    the given list of lines, inlining on the way (appropriate specializations
+    of) the given lemma proofs in lieu of each line that uses their statements.
 
+    Parameters:
+        proof: valid proof whose lines to append.
+        specialization_map: specialization map to apply to the formulae of
+            the lines of the given proof.
+        cited_lines: mapping from each assumption of the statement of the
+            given proof to the index in `new_lines` of the line that justifies
+            (its specialization), or ``None`` if assumption lines of the given
+            proof should be appended as assumption lines.
+        lemmas: mapping from the statements of the lemma proofs to inline to
+            the lemma proofs themselves.
+        new_lines: the list of lines to append to.
 
-
+    Returns:
+        The renumbering table of the given proof, i.e., for each of its lines,
+        the index in `new_lines` of the line that justifies its (specialized)
+        formula.
+    """
+    new_index = []
+    for line in proof.lines:
+        if len(specialization_map) == 0:
+            formula = line.formula
+        else:
+            formula = line.formula.substitute_variables(specialization_map)
+        if line.is_assumption():
+            if cited_lines is None:
+                new_lines.append(Proof.Line(formula))
+            else:
+                # no need for a new line, just cite the one that the lemma
+                # usage cites for this assumption
+                new_index.append(cited_lines[line.formula])
+                continue
+        else:
+            assumptions = [new_index[i] for i in line.assumptions]
+            lemma_proof = lemmas.get(line.rule)
+            if lemma_proof is None:
+                new_lines.append(Proof.Line(formula, line.rule, assumptions))
+            else:
+                # specialize the lemma lazily, line by line, while appending it
+                statement = lemma_proof.statement
+                lemma_map = statement.match(
+                    [new_lines[i].formula for i in assumptions], formula)
+                assert lemma_map is not None
+                lemma_cited_lines = dict(zip(statement.assumptions,
+                                             assumptions))
+                # a lemma is never inlined into its own proof
+                inner_lemmas = {rule: inner_proof
+                                for rule, inner_proof in lemmas.items()
+                                if rule != statement}
+                new_index.append(inline_lines(lemma_proof, lemma_map,
+                                              lemma_cited_lines, inner_lemmas,
+                                              new_lines)[-1])
+                continue
+        new_index.append(len(new_lines) - 1)
+    return new_index
 
 def inline_proof(main_proof: Proof, lemma_proof: Proof) -> Proof:
     """Inlines the given proof of a "lemma" inference rule into the given proof
@@ -673,13 +1233,106 @@ def inline_proof(main_proof: Proof, lemma_proof: Proof) -> Proof:
         `lemma_proof`.
     """
     # Task 5.2b
-    final_proof = main_proof
-    iteration = 0
-    for idx,line in enumerate(main_proof.lines):
-        if line.rule == lemma_proof.statement:
-            line_idx = idx
-            if iteration != 0:
-                line_idx = line_idx + iteration*(len(lemma_proof.lines) - 1)
-            final_proof = inline_proof_once(final_proof, line_idx, lemma_proof, True)
-            iteration += 1
-    return final_proof
+    # all usages are inlined in a single pass over `main_proof`, instead of
+    # calling inline_proof_once (and re-validating the lemma) once per usage
+    return inline_all(main_proof, [lemma_proof])
+
+def inline_all(main_proof: Proof, lemma_proofs: Iterable[Proof]) -> Proof:
+    """Inlines the given proofs of "lemma" inference rules into the given proof
+    that uses these "lemma" rules, eliminating all usages of (any
+    specialization of) each of these "lemma" rules in the latter proof.
+
+    Parameters:
+        main_proof: valid proof to inline into.
+        lemma_proofs: valid proofs of allowed inference rules of `main_proof`,
+            no two of which prove the same inference rule. A lemma proof may
+            itself use the "lemma" rules proved by the other lemma proofs.
+
+    Returns:
+        A valid proof obtained from `main_proof` by inlining (an appropriate
+        specialization of) the corresponding proof out of `lemma_proofs` in
+        lieu of each line that specifies one of the "lemma" inference rules
+        proved by `lemma_proofs` as its justification. The set of allowed
+        inference rules in the returned proof is the union of the rules allowed
+        in all of the given proofs but without the "lemma" rules proved by
+        `lemma_proofs`.
+    """
+    lemmas = {}
+    for lemma_proof in lemma_proofs:
+        assert lemma_proof.statement not in lemmas
+        # each lemma is validated once, and not once per usage
+        assert lemma_proof.is_valid()
+        lemmas[lemma_proof.statement] = lemma_proof
+    rules = set(main_proof.rules)
+    for lemma_proof in lemmas.values():
+        rules.update(lemma_proof.rules)
+    rules.difference_update(lemmas)
+    new_lines = []
+    inline_lines(main_proof, {}, None, lemmas, new_lines)
+    return Proof(main_proof.statement, rules, new_lines)
+
+def compact(proof: Proof) -> Proof:
+    """Removes the repeated lines and the dead lines of the given proof.
+
+    Parameters:
+        proof: valid proof to compact.
+
+    Returns:
+        A valid proof of the same statement via the same inference rules, in
+        which every formula is justified by one line only (the first line of
+        the given proof to justify it), and which contains only the lines
+        that the conclusion depends on, renumbered in their original order.
+        A proof without lines is returned as is.
+    """
+    if len(proof.lines) == 0:
+        return proof
+    # hash-consing: every line is represented by the first line that
+    # justifies the same formula - lines that justify the same formula by the
+    # same rule from the same (represented) formulae are a special case
+    first_lines = {}
+    representative = []
+    for line_number, line in enumerate(proof.lines):
+        representative.append(first_lines.setdefault(str(line.formula),
+                                                     line_number))
+    # mark the lines that the conclusion depends on
+    live = [False] * len(proof.lines)
+    to_visit = [representative[-1]]
+    while len(to_visit) > 0:
+        line_number = to_visit.pop()
+        if live[line_number]:
+            continue
+        live[line_number] = True
+        line = proof.lines[line_number]
+        if not line.is_assumption():
+            for assumption in line.assumptions:
+                to_visit.append(representative[assumption])
+    # renumber the live lines
+    new_index = {}
+    new_lines = []
+    for line_number, line in enumerate(proof.lines):
+        if not live[line_number]:
+            continue
+        new_index[line_number] = len(new_lines)
+        if line.is_assumption():
+            new_lines.append(line)
+        else:
+            new_lines.append(Proof.Line(line.formula, line.rule,
+                                        [new_index[representative[i]]
+                                         for i in line.assumptions]))
+    return Proof(proof.statement, proof.rules, new_lines)
+
+def reduction_ratio(proof: Proof, compacted_proof: Proof) -> float:
+    """Computes by how much the given compacted proof is shorter than the given
+    original proof.
+
+    Parameters:
+        proof: the original proof.
+        compacted_proof: the proof returned by `compact` for `proof`.
+
+    Returns:
+        The fraction of lines of `proof` that `compacted_proof` does without,
+        between ``0.0`` (nothing removed) and ``1.0``.
+    """
+    if len(proof.lines) == 0:
+        return 0.0
+    return 1 - len(compacted_proof.lines) / len(proof.lines)
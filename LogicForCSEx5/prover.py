@@ -0,0 +1,283 @@
+# File name: propositions/prover.py
+
+"""Gradual creation of propositional proofs, with every line validated as it
+is appended."""
+
+from typing import AbstractSet, Dict, FrozenSet, List, Optional, Sequence, \
+                   Tuple, Union
+
+from propositions.syntax import *
+from propositions.proofs import *
+from propositions.axiomatic_systems import *
+
+class PropositionalProver:
+    """A class for gradually creating a propositional proof from given
+    assumptions via given inference rules, the propositional counterpart of
+    `predicates.prover.Prover`.
+
+    Every appended line is validated on the spot, in time that depends only on
+    the sizes of the formulae involved and not on the length of the proof, so
+    `qed` does not need to validate the proof again.
+
+    Attributes:
+        _assumptions (`~typing.Tuple`\\[`~propositions.syntax.Formula`]): the
+            assumptions of the proof being created.
+        _assumption_set (`~typing.FrozenSet`\\[`~propositions.syntax.Formula`]):
+            the assumptions of the proof being created, for lookup.
+        _rules (`~typing.FrozenSet`\\[`~propositions.proofs.InferenceRule`]):
+            the allowed inference rules of the proof being created.
+        _formulas (`~typing.List`\\[`~propositions.syntax.Formula`]): the
+            formula justified by each of the current lines of the proof being
+            created.
+        _line_of (`~typing.Dict`\\[`~propositions.syntax.Formula`, `int`]):
+            the number of the first line that justifies each formula justified
+            by the proof being created.
+        _chunks (`~typing.List`\\[`~typing.Tuple`\\[`int`, `~typing.Union`\\[`~typing.List`\\[`~propositions.proofs.Proof.Line`], `~propositions.proofs.Proof`]]]):
+            the lines of the proof being created, as consecutive chunks, each
+            with the offset to add to the line numbers that its lines cite:
+            either lines appended one by one (with offset zero) or an
+            appended proof.
+        _open_lines (`~typing.Optional`\\[`~typing.List`\\[`~propositions.proofs.Proof.Line`]]):
+            the last sequence in `_chunks` if it is the lines appended one by
+            one since the last appended proof, or ``None``.
+        _last_line_number (`int`): the number of the line returned by the
+            last call that appended to the proof being created.
+    """
+    _assumptions: Tuple[Formula, ...]
+    _assumption_set: FrozenSet[Formula]
+    _rules: FrozenSet[InferenceRule]
+    _formulas: List[Formula]
+    _line_of: Dict[Formula, int]
+    _chunks: List[Tuple[int, Union[List[Proof.Line], Proof]]]
+    _open_lines: Optional[List[Proof.Line]]
+    _last_line_number: int
+
+    def __init__(self, assumptions: Sequence[Union[Formula, str]],
+                 rules: AbstractSet[InferenceRule]) -> None:
+        """Initializes a `PropositionalProver` from its assumptions and allowed
+        inference rules. The proof created by the prover initially has no
+        lines.
+
+        Parameters:
+            assumptions: the assumptions of the proof to be created, each
+                specified as either a formula or its string representation.
+            rules: the allowed inference rules of the proof to be created.
+        """
+        self._assumptions = tuple(
+            assumption if isinstance(assumption, Formula)
+            else Formula.parse(assumption) for assumption in assumptions)
+        self._assumption_set = frozenset(self._assumptions)
+        self._rules = frozenset(rules)
+        self._formulas = []
+        self._line_of = {}
+        self._chunks = []
+        self._open_lines = None
+        self._last_line_number = -1
+
+    def __len__(self) -> int:
+        """Computes the number of lines of the proof being created.
+
+        Returns:
+            The number of lines appended so far to the current prover.
+        """
+        return len(self._formulas)
+
+    def formula_of(self, line_number: int) -> Formula:
+        """Finds the formula justified by the specified line of the proof being
+        created.
+
+        Parameters:
+            line_number: number of an existing line of the proof.
+
+        Returns:
+            The formula justified by the specified line.
+        """
+        return self._formulas[line_number]
+
+    def line_for(self, formula: Union[Formula, str]) -> Optional[int]:
+        """Finds a line of the proof being created that justifies the given
+        formula.
+
+        Parameters:
+            formula: formula to look for, specified as either a formula or its
+                string representation.
+
+        Returns:
+            The number of the first line that justifies the given formula, or
+            ``None`` if no line does.
+        """
+        if isinstance(formula, str):
+            formula = Formula.parse(formula)
+        return self._line_of.get(formula)
+
+    def qed(self) -> Proof:
+        """Concludes the proof created by the current prover.
+
+        Returns:
+            A valid proof, from the assumptions of the current prover via its
+            allowed inference rules, of the formula justified by the line
+            returned by the last call that appended to the current prover.
+        """
+        assert self._last_line_number >= 0
+        lines = []
+        for offset, chunk in self._chunks:
+            if isinstance(chunk, Proof):
+                lines.extend(ShiftedProofView(chunk, offset))
+            else:
+                lines.extend(chunk)
+        if self._last_line_number != len(lines) - 1:
+            # the conclusion was already justified by an earlier line, repeat
+            # that line so that the proof ends with its conclusion
+            lines.append(lines[self._last_line_number])
+        return Proof(InferenceRule(self._assumptions,
+                                   self._formulas[self._last_line_number]),
+                     self._rules, lines)
+
+    def _add_line(self, line: Proof.Line) -> int:
+        """Appends to the proof being created by the current prover the given
+        validly justified line, unless the formula of that line is already
+        justified by an existing line.
+
+        Parameters:
+            line: a proof line that that is validly justified when appended to
+                the lines of the proof being created by the current prover.
+
+        Returns:
+            The line number of the line that justifies the formula of the
+            given line in the proof being created by the current prover.
+        """
+        if line.is_assumption():
+            assert line.formula in self._assumption_set
+        else:
+            assert line.rule in self._rules
+            for assumption in line.assumptions:
+                assert 0 <= assumption < len(self._formulas)
+            assert line.rule.match([self._formulas[assumption]
+                                    for assumption in line.assumptions],
+                                   line.formula) is not None
+        line_number = self._line_of.get(line.formula)
+        if line_number is not None:
+            self._last_line_number = line_number
+            return line_number
+        line_number = len(self._formulas)
+        if self._open_lines is None:
+            self._open_lines = []
+            self._chunks.append((0, self._open_lines))
+        self._open_lines.append(line)
+        self._formulas.append(line.formula)
+        self._line_of[line.formula] = line_number
+        self._last_line_number = line_number
+        return line_number
+
+    def add_assumption(self, assumption: Union[Formula, str]) -> int:
+        """Appends to the proof being created by the current prover a line that
+        justifies the given assumption of the current prover.
+
+        Parameters:
+            assumption: assumption of the current prover to be appended,
+                specified as either a formula or its string representation.
+
+        Returns:
+            The line number of the line that justifies the given assumption in
+            the proof being created by the current prover.
+        """
+        if isinstance(assumption, str):
+            assumption = Formula.parse(assumption)
+        return self._add_line(Proof.Line(assumption))
+
+    def add_inference(self, conclusion: Union[Formula, str],
+                      rule: InferenceRule,
+                      assumption_line_numbers: Sequence[int] = ()) -> int:
+        """Appends to the proof being created by the current prover a line that
+        validly justifies the given conclusion of a specialization of the given
+        allowed inference rule from the specified already existing lines.
+
+        Parameters:
+            conclusion: conclusion of the inference to be appended, specified
+                as either a formula or its string representation.
+            rule: allowed inference rule of the current prover.
+            assumption_line_numbers: line numbers in the proof of the
+                assumptions of the inference, in the order of the assumptions
+                of the given rule.
+
+        Returns:
+            The line number of the line that justifies the given conclusion in
+            the proof being created by the current prover.
+        """
+        if isinstance(conclusion, str):
+            conclusion = Formula.parse(conclusion)
+        return self._add_line(Proof.Line(conclusion, rule,
+                                         assumption_line_numbers))
+
+    def add_instance(self, instance: Union[Formula, str]) -> int:
+        """Appends to the proof being created by the current prover a line that
+        validly justifies the given instance of an allowed inference rule that
+        has no assumptions (e.g., of an axiom), without being told which rule.
+
+        Parameters:
+            instance: conclusion of a specialization of an allowed inference
+                rule with no assumptions, specified as either a formula or its
+                string representation.
+
+        Returns:
+            The line number of the line that justifies the given instance in
+            the proof being created by the current prover.
+        """
+        if isinstance(instance, str):
+            instance = Formula.parse(instance)
+        # only the rules whose conclusions fit the instance are matched
+        rule = next((rule for rule
+                     in rule_index(self._rules).candidates(instance)
+                     if len(rule.assumptions) == 0 and
+                     rule.match((), instance) is not None), None)
+        assert rule is not None
+        return self._add_line(Proof.Line(instance, rule, ()))
+
+    def add_mp(self, consequent: Union[Formula, str],
+               antecedent_line_number: int, conditional_line_number: int) -> \
+            int:
+        """Appends to the proof being created by the current prover a line that
+        validly justifies the given consequent of an
+        `~propositions.axiomatic_systems.MP` inference from the specified
+        already existing lines of the proof.
+
+        Parameters:
+            consequent: consequent of MP inference to be appended, specified as
+                either a formula or its string representation.
+            antecedent_line_number: line number in the proof of the antecedent
+                of the MP inference that derives the given formula.
+            conditional_line_number: line number in the proof of the conditional
+                of the MP inference that derives the given formula.
+
+        Returns:
+            The line number of the line that justifies the given formula in the
+            proof being created by the current prover.
+        """
+        return self.add_inference(consequent, MP, (antecedent_line_number,
+                                                   conditional_line_number))
+
+    def add_proof(self, proof: Proof) -> int:
+        """Appends to the proof being created by the current prover the lines
+        of the given proof, without copying them.
+
+        Parameters:
+            proof: valid proof from a subset of the assumptions of the current
+                prover, via a subset of its allowed inference rules. The lines
+                of this proof are not validated again.
+
+        Returns:
+            The line number of the appended line that justifies the conclusion
+            of the given proof in the proof being created by the current
+            prover.
+        """
+        assert self._assumption_set.issuperset(proof.statement.assumptions)
+        assert self._rules.issuperset(proof.rules)
+        assert len(proof.lines) > 0
+        offset = len(self._formulas)
+        self._chunks.append((offset, proof))
+        self._open_lines = None
+        for line_number, line in enumerate(proof.lines, offset):
+            self._formulas.append(line.formula)
+            self._line_of.setdefault(line.formula, line_number)
+        self._last_line_number = len(self._formulas) - 1
+        return self._last_line_number
@@ -0,0 +1,98 @@
+"""Measures the size of the proofs produced by
+`propositions.tautology.prove_tautology`, and the time that it takes, with and
+without pruning the variables that no longer matter.
+
+The tautologies used are the chains
+``'((p01->p02)->((p02->p03)->(...->(p01->pn))))'`` of 8 to 16 variables.
+Without pruning, every variable is branched on and every branch is proved
+from scratch, as `prove_tautology` used to do (with a copy of the former
+`propositions.tautology.prove_in_model`, which memoized nothing), which takes
+time exponential in the number of variables, so this is only measured up to
+`MAX_UNPRUNED` variables. The last column is the number of proofs that
+`propositions.tautology.prove_in_partial_model` reused rather than proved
+again.
+
+Run from the root of the code tree (next to logic_utils.py and the
+propositions package):
+
+    python benchmark_tautology.py
+"""
+
+import time
+
+from proof_store import ProofStore
+from propositions.syntax import Formula, OP_VARIABLE
+from propositions.proofs import InferenceRule, Proof
+from propositions.axiomatic_systems import AXIOMATIC_SYSTEM, I1, I2, NI, NN
+from propositions.deduction import combine_proofs, prove_corollary
+from propositions.semantics import Model, evaluate
+import propositions.tautology as tautology
+
+MIN_VARIABLES = 8
+MAX_VARIABLES = 16
+MAX_UNPRUNED = 10
+
+def chain(length: int) -> Formula:
+    variables = [Formula('p%02d' % index) for index in range(1, length + 1)]
+    formula = Formula('->', variables[0], variables[-1])
+    for index in reversed(range(length - 1)):
+        formula = Formula('->', Formula('->', variables[index],
+                                        variables[index + 1]), formula)
+    return formula
+
+def prove_in_model_unmemoized(formula: Formula, model: Model) -> Proof:
+    # prove_in_model as it was before its proofs were memoized in
+    # propositions.tautology.model_proofs
+    if formula.opcode == OP_VARIABLE:
+        if not evaluate(formula, model):
+            formula = Formula('~', formula)
+        return Proof(InferenceRule(tautology.formulae_capturing_model(model),
+                                   formula),
+                     AXIOMATIC_SYSTEM, [Proof.Line(formula)])
+    if formula.root == '->':
+        if not evaluate(formula, model):
+            return combine_proofs(
+                prove_in_model_unmemoized(formula.first, model),
+                prove_in_model_unmemoized(Formula('~', formula.second),
+                                          model),
+                Formula('~', formula), NI)
+        if not evaluate(formula.first, model):
+            return prove_corollary(
+                prove_in_model_unmemoized(Formula('~', formula.first), model),
+                formula, I2)
+        return prove_corollary(prove_in_model_unmemoized(formula.second,
+                                                         model),
+                               formula, I1)
+    if evaluate(formula, model):
+        return prove_in_model_unmemoized(formula.first, model)
+    return prove_corollary(prove_in_model_unmemoized(formula.first, model),
+                           Formula('~', formula), NN)
+
+def prove_unpruned(formula: Formula, model: Model) -> Proof:
+    for variable in sorted(formula.variables()):
+        if variable not in model:
+            return tautology.reduce_assumption(
+                prove_unpruned(formula, {**model, variable: True}),
+                prove_unpruned(formula, {**model, variable: False}))
+    return prove_in_model_unmemoized(formula, model)
+
+def main() -> None:
+    print('%9s %10s %10s %10s %10s %10s' % ('variables', 'lines', 'msec',
+                                            'unpruned', 'msec', 'reused'))
+    for length in range(MIN_VARIABLES, MAX_VARIABLES + 1):
+        formula = chain(length)
+        unpruned_lines = unpruned_msec = '-'
+        if length <= MAX_UNPRUNED:
+            start = time.perf_counter()
+            unpruned_lines = len(prove_unpruned(formula, {}).lines)
+            unpruned_msec = '%.1f' % ((time.perf_counter() - start) * 1e3)
+        tautology.model_proofs = ProofStore(capacity=4096)
+        start = time.perf_counter()
+        proof = tautology.prove_tautology(formula)
+        elapsed = time.perf_counter() - start
+        print('%9d %10d %10.1f %10s %10s %10d' % (
+            length, len(proof.lines), elapsed * 1e3, unpruned_lines,
+            unpruned_msec, tautology.model_proofs.hits))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Measures the time that `propositions.proofs.Proof.is_valid` takes with and
+without its memo of rule instances (``memoize=True``), which checks each
+distinct instance of each rule only once.
+
+The proofs used are those of `propositions.tautology.prove_tautology` for the
+tautologies ``'(p1->((p->p)->p1))'``, ``'(p2->((p1->((p->p)->p1))->p2))'``, ...
+of 2 to `MAX_VARIABLES` variables, which repeat a few axiom instances over many
+lines, and those of `propositions.deduction.remove_assumptions` for ``'p20'``
+from ``'p0'``, ``'(p0->p1)'``, ..., ``'(p19->p20)'``, with the last 5 to 20
+assumptions removed, which hardly repeat any. The ``instances`` column is the
+number of distinct rule instances in each proof.
+
+Run from the root of the code tree (next to logic_utils.py and the
+propositions package):
+
+    python benchmark_validation.py
+"""
+
+import time
+from typing import Iterator, Tuple
+
+from propositions.syntax import Formula
+from propositions.proofs import InferenceRule, Proof
+from propositions.axiomatic_systems import MP
+from propositions.deduction import remove_assumptions
+from propositions.tautology import prove_tautology
+
+MAX_VARIABLES = 9
+CHAIN_LENGTH = 20
+REPEATS = 5
+
+def wrapped(variables: int) -> Formula:
+    formula = Formula('->', Formula('p'), Formula('p'))
+    for index in range(1, variables):
+        variable = Formula('p%d' % index)
+        formula = Formula('->', variable, Formula('->', formula, variable))
+    return formula
+
+def chain_proof(length: int) -> Proof:
+    assumptions = [Formula('p0')]
+    lines = [Proof.Line(Formula('p0'))]
+    for index in range(1, length + 1):
+        conditional = Formula('->', Formula('p' + str(index - 1)),
+                              Formula('p' + str(index)))
+        assumptions.append(conditional)
+        lines.append(Proof.Line(conditional))
+        lines.append(Proof.Line(conditional.second, MP,
+                                [len(lines) - 2, len(lines) - 1]))
+    return Proof(InferenceRule(assumptions, lines[-1].formula), {MP}, lines)
+
+def proofs() -> Iterator[Tuple[str, Proof]]:
+    for variables in range(2, MAX_VARIABLES + 1):
+        yield 'tautology, %d variables' % variables, \
+              prove_tautology(wrapped(variables))
+    chain = chain_proof(CHAIN_LENGTH)
+    for removed in range(5, CHAIN_LENGTH + 1, 5):
+        yield 'deduction, %d removed' % removed, \
+              remove_assumptions(chain, removed)
+
+def best_msec(proof: Proof, memoize: bool) -> float:
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        assert proof.is_valid(memoize=memoize)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1e3
+
+def main() -> None:
+    print('%-24s %8s %10s %10s %10s' % ('proof', 'lines', 'instances', 'msec',
+                                         'memo msec'))
+    for name, proof in proofs():
+        instances = {(id(line.rule), str(line.formula)) +
+                     tuple(str(proof.lines[index].formula)
+                           for index in line.assumptions)
+                     for line in proof.lines if not line.is_assumption()}
+        print('%-24s %8d %10d %10.1f %10.1f' % (
+            name, len(proof.lines), len(instances), best_msec(proof, False),
+            best_msec(proof, True)))
+
+if __name__ == '__main__':
+    main()
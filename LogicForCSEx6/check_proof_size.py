@@ -0,0 +1,116 @@
+"""Checks that the number of lines that `propositions.tautology` computes for a
+proof before building it (`propositions.tautology.estimate_proof_size`, and
+the `max_lines` checks of `propositions.tautology.prove_tautology`,
+`propositions.tautology.proof_or_counterexample`,
+`propositions.tautology.prove_sound_inference` and
+`propositions.tautology.model_or_inconsistency`) is exactly the number of
+lines of the proof that it then builds.
+
+Random tautologies (from models over prefixes of their variables, too),
+sound inference rules and inconsistent sets of formulae are generated from a
+fixed seed, together with a few fixed inconsistent sets that contain
+``'~(p->p)'`` itself. For every one of them the proof is built, and a limit of
+one line less than its size must be refused before building. Every mismatch is
+printed, and the exit status is nonzero if there was any.
+
+Run from the root of the code tree (next to logic_utils.py and the
+propositions package):
+
+    python check_proof_size.py [SEED]
+"""
+
+import random
+import sys
+from typing import Callable, List
+
+from propositions.syntax import Formula
+from propositions.proofs import InferenceRule, Proof
+from propositions.semantics import is_sound_inference, is_tautology
+import propositions.tautology as tautology
+
+VARIABLES = ('p', 'q', 'r', 's')
+MAX_DEPTH = 4
+CASES = 100
+FIXED_INCONSISTENT = (['~(p->p)'], ['p', '~(p->p)'], ['~(p->p)', '(p->q)'],
+                      ['p', '~p', '~(p->p)'])
+
+def random_formula(generator: random.Random, depth: int) -> Formula:
+    if depth == 0 or generator.random() < 0.2:
+        return Formula(generator.choice(VARIABLES))
+    if generator.random() < 0.3:
+        return Formula('~', random_formula(generator, depth - 1))
+    return Formula('->', random_formula(generator, depth - 1),
+                   random_formula(generator, depth - 1))
+
+def random_formulae(generator: random.Random, condition: Callable[..., bool],
+                    count: int) -> List[Formula]:
+    # count formulae (or lists of formulae, if count > 1) that satisfy the
+    # given condition
+    while True:
+        formulae = [random_formula(generator, MAX_DEPTH) for _ in range(count)]
+        if condition(*formulae):
+            return formulae
+
+def is_inconsistent(*formulae: Formula) -> bool:
+    conjunction = formulae[0]
+    for formula in formulae[1:]:
+        conjunction = Formula('~', Formula('->', conjunction,
+                                           Formula('~', formula)))
+    return is_tautology(Formula('~', conjunction))
+
+def check(name: str, build: Callable[..., object]) -> bool:
+    # the proof built without a limit must be refused with one line less
+    proof = build(max_lines=None)
+    assert isinstance(proof, Proof) and proof.is_valid()
+    lines = len(proof.lines)
+    try:
+        build(max_lines=lines - 1)
+    except tautology.ProofTooLongError as error:
+        if error.lines == lines:
+            return True
+        print('%s: %d lines, computed %d' % (name, lines, error.lines))
+        return False
+    print('%s: %d lines, not refused with %d' % (name, lines, lines - 1))
+    return False
+
+def main() -> None:
+    generator = random.Random(int(sys.argv[1]) if len(sys.argv) > 1 else 0)
+    failures = 0
+    for _ in range(CASES):
+        formula, = random_formulae(generator, is_tautology, 1)
+        variables = sorted(formula.variables())
+        model = {variable: generator.random() < 0.5 for variable
+                 in variables[:generator.randint(0, len(variables))]}
+        failures += not check(str(formula), lambda max_lines:
+                              tautology.prove_tautology(formula,
+                                                        max_lines=max_lines))
+        failures += not check(str(formula), lambda max_lines:
+                              tautology.proof_or_counterexample(
+                                  formula, max_lines=max_lines))
+        if tautology.estimate_proof_size(formula, model) != len(
+                tautology.prove_tautology(formula, model).lines):
+            print('%s in %s: estimate_proof_size is off' % (formula, model))
+            failures += 1
+    for _ in range(CASES):
+        *assumptions, conclusion = random_formulae(
+            generator, lambda *formulae: is_sound_inference(
+                InferenceRule(formulae[:-1], formulae[-1])),
+            generator.randint(2, 3))
+        rule = InferenceRule(assumptions, conclusion)
+        failures += not check(str(rule), lambda max_lines:
+                              tautology.prove_sound_inference(
+                                  rule, max_lines=max_lines))
+    inconsistent = [[Formula.parse(formula) for formula in formulae]
+                    for formulae in FIXED_INCONSISTENT]
+    inconsistent += [random_formulae(generator, is_inconsistent,
+                                     generator.randint(1, 3))
+                     for _ in range(CASES)]
+    for formulae in inconsistent:
+        failures += not check(str(formulae), lambda max_lines:
+                              tautology.model_or_inconsistency(
+                                  formulae, max_lines=max_lines))
+    print('%d mismatches' % failures)
+    sys.exit(1 if failures > 0 else 0)
+
+if __name__ == '__main__':
+    main()
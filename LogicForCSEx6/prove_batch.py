@@ -0,0 +1,342 @@
+"""Proves or refutes a stream of candidate tautologies with
+`propositions.tautology.proof_or_counterexample`, in a pool of processes.
+
+Every nonempty line of the input (a file, or the standard input) that does not
+start with ``#`` is a formula that contains no operators beyond ``'->'`` and
+``'~'``, in the standard (infix) notation or, with ``--polish``, in polish
+notation. For every such line, a JSON object is written to the standard output
+on a line of its own (JSON Lines), with the keys:
+
+* ``line``: the number of the line in the input.
+* ``formula``: the formula, as given.
+* ``hash``: a hash of the formula that is the same for all the formulae that
+  only rename its variables, so these are proven or refuted only once.
+* ``result``: ``'proof'``, ``'counterexample'``, ``'too_long'`` (see
+  ``--max-lines``), ``'timeout'`` (see ``--timeout``), ``'invalid'``, or
+  ``'error'`` if proving or refuting the formula failed otherwise (e.g., if
+  it is nested too deeply).
+* ``lines``: for a proof, the number of its lines, and for ``'too_long'``, the
+  number of lines that exceeded the maximum.
+* ``proof``: for a proof, the file in which it is stored if ``--store`` is
+  given, see `proof_store.ProofStore`.
+* ``model``: for a counterexample, a model in which the formula does not hold.
+* ``error``: for an invalid line or an error, what went wrong.
+
+The results are written in the order of the input, or with
+``--completion-order`` as soon as they are found. At most ``--queue`` formulae
+are read but not written at any time, so the input is only read as fast as the
+pool keeps up. The results of the last ``--cache`` distinct formulae are kept
+for the formulae that repeat them, so the memory used does not grow with the
+length of the input. At the end, the throughput and the percentiles of the
+latency of the formulae (from reading a formula to writing its result) are
+written to the standard error.
+
+Run from the root of the code tree (next to logic_utils.py and the
+propositions package):
+
+    python prove_batch.py [--polish] [--workers N] [--queue N] [--cache N]
+        [--completion-order] [--store DIRECTORY] [--max-lines N]
+        [--timeout SECONDS] [FILE]
+"""
+
+import argparse
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, \
+                               wait
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Deque, Dict, List, Optional, TextIO, Tuple
+
+from proof_store import ProofStore, canonical_renaming, statement_key
+from propositions.syntax import Formula
+from propositions.proofs import InferenceRule
+from propositions.axiomatic_systems import AXIOMATIC_SYSTEM
+import propositions.tautology as tautology
+
+PERCENTILES = (50, 90, 99, 100)
+DEFAULT_CACHE = 65536
+
+def parse_formula(text: str, polish: bool) -> Tuple[Optional[Formula], str]:
+    if polish:
+        formula, remainder = Formula.parse_polish_prefix(text)
+    else:
+        formula, remainder = Formula.parse_prefix(text)
+    if formula is None:
+        return None, remainder
+    if remainder != '':
+        return None, 'Unexpected text after the formula: ' + remainder
+    if not formula.operators().issubset({'->', '~'}):
+        return None, 'Only the operators -> and ~ are supported'
+    return formula, ''
+
+def canonical_form(formula: Formula) -> Tuple[Formula, Dict[str, str], str]:
+    # the formula with its variables renamed as the proof store renames them,
+    # the renaming, and the hash of the key of the formula in the store
+    statement = InferenceRule([], formula)
+    renaming = canonical_renaming(statement)
+    canonical = formula.substitute_variables(
+        {variable: Formula(name) for variable, name in renaming.items()})
+    key = statement_key(statement, AXIOMATIC_SYSTEM)[0]
+    return canonical, renaming, hashlib.sha256(key.encode()).hexdigest()
+
+def start_worker(store_directory: Optional[str]) -> None:
+    if store_directory is not None:
+        tautology.use_proof_store(ProofStore(directory=store_directory))
+
+def prove(formula: Formula, max_lines: Optional[int],
+          timeout: Optional[float]) -> Dict[str, Any]:
+    # runs in a worker, and returns only what is written about the result, so
+    # that proofs are not sent back (they are in the store, if there is one)
+    try:
+        result = tautology.proof_or_counterexample(formula, max_lines, timeout)
+    except tautology.ProofTooLongError as error:
+        return {'result': 'too_long', 'lines': error.lines}
+    except TimeoutError:
+        return {'result': 'timeout'}
+    except Exception as error:
+        # e.g., a RecursionError on a deeply nested formula, which is reported
+        # for this formula rather than aborting the batch
+        return {'result': 'error', 'error': repr(error)}
+    if isinstance(result, dict):
+        return {'result': 'counterexample', 'model': result}
+    return {'result': 'proof', 'lines': len(result.lines)}
+
+def percentile(values: List[float], percent: float) -> float:
+    # nearest rank of the given sorted values
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+class Batch:
+    """Dispatches the formulae of a batch to a pool of processes, and writes
+    their results.
+
+    Attributes:
+        executor (`~concurrent.futures.ProcessPoolExecutor`): the pool.
+        output (`~typing.TextIO`): where to write the results.
+        store (`~typing.Optional`\\[`~proof_store.ProofStore`]): the store in
+            which the workers store the proofs, or ``None``.
+        max_lines (`~typing.Optional`\\[`int`]): the maximal number of lines of
+            a proof, or ``None``.
+        timeout (`~typing.Optional`\\[`float`]): the maximal number of seconds
+            to spend on a formula, or ``None``.
+        cache_size (`int`): the maximal number of results kept in `results`.
+        jobs (`~typing.Dict`\\[`str`, `~concurrent.futures.Future`]): the jobs
+            that are not done yet, by the hashes of their formulae.
+        results (`~collections.OrderedDict`): the results of the last
+            `cache_size` distinct formulae whose jobs are done, by hash, from
+            the least recently used to the most recently used.
+        distinct (`int`): the number of jobs submitted so far.
+        pending (`~typing.Deque`\\[`~typing.Tuple`]): the formulae read but
+            not written yet, in the order of the input, each as a tuple of its
+            record (without its result), the renaming of its variables, its
+            canonical form, its job (``None`` if it is invalid), and the time
+            it was read.
+        latencies (`~typing.List`\\[`float`]): the latency of every formula
+            written so far, in seconds.
+    """
+    executor: ProcessPoolExecutor
+    output: TextIO
+    store: Optional[ProofStore]
+    max_lines: Optional[int]
+    timeout: Optional[float]
+    cache_size: int
+    jobs: Dict[str, Future]
+    results: 'OrderedDict[str, Dict[str, Any]]'
+    distinct: int
+    pending: Deque[Tuple[Dict[str, Any], Dict[str, str], Optional[Formula],
+                         Optional[Future], float]]
+    latencies: List[float]
+
+    def __init__(self, executor: ProcessPoolExecutor, output: TextIO,
+                 store: Optional[ProofStore], max_lines: Optional[int],
+                 timeout: Optional[float], cache_size: int) -> None:
+        self.executor = executor
+        self.output = output
+        self.store = store
+        self.max_lines = max_lines
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.jobs = {}
+        self.results = OrderedDict()
+        self.distinct = 0
+        self.pending = deque()
+        self.latencies = []
+
+    def read(self, number: int, text: str, polish: bool) -> None:
+        """Reads the given input line, and submits its formula unless a
+        formula with the same hash is being proven or refuted, or its result
+        is in `results`.
+
+        Parameters:
+            number: the number of the line.
+            text: the line, without its end of line.
+            polish: whether the formula is in polish notation.
+        """
+        start = time.monotonic()
+        record = {'line': number, 'formula': text}
+        try:
+            formula, error = parse_formula(text, polish)
+            if formula is not None:
+                canonical, renaming, formula_hash = canonical_form(formula)
+        except RecursionError:
+            formula, error = None, 'The formula is nested too deeply'
+        if formula is None:
+            record.update(hash=None, result='invalid', error=error)
+            self.pending.append((record, {}, None, None, start))
+            return
+        record['hash'] = formula_hash
+        job = self.jobs.get(formula_hash)
+        if job is None:
+            job = Future()
+            result = self.results.get(formula_hash)
+            if result is not None:
+                self.results.move_to_end(formula_hash)
+                job.set_result(result)
+            else:
+                job = self.executor.submit(prove, canonical, self.max_lines,
+                                           self.timeout)
+                self.jobs[formula_hash] = job
+                self.distinct += 1
+        self.pending.append((record, renaming, canonical, job, start))
+
+    def write(self, pending: Tuple[Dict[str, Any], Dict[str, str],
+                                   Optional[Formula], Optional[Future],
+                                   float]) -> None:
+        """Writes the result of the given pending formula, waiting for it if
+        it is not found yet.
+
+        Parameters:
+            pending: formula that was read, as kept in `pending`.
+        """
+        record, renaming, canonical, job, start = pending
+        if job is not None:
+            try:
+                result = job.result()
+            except Exception as error:
+                # the job could not even run, e.g., the pool broke or the
+                # formula could not be sent to it
+                result = {'result': 'error', 'error': repr(error)}
+            formula_hash = record['hash']
+            if self.jobs.get(formula_hash) is job:
+                # only the last results are kept, for the formulae to come
+                del self.jobs[formula_hash]
+                self.results[formula_hash] = result
+                if len(self.results) > self.cache_size:
+                    self.results.popitem(last=False)
+            record.update(result)
+            if 'model' in record:
+                # back from the canonical names of the variables
+                names = {name: variable
+                         for variable, name in renaming.items()}
+                record['model'] = {names[name]: value for name, value
+                                   in sorted(record['model'].items())}
+            if record['result'] == 'proof' and self.store is not None:
+                record['proof'] = self.store.location(
+                    InferenceRule([], canonical), AXIOMATIC_SYSTEM)
+        self.output.write(json.dumps(record) + '\n')
+        self.output.flush()
+        self.latencies.append(time.monotonic() - start)
+
+    def write_in_order(self, limit: int) -> None:
+        """Writes the results of the first pending formulae, in the order of
+        the input, until at most the given number of formulae are pending.
+
+        Parameters:
+            limit: the number of formulae that may stay pending.
+        """
+        while len(self.pending) > limit:
+            self.write(self.pending.popleft())
+
+    def write_completed(self, limit: int) -> None:
+        """Writes the results of the pending formulae whose results are found,
+        waiting for more results until at most the given number of formulae
+        are pending.
+
+        Parameters:
+            limit: the number of formulae that may stay pending.
+        """
+        while True:
+            still_pending = deque()
+            for pending in self.pending:
+                job = pending[3]
+                if job is None or job.done():
+                    self.write(pending)
+                else:
+                    still_pending.append(pending)
+            self.pending = still_pending
+            if len(self.pending) <= limit:
+                return
+            wait({pending[3] for pending in self.pending},
+                 return_when=FIRST_COMPLETED)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Proves or refutes the formulae in the given file (or in '
+                    'the standard input), one per line, and writes the '
+                    'results as JSON lines.')
+    parser.add_argument('file', nargs='?', help='the input file')
+    parser.add_argument('--polish', action='store_true',
+                        help='the formulae are in polish notation')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='the number of processes')
+    parser.add_argument('--queue', type=int,
+                        help='the maximal number of formulae that are read '
+                             'but not written (default: 4 per process)')
+    parser.add_argument('--cache', type=int, default=DEFAULT_CACHE,
+                        help='the number of results of distinct formulae to '
+                             'keep for the formulae that repeat them '
+                             '(default: %(default)s)')
+    parser.add_argument('--completion-order', action='store_true',
+                        help='write the results as soon as they are found')
+    parser.add_argument('--store', metavar='DIRECTORY',
+                        help='the directory of a proof store to keep the '
+                             'proofs in')
+    parser.add_argument('--max-lines', type=int,
+                        help='the maximal number of lines of a proof')
+    parser.add_argument('--timeout', type=float,
+                        help='the maximal number of seconds per formula')
+    arguments = parser.parse_args()
+    assert arguments.workers > 0
+    queue = arguments.queue or 4 * arguments.workers
+    assert queue > 0 and arguments.cache > 0
+    store = None if arguments.store is None else \
+            ProofStore(directory=arguments.store)
+
+    input_file = sys.stdin if arguments.file is None else \
+                 open(arguments.file)
+    start = time.monotonic()
+    with input_file, ProcessPoolExecutor(
+            arguments.workers, initializer=start_worker,
+            initargs=(arguments.store,)) as executor:
+        batch = Batch(executor, sys.stdout, store, arguments.max_lines,
+                      arguments.timeout, arguments.cache)
+        write = batch.write_completed if arguments.completion_order else \
+                batch.write_in_order
+        for number, text in enumerate(input_file, 1):
+            text = text.strip()
+            if text == '' or text.startswith('#'):
+                continue
+            # waits for room in the queue before reading on
+            write(queue - 1)
+            batch.read(number, text, arguments.polish)
+            if arguments.completion_order:
+                write(queue)
+        write(0)
+    elapsed = time.monotonic() - start
+
+    latencies = sorted(batch.latencies)
+    print('%d formulae (%d submitted) in %.2f seconds, %.1f per second' %
+          (len(latencies), batch.distinct, elapsed,
+           len(latencies) / elapsed if elapsed > 0 else 0.0),
+          file=sys.stderr)
+    if len(latencies) > 0:
+        print('latency msec: ' + ', '.join(
+            '%s %.1f' % ('max' if percent == 100 else 'p%d' % percent,
+                         percentile(latencies, percent) * 1e3)
+            for percent in PERCENTILES), file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
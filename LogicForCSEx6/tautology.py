@@ -5,17 +5,69 @@
 
 """The Tautology Theorem and its implications."""
 
-from typing import List, Union
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+import time
+from typing import AbstractSet, Dict, FrozenSet, Iterator, List, Optional, \
+                   TextIO, Tuple, Union
 
 from logic_utils import frozendict
+from proof_store import ProofStore
 
 from propositions.syntax import *
 from propositions.proofs import *
 from propositions.deduction import *
+from propositions.proof_files import *
 from propositions.semantics import *
 from propositions.operators import *
 from propositions.axiomatic_systems import *
 
+# store of proofs consulted by prove_tautology (and thus by the functions that
+# use it) before generating a proof, see `use_proof_store`
+proof_store: Optional[ProofStore] = None
+
+# proofs of formulae in the models restricted to their variables, see
+# `prove_in_partial_model`
+model_proofs = ProofStore(capacity=4096)
+
+# the formula that is False in every model, which refutations prove
+FALSE = Formula.parse('~(p->p)')
+
+class ProofTooLongError(Exception):
+    """Raised when a proof would have more lines than it is allowed to."""
+
+    def __init__(self, max_lines: int, lines: int) -> None:
+        """Initializes a `ProofTooLongError` from the allowed number of lines
+        and the number of lines that exceeded it.
+
+        Parameters:
+            max_lines: the maximal number of lines that the proof is allowed
+                to have.
+            lines: the number of lines of the proof (or of the part of it
+                generated so far) that exceeded that maximum.
+        """
+        assert lines > max_lines
+        super().__init__('proof has %d lines, more than the maximum %d' %
+                         (lines, max_lines))
+        self.max_lines = max_lines
+        self.lines = lines
+
+def check_deadline(deadline: Optional[float]) -> None:
+    # deadlines are in terms of time.monotonic()
+    if deadline is not None and time.monotonic() > deadline:
+        raise TimeoutError()
+
+def use_proof_store(store: Optional[ProofStore]) -> None:
+    """Sets the store of proofs that `prove_tautology` consults before
+    generating an assumptionless proof, and in which it stores the proofs that
+    it generates.
+
+    Parameters:
+        store: the store to use, or ``None`` to generate every proof.
+    """
+    global proof_store
+    proof_store = store
+
 def formulae_capturing_model(model: Model) -> List[Formula]:
     """Computes the formulae that capture the given model: ``'``\ `x`\ ``'``
     for each variable `x` that is assigned the value ``True`` in the given
@@ -55,7 +107,10 @@ def prove_in_model(formula: Formula, model:Model) -> Proof:
     Parameters:
         formula: formula that contains no constants or operators beyond ``'->'``
             and ``'~'``, whose affirmation or negation is to prove.
-        model: model from whose formulae to prove.
+        model: model from whose formulae to prove. The model may also be
+            defined over only some of the variables of the formula, as long as
+            it determines its truth value, see
+            `~propositions.semantics.evaluate_in_partial_model`.
 
     Returns:
         If the given formula evaluates to ``True`` in the given model, then
@@ -67,60 +122,166 @@ def prove_in_model(formula: Formula, model:Model) -> Proof:
     assert formula.operators().issubset({'->', '~'})
     assert is_model(model)
     # Task 6.1b
+    # the proof is from the formulae that capture the model restricted to the
+    # variables of the formula, which are some of the given assumptions
+    proof = prove_in_partial_model(formula, model)
+    return Proof(InferenceRule(formulae_capturing_model(model),
+                               proof.statement.conclusion),
+                 AXIOMATIC_SYSTEM, proof.lines)
+
+def prove_in_partial_model(formula: Formula, model: Model,
+                           rules: AbstractSet[InferenceRule] =
+                           AXIOMATIC_SYSTEM) -> Proof:
+    """Either proves the given formula or proves its negation, from the formulae
+    that capture the given model restricted to the variables of the formula,
+    where the given model need not be defined over all of these variables.
+
+    The proofs are memoized in `model_proofs` as templates, so a formula is
+    proven in a model only once, even if it is a subformula of many formulae
+    or is proven in many models that agree on its variables, and a proof of a
+    formula that only differs from it in the names of its variables is reused
+    by specializing it.
+
+    Parameters:
+        formula: formula that contains no constants or operators beyond ``'->'``
+            and ``'~'`` (or, if the given rules are
+            `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM_FULL`, no
+            operators beyond ``'->'``, ``'~'``, ``'&'``, and ``'|'``), whose
+            affirmation or negation is to prove.
+        model: model from whose formulae to prove, in which the truth value of
+            the given formula is determined, see
+            `~propositions.semantics.evaluate_in_partial_model`.
+        rules: `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM` or
+            `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM_FULL`, the rules
+            via which to prove.
+
+    Returns:
+        If the given formula evaluates to ``True`` in the given model, then
+        a proof of the formula, otherwise a proof of ``'~``\ `formula`\ ``'``.
+        The returned proof is from the formulae that capture the restriction
+        of the given model to the variables of the formula, in the order
+        returned by `formulae_capturing_model`, via the given rules.
+    """
+    variables = formula.variables()
+    restricted_model = {var: value for var, value in model.items()
+                        if var in variables}
+    if evaluate_in_partial_model(formula, restricted_model):
+        conclusion = formula
+    else:
+        conclusion = Formula('~', formula)
+    return model_proofs.prove(
+        InferenceRule(formulae_capturing_model(restricted_model), conclusion),
+        rules,
+        lambda: prove_in_partial_model_helper(formula, restricted_model,
+                                              rules))
+
+def restate(proof: Proof, assumptions: List[Formula],
+            rules: AbstractSet[InferenceRule] = AXIOMATIC_SYSTEM) -> Proof:
+    # the same lines, as a proof from the given (more) assumptions
+    return Proof(InferenceRule(assumptions, proof.statement.conclusion),
+                 rules, proof.lines)
+
+def prove_in_partial_model_helper(formula: Formula, model: Model,
+                                  rules: AbstractSet[InferenceRule]) -> Proof:
+    # the model is restricted to the variables of the formula, and the proofs
+    # of the operands (from their own restricted models) are restated from
+    # the formulae that capture it
+    assumptions = formulae_capturing_model(model)
+    value = evaluate_in_partial_model(formula, model)
+    assert value is not None
+
+    def prove_operand(operand):
+        return restate(prove_in_partial_model(operand, model, rules),
+                       assumptions, rules)
+
     all_lines = list()
 
     # CASE 1 : handle case as x where x is variable
-    if is_variable(str(formula)):
-        if evaluate(formula, model):
+    if formula.opcode == OP_VARIABLE:
+        if value:
             # if the var evaluate to True in the model
             all_lines.append(Proof.Line(formula))
-            statement = InferenceRule(formulae_capturing_model(model), formula)
-            return Proof(statement, AXIOMATIC_SYSTEM, all_lines)
+            statement = InferenceRule(assumptions, formula)
+            return Proof(statement, rules, all_lines)
         else:
             # if the var evaluate to False in the model
             all_lines.append(Proof.Line(Formula('~',formula)))
-        statement = InferenceRule(formulae_capturing_model(model), Formula('~',formula))
-        return Proof(statement, AXIOMATIC_SYSTEM, all_lines)
+        statement = InferenceRule(assumptions, Formula('~',formula))
+        return Proof(statement, rules, all_lines)
 
-    # CASE 2 : (p->q):
+    # CASE 2 : T or F, which are axioms (T and ~F) of the full system
+    elif formula.opcode == OP_CONSTANT:
+        if value:
+            all_lines.append(Proof.Line(formula, T, []))
+        else:
+            all_lines.append(Proof.Line(Formula('~', formula), NF, []))
+        return Proof(InferenceRule(assumptions, all_lines[0].formula), rules,
+                     all_lines)
+
+    # CASE 3 : (p->q):
     elif formula.root == '->':
         # formula p->q evaluate to True in the given model
-        if evaluate(formula, model):
+        if value:
             # there are 2 cases : or p evaluate to False, or q eval to True
-            if not evaluate(formula.first, model):
+            # (in a partial model, the other one may not be determined)
+            if evaluate_in_partial_model(formula.first, model) is False:
                 # case where p eval to False
-                # proof1 is proof of 'p'
-                proof1 = prove_in_model(Formula('~', formula.first), model)
+                # proof1 is proof of '~p'
                 # using I2
-                return prove_corollary(proof1, formula, I2)
+                return prove_corollary(prove_operand(formula.first), formula,
+                                       I2)
             else:
                 # case where q eval to True
-                proof1 = prove_in_model(formula.second, model)
-                return prove_corollary(proof1, formula, I1)
+                return prove_corollary(prove_operand(formula.second), formula,
+                                       I1)
 
         # formula f = (p->q) evaluate to False in the given model
         # therefor p eval to True and q eval to False
         # than we want to prove ~f = ~(p->q) , NI does exactly that.
         # NI = (p->(~q->~(p->q)))
         else:
-            prove_p = prove_in_model(formula.first, model)
-            prove_not_q = prove_in_model(Formula('~',formula.second), model)
             # ~f = ~(p->q) = Formula('~', formula)
-            combined = combine_proofs(prove_p, prove_not_q, Formula('~', formula), NI)
+            combined = combine_proofs(prove_operand(formula.first),
+                                      prove_operand(formula.second),
+                                      Formula('~', formula), NI)
             return combined
-    # case 3
+
+    # CASE 4 : (p&q), A = (p->(q->(p&q))), NA1 = (~q->~(p&q)) and
+    # NA2 = (~p->~(p&q))
+    elif formula.root == '&':
+        if value:
+            return combine_proofs(prove_operand(formula.first),
+                                  prove_operand(formula.second), formula, A)
+        if evaluate_in_partial_model(formula.first, model) is False:
+            return prove_corollary(prove_operand(formula.first),
+                                   Formula('~', formula), NA2)
+        return prove_corollary(prove_operand(formula.second),
+                               Formula('~', formula), NA1)
+
+    # CASE 5 : (p|q), O1 = (q->(p|q)), O2 = (p->(p|q)) and
+    # NO = (~p->(~q->~(p|q)))
+    elif formula.root == '|':
+        if not value:
+            return combine_proofs(prove_operand(formula.first),
+                                  prove_operand(formula.second),
+                                  Formula('~', formula), NO)
+        if evaluate_in_partial_model(formula.first, model) is True:
+            return prove_corollary(prove_operand(formula.first), formula, O2)
+        return prove_corollary(prove_operand(formula.second), formula, O1)
+
+    # case 6
     else:
         # must be f = ~g
         assert (formula.root == '~')
-        if evaluate(formula, model):
+        if value:
             # if f is True than ~g = True ---> g = False
-            return prove_in_model(formula.first, model)
+            return prove_operand(formula.first)
         else:
             # if f is False than ~g is False --> g = True
             # prove g, than using NN we would get ~~g, which is ~f -> True
-            prove_g = prove_in_model(formula.first, model)
             # from g, using NN we prove ~~g = ~formula = ~f
-            return prove_corollary(prove_g, Formula('~', formula), NN)
+            return prove_corollary(prove_operand(formula.first),
+                                   Formula('~', formula), NN)
 
     # return Proof(statement, AXIOMATIC_SYSTEM, all_lines)
 
@@ -191,7 +352,9 @@ def reduce_assumption(proof_from_affirmation: Proof,
 
 
 
-def prove_tautology(tautology: Formula, model: Model = frozendict()) -> Proof:
+def prove_tautology(tautology: Formula, model: Model = frozendict(),
+                    workers: int = 1, max_lines: Optional[int] = None) -> \
+        Proof:
     """Proves the given tautology from the formulae that capture the given
     model.
 
@@ -201,6 +364,12 @@ def prove_tautology(tautology: Formula, model: Model = frozendict()) -> Proof:
         model: model over a (possibly empty) prefix (with respect to the
             alphabetical order) of the variables of `tautology`, from whose
             formulae to prove.
+        workers: number of processes in which to generate the proof. If more
+            than one, the branches of the top levels of the recursion (as few
+            levels as give at least one branch per process) are proven in a
+            pool of processes, see `prove_tautology_in_parallel`.
+        max_lines: the maximal number of lines of the proof, or ``None`` for
+            no limit.
 
     Returns:
         A valid proof of the given tautology from the formulae that capture the
@@ -208,6 +377,11 @@ def prove_tautology(tautology: Formula, model: Model = frozendict()) -> Proof:
         `formulae_capturing_model`\ ``(``\ `model`\ ``)``, via
         `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM`.
 
+    Raises:
+        ProofTooLongError: if the proof would have more than `max_lines`
+            lines, which is computed as in `estimate_proof_size` before any
+            line is built.
+
     Examples:
         If the given model is the empty dictionary, then the returned proof is
         of the given tautology from no assumptions.
@@ -216,62 +390,504 @@ def prove_tautology(tautology: Formula, model: Model = frozendict()) -> Proof:
     assert tautology.operators().issubset({'->', '~'})
     assert is_model(model)
     assert sorted(tautology.variables())[:len(model)] == sorted(model.keys())
+    assert workers > 0
     # Task 6.3a
+    if max_lines is not None:
+        lines = shape_size(tautology_proof_shape(
+            tautology, frozendict(model), variable_bits(tautology)))
+        if lines > max_lines:
+            raise ProofTooLongError(max_lines, lines)
+    if workers > 1:
+        build = lambda: prove_tautology_in_parallel(tautology, model, workers)
+    else:
+        build = lambda: prove_tautology_helper(tautology, model)
+    if proof_store is not None and len(model) == 0:
+        # a proof of the same tautology up to renaming of variables is reused,
+        # but it may have been stored by another builder (e.g., by
+        # proof_or_counterexample), with another number of lines
+        proof = proof_store.prove(InferenceRule([], tautology),
+                                  AXIOMATIC_SYSTEM, build)
+        if max_lines is not None and len(proof.lines) > max_lines:
+            raise ProofTooLongError(max_lines, len(proof.lines))
+        return proof
+    return build()
+
+def prove_tautology_helper(tautology: Formula, model: Model,
+                           rules: AbstractSet[InferenceRule] =
+                           AXIOMATIC_SYSTEM) -> Proof:
+    # the model is extended by one variable at every level of the recursion,
+    # a persistent frozendict shares the rest of it instead of copying it
+    if not isinstance(model, frozendict):
+        model = frozendict(model)
 
-    statement = InferenceRule(formulae_capturing_model(model), tautology)
+    # rules are AXIOMATIC_SYSTEM (or AXIOMATIC_SYSTEM_FULL)
+    if evaluate_in_partial_model(tautology, model) is not None:
+        # the variables that are not in the model do not matter anymore, so
+        # there is no need to branch on them
+        if rules == AXIOMATIC_SYSTEM:
+            return prove_in_model(tautology, model)
+        return prove_in_model_full(tautology, model)
 
-    # rules are AXIOMATIC_SYSTEM
     list_of_var_in_formula = list(tautology.variables())
     list_of_var_in_formula.sort()
     for var in list_of_var_in_formula:
         if var not in model:
-            new_model = dict(model)
-            new_model[var] = True
             # proof 1 is with that var with value True
-            proof1 = prove_tautology(tautology, new_model)
-            new_model[var] = False
+            proof1 = prove_tautology_helper(tautology, model.set(var, True),
+                                            rules)
             # proof 2 is with that var with value False
-            proof2 = prove_tautology(tautology, new_model)
+            proof2 = prove_tautology_helper(tautology, model.set(var, False),
+                                            rules)
             # proof without that var
             return reduce_assumption(proof1, proof2)
 
-    # if the model contains all the var in the tautology formula
-    return prove_in_model(tautology, model)
+# the proofs of the branches of the top levels of the recursion, or pairs of
+# the branches for the variable with the value True and with the value False
+Branches = Union[Future, Tuple['Branches', 'Branches']]
+
+def prove_tautology_in_parallel(tautology: Formula, model: Model,
+                                workers: int) -> Proof:
+    """Proves the given tautology from the formulae that capture the given
+    model, like `prove_tautology_helper`, but proves the branches of the top
+    levels of the recursion in a pool of processes.
+
+    Parameters:
+        tautology: tautology to prove, as in `prove_tautology`.
+        model: model over a prefix of the variables of `tautology`, from whose
+            formulae to prove.
+        workers: number of processes to prove the branches in.
+
+    Returns:
+        The same proof as `prove_tautology_helper`\ ``(``\ `tautology`\ ``,``
+        `model`\ ``)``.
+    """
+    # 2**levels branches, at least one per process
+    levels = (workers - 1).bit_length()
+    with ProcessPoolExecutor(workers) as executor:
+        branches = submit_branches(executor, tautology, frozendict(model),
+                                   levels)
+        return combine_branches(branches)
+
+def submit_branches(executor: ProcessPoolExecutor, tautology: Formula,
+                    model: frozendict, levels: int) -> Branches:
+    # branches on the next variables, as prove_tautology_helper does, for the
+    # given number of levels, and submits the proof of every branch below
+    # them. the proofs are pickled back, and pickling keeps the subformulae
+    # that their lines share as shared objects, so they stay compact
+    if levels > 0 and evaluate_in_partial_model(tautology, model) is None:
+        for var in sorted(tautology.variables()):
+            if var not in model:
+                return (submit_branches(executor, tautology,
+                                        model.set(var, True), levels - 1),
+                        submit_branches(executor, tautology,
+                                        model.set(var, False), levels - 1))
+    # the model is sent as a plain dictionary
+    return executor.submit(prove_tautology_helper, tautology, dict(model))
+
+def combine_branches(branches: Branches) -> Proof:
+    # waits for the proofs of the branches and combines them from the bottom
+    # up, as prove_tautology_helper does
+    if isinstance(branches, tuple):
+        return reduce_assumption(combine_branches(branches[0]),
+                                 combine_branches(branches[1]))
+    return branches.result()
+
+# a line of a proof that is generated line by line, or a pair of line numbers
+# `first` and `last` such that the lines from `first` up to (and excluding)
+# `last` are not cited by any later line
+ProofItem = Union[Proof.Line, Tuple[int, int]]
+
+def tautology_proof_lines(tautology: Formula, model: Model = frozendict()) -> \
+        Iterator[Proof.Line]:
+    """Generates the lines of a proof of the given tautology from the formulae
+    that capture the given model, one at a time, without building the proof.
+
+    Only what is needed for the line numbers that later lines cite is kept,
+    i.e., a few numbers for every line that may still be cited and the proof in
+    the model at the current leaf of the recursion, so the memory used is
+    bounded by the depth of the recursion times the size of the tautology
+    (besides the proofs kept in `model_proofs`, whose number is bounded by its
+    capacity), rather than by the length of the proof.
+
+    Parameters:
+        tautology: tautology to prove, as in `prove_tautology`.
+        model: model over a (possibly empty) prefix of the variables of
+            `tautology`, from whose formulae to prove.
+
+    Returns:
+        An iterator over the lines of the proof that `prove_tautology`\ ``(``\
+        `tautology`\ ``,`` `model`\ ``)`` returns (without consulting
+        `proof_store`), in order.
+    """
+    assert is_tautology(tautology)
+    assert tautology.operators().issubset({'->', '~'})
+    assert is_model(model)
+    assert sorted(tautology.variables())[:len(model)] == sorted(model.keys())
+    for item in tautology_proof_items(tautology, frozendict(model)):
+        if not isinstance(item, tuple):
+            yield item
+
+def write_tautology_proof(tautology: Formula, file: TextIO,
+                          model: Model = frozendict()) -> int:
+    """Writes a proof of the given tautology from the formulae that capture the
+    given model to the given proof file, while the proof is generated, see
+    `tautology_proof_lines`.
+
+    Parameters:
+        tautology: tautology to prove, as in `prove_tautology`.
+        file: text file (or any other object with a ``write`` method that
+            takes a string, such as a wrapper of a socket) open for writing.
+        model: model over a (possibly empty) prefix of the variables of
+            `tautology`, from whose formulae to prove.
+
+    Returns:
+        The number of lines of the written proof, which can be verified by
+        `~propositions.proof_files.verify_proof_file` in memory that is
+        bounded like the memory used to write it.
+    """
+    assert is_tautology(tautology)
+    assert tautology.operators().issubset({'->', '~'})
+    assert is_model(model)
+    assert sorted(tautology.variables())[:len(model)] == sorted(model.keys())
+    return write_proof_lines(
+        InferenceRule(formulae_capturing_model(model), tautology),
+        AXIOMATIC_SYSTEM, tautology_proof_items(tautology, frozendict(model)),
+        file)
+
+def tautology_proof_items(tautology: Formula, model: frozendict) -> \
+        Iterator[ProofItem]:
+    # generates the proof of prove_tautology_helper line by line: the lines of
+    # the proofs of the two branches go through assumption removers as they
+    # are generated, and are then combined as reduce_assumption does. every
+    # branch is followed by a pair that says that its lines, except its last
+    # one, are not cited anymore
+    if evaluate_in_partial_model(tautology, model) is not None:
+        yield from prove_in_model(tautology, model).lines
+        return
+    var = min(var for var in tautology.variables() if var not in model)
+    affirmation = Formula(var)
+    negation = Formula('~', affirmation)
+    count = 0
+    last_lines = []
+    for assumption, value in ((affirmation, True), (negation, False)):
+        first = count
+        for item in assumption_removed_items(
+                tautology_proof_items(tautology, model.set(var, value)),
+                assumption, first):
+            if not isinstance(item, tuple):
+                count += 1
+            yield item
+        last_lines.append(count - 1)
+        yield first, count - 1
+    # ((q->p)->((~q->p)->p)) and two MPs, as in combine_proofs
+    from_negation = Formula('->', negation, tautology)
+    yield Proof.Line(Formula('->', Formula('->', affirmation, tautology),
+                             Formula('->', from_negation, tautology)), R, [])
+    yield Proof.Line(Formula('->', from_negation, tautology), MP,
+                     [last_lines[0], count])
+    yield Proof.Line(tautology, MP, [last_lines[1], count + 1])
+
+def assumption_removed_items(items: Iterator[ProofItem], assumption: Formula,
+                             offset: int) -> Iterator[ProofItem]:
+    # passes the given lines of a proof through an assumption remover, as
+    # remove_assumption does, numbering the new lines from the given offset,
+    # and passes on what is not cited anymore in the numbers of the new lines
+    new_lines = []
+    next_number = offset
+
+    def append_line(line):
+        nonlocal next_number
+        new_lines.append(line)
+        next_number += 1
+        return next_number - 1
+
+    add_line, finish, forget = assumption_remover(assumption, append_line)
+    # the number of the first new line of every given line that is kept
+    first_new_lines = {}
+    for item in items:
+        if isinstance(item, tuple):
+            first, last = item
+            forget(first, last)
+            yield first_new_lines[first], first_new_lines[last]
+            # the first and last lines of the range may also be the first and
+            # last lines of a range that contains it
+            for number in [number for number in first_new_lines
+                           if first < number < last]:
+                del first_new_lines[number]
+        else:
+            first_new_line = next_number
+            first_new_lines[add_line(item)] = first_new_line
+            yield from new_lines
+            new_lines.clear()
+    finish()
+    yield from new_lines
+
+# a class of lines of a proof that the assumption removers convert alike: the
+# bit of the variable whose literal (in the model) is the formula of the lines
+# or zero, the bits of the variables whose literals the lines depend on, the
+# bits of the lines that they cite, and the positions and bits of the lines
+# that cite them
+LineClass = Tuple[int, int, Tuple[int, ...], FrozenSet[Tuple[int, int]]]
+
+# the number of lines of a proof in every class, except its last line, and the
+# class of its last line
+ProofShape = Tuple[Dict[LineClass, int], LineClass]
+
+def estimate_proof_size(tautology: Formula, model: Model = frozendict()) -> \
+        int:
+    """Computes the number of lines of the proof that `prove_tautology`
+    returns for the given tautology and model, without building any of them.
+
+    The recursion of `prove_tautology` is followed, but only the number of
+    lines in every class of lines that the assumption removers convert alike
+    is kept, so the time that this takes depends on the number of leaves of
+    the recursion, the size of the tautology and the number of different
+    classes, rather than on the number of lines.
+
+    Parameters:
+        tautology: tautology to prove, as in `prove_tautology`.
+        model: model over a (possibly empty) prefix of the variables of
+            `tautology`, from whose formulae to prove.
 
-def proof_or_counterexample(formula: Formula) -> Union[Proof, Model]:
+    Returns:
+        The number of lines of the proof that `prove_tautology`\ ``(``\
+        `tautology`\ ``,`` `model`\ ``)`` returns.
+    """
+    assert is_tautology(tautology)
+    assert tautology.operators().issubset({'->', '~'})
+    assert is_model(model)
+    assert sorted(tautology.variables())[:len(model)] == sorted(model.keys())
+    return shape_size(tautology_proof_shape(tautology, frozendict(model),
+                                            variable_bits(tautology)))
+
+def variable_bits(*formulae: Formula) -> Dict[str, int]:
+    # a bit for every variable of the given formulae, in alphabetical order
+    variables = set()
+    for formula in formulae:
+        variables.update(formula.variables())
+    return {var: 1 << index for index, var in enumerate(sorted(variables))}
+
+def tautology_proof_shape(tautology: Formula, model: frozendict,
+                          bits: Dict[str, int]) -> ProofShape:
+    # the shape of the proof of prove_tautology_helper
+    if evaluate_in_partial_model(tautology, model) is not None:
+        # a plain dictionary is faster to look up than the persistent one
+        return model_proof_shape(tautology, dict(model), bits)
+    var = min(var for var in tautology.variables() if var not in model)
+    return combined_shape(
+        removed_shape(tautology_proof_shape(tautology, model.set(var, True),
+                                            bits), bits[var]),
+        removed_shape(tautology_proof_shape(tautology, model.set(var, False),
+                                            bits), bits[var]))
+
+def refutation_proof_shape(formulae: List[Formula], refutation: 'Refutation',
+                           model: frozendict, bits: Dict[str, int]) -> \
+        ProofShape:
+    # the shape of the proof of prove_refutation
+    if isinstance(refutation, int):
+        # the proof of ~f, then f, I2 and two MPs
+        formula = formulae[refutation]
+        counts, last = model_proof_shape(formula, dict(model), bits)
+        literal, mask, cited, citers = last
+        counts = Counter(counts)
+        counts[(literal, mask, cited, citers | {(0, mask)})] += 1
+        counts[(0, 0, (), frozenset({(1, mask)}))] += 1
+        counts[(0, 0, (), frozenset({(0, mask)}))] += 1
+        counts[(0, mask, (mask, 0), frozenset({(1, mask)}))] += 1
+        return counts, (0, mask, (0, mask), frozenset())
+    var, if_true, if_false = refutation
+    return combined_shape(
+        removed_shape(refutation_proof_shape(
+            formulae, if_true, model.set(var, True), bits), bits[var]),
+        removed_shape(refutation_proof_shape(
+            formulae, if_false, model.set(var, False), bits), bits[var]))
+
+def tautology_refutation_proof_shape(tautology: Formula,
+                                     refutation: 'Refutation',
+                                     model: frozendict,
+                                     bits: Dict[str, int]) -> ProofShape:
+    # the shape of the proof of prove_tautology_from_refutation, which is that
+    # of prove_tautology_helper with the branches of the refutation
+    if isinstance(refutation, int):
+        return model_proof_shape(tautology, dict(model), bits)
+    var, if_true, if_false = refutation
+    return combined_shape(
+        removed_shape(tautology_refutation_proof_shape(
+            tautology, if_true, model.set(var, True), bits), bits[var]),
+        removed_shape(tautology_refutation_proof_shape(
+            tautology, if_false, model.set(var, False), bits), bits[var]))
+
+def model_proof_shape(formula: Formula, model: Model,
+                      bits: Dict[str, int]) -> ProofShape:
+    # the shape of the proof of prove_in_partial_model, whose every case is
+    # a single line, a corollary of the proof of an operand, or a combination
+    # of the proofs of both operands
+    value = evaluate_in_partial_model_helper(formula, model)
+    assert value is not None
+    if formula.opcode == OP_VARIABLE:
+        return Counter(), (bits[formula.root], bits[formula.root], (),
+                           frozenset())
+    if formula.root == '->':
+        if not value:
+            return combined_shape(
+                model_proof_shape(formula.first, model, bits),
+                model_proof_shape(formula.second, model, bits))
+        if evaluate_in_partial_model_helper(formula.first, model) is False:
+            return corollary_shape(model_proof_shape(formula.first, model,
+                                                     bits))
+        return corollary_shape(model_proof_shape(formula.second, model,
+                                                 bits))
+    assert formula.root == '~'
+    if value:
+        return model_proof_shape(formula.first, model, bits)
+    return corollary_shape(model_proof_shape(formula.first, model, bits))
+
+def shape_size(shape: ProofShape) -> int:
+    # the number of lines of a proof of the given shape
+    counts, last = shape
+    return sum(counts.values()) + 1
+
+def corollary_shape(shape: ProofShape) -> ProofShape:
+    # the shape of the proof that prove_corollary returns for a proof of the
+    # given shape
+    counts, last = shape
+    literal, mask, cited, citers = last
+    counts = Counter(counts)
+    counts[(literal, mask, cited, citers | {(0, mask)})] += 1
+    counts[(0, 0, (), frozenset({(1, mask)}))] += 1
+    return counts, (0, mask, (mask, 0), frozenset())
+
+def removed_shape(shape: ProofShape, bit: int) -> ProofShape:
+    # the shape of the proof that remove_assumption returns for a proof of
+    # the given shape, whose last assumption is the literal of the variable of
+    # the given bit. the lines are converted as assumption_remover converts
+    # them, only that every class is converted once for all of its lines
+    counts, last = shape
+    new_counts = Counter()
+
+    def implied_class(mask, citers, cited):
+        # the class of p->a, where a is a line of the given class. a line that
+        # depends on p and cites a as its antecedent cites p->a as the
+        # antecedent of its last MP, and a line that cites a as its conditional
+        # cites p->a as the antecedent of the MP after D
+        implied_citers = frozenset(
+            (0, (citer_mask if position == 0 else mask) & ~bit)
+            for position, citer_mask in citers if citer_mask & bit)
+        return 0, mask & ~bit, cited, implied_citers
+
+    def convert(line_class, count, is_last):
+        # adds the lines that a line of the given class is converted into,
+        # and returns the class of its p->a line, or None if there is none
+        literal, mask, cited, citers = line_class
+        if literal == bit:
+            # (p->p) by I0
+            return implied_class(0, citers, ())
+        if mask & bit == 0:
+            wrapped = is_last or \
+                      any(citer_mask & bit for _, citer_mask in citers)
+            plain_citers = {(position, citer_mask)
+                            for position, citer_mask in citers
+                            if citer_mask & bit == 0}
+            if wrapped:
+                # a, (a->(p->a)) by I1, and (p->a) by MP
+                plain_citers.add((0, mask))
+                new_counts[(0, 0, (), frozenset({(1, mask)}))] += count
+            new_counts[(literal, mask, cited, frozenset(plain_citers))] += \
+                count
+            if not wrapped:
+                return None
+            return implied_class(mask, citers, (mask, 0))
+        # D, MP and MP, see assumption_remover
+        antecedent, conditional = cited[0] & ~bit, cited[1] & ~bit
+        new_counts[(0, 0, (), frozenset({(1, conditional)}))] += count
+        new_counts[(0, conditional, (conditional, 0),
+                    frozenset({(1, mask & ~bit)}))] += count
+        return implied_class(mask, citers, (antecedent, conditional))
+
+    for line_class, count in counts.items():
+        implied = convert(line_class, count, False)
+        if implied is not None:
+            new_counts[implied] += count
+    return new_counts, convert(last, 1, True)
+
+def combined_shape(antecedent1_shape: ProofShape,
+                   antecedent2_shape: ProofShape) -> ProofShape:
+    # the shape of the proof that combine_proofs returns for proofs of the
+    # given shapes
+    counts = Counter(antecedent1_shape[0])
+    counts.update(antecedent2_shape[0])
+    literal1, mask1, cited1, citers1 = antecedent1_shape[1]
+    literal2, mask2, cited2, citers2 = antecedent2_shape[1]
+    mask = mask1 | mask2
+    counts[(literal1, mask1, cited1, citers1 | {(0, mask1)})] += 1
+    counts[(literal2, mask2, cited2, citers2 | {(0, mask)})] += 1
+    # the double conditional, and the two MPs
+    counts[(0, 0, (), frozenset({(1, mask1)}))] += 1
+    counts[(0, mask1, (mask1, 0), frozenset({(1, mask)}))] += 1
+    return counts, (0, mask, (mask2, mask1), frozenset())
+
+def proof_or_counterexample(formula: Formula,
+                            max_lines: Optional[int] = None,
+                            timeout: Optional[float] = None) -> \
+        Union[Proof, Model]:
     """Either proves the given formula or finds a model in which it does not
     hold.
 
     Parameters:
         formula: formula that contains no constants or operators beyond ``'->'``
             and ``'~'``, to either prove or find a counterexample for.
+        max_lines: the maximal number of lines of the proof, or ``None`` for
+            no limit.
+        timeout: the maximal number of seconds to spend, or ``None`` for no
+            limit.
 
     Returns:
         If the given formula is a tautology, then an assumptionless proof of the
         formula via `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM`,
         otherwise a model in which the given formula does not hold.
+
+    Raises:
+        ProofTooLongError: if the given formula is a tautology, but its proof
+            would have more than `max_lines` lines, which is computed before
+            any line is built.
+        TimeoutError: if neither was found within `timeout` seconds.
     """
     assert formula.operators().issubset({'->', '~'})
     # Task 6.3b
-    if is_tautology(formula):
-        # if it tautology, return a proof
-        return prove_tautology(formula, {})
-    else:
-        # if its not tautology, than there must be a model which the formula
-        # doesn't hold upon.
-        # iterating over all model, till finding model which the formula
-        # doesn't hold upon.
-        for model in all_models(list(formula.variables())):
-            if not evaluate(formula, model):
-                return model
+    deadline = None if timeout is None else time.monotonic() + timeout
+    # a model of ~formula is a counterexample, and if there is none, the
+    # branches of the search for it are the branches of the proof. the search
+    # is on the conjuncts of ~formula, so that it can tell which variables
+    # they force, and ~formula is False wherever one of them is
+    result = model_or_refutation(conjuncts(Formula('~', formula)),
+                                 frozendict(), deadline)
+    if isinstance(result, frozendict):
+        # the variables that were not needed can have any value
+        return {var: result.get(var, False) for var in formula.variables()}
+    if max_lines is not None:
+        lines = shape_size(tautology_refutation_proof_shape(
+            formula, result, frozendict(), variable_bits(formula)))
+        if lines > max_lines:
+            raise ProofTooLongError(max_lines, lines)
+    build = lambda: prove_tautology_from_refutation(
+        formula, result, frozendict(), [], max_lines, deadline)
+    if proof_store is not None:
+        # a proof of the same tautology up to renaming of variables is reused,
+        # but it may have been stored without a limit (or by another builder)
+        proof = proof_store.prove(InferenceRule([], formula), AXIOMATIC_SYSTEM,
+                                  build)
+        if max_lines is not None and len(proof.lines) > max_lines:
+            raise ProofTooLongError(max_lines, len(proof.lines))
+        return proof
+    return build()
 
 # lst is a union of assumptions and conclusion
 # this function returning the formula encode
 # meaning : (p1->(p2->(p3->(p4->q))))
+# (the chain must stay nested to the right, this is what the deduction
+#  theorem and the proofs over it rely on)
 def encode_helper(lst):
-    if len(lst) > 1:
-        return Formula('->', lst[0], encode_helper(lst[1:]))
-    return lst[0]
+    return join_formulas('->', lst, 'right')
 
 def encode_as_formula(rule: InferenceRule) -> Formula:
     """Encodes the given inference rule as a formula consisting of a chain of
@@ -300,16 +916,25 @@ def encode_as_formula(rule: InferenceRule) -> Formula:
     return encode_helper(union_assumptions_conclusion)
 
 
-def prove_sound_inference(rule: InferenceRule) -> Proof:
+def prove_sound_inference(rule: InferenceRule, workers: int = 1,
+                          max_lines: Optional[int] = None) -> Proof:
     """Proves the given sound inference rule.
 
     Parameters:
         rule: sound inference rule whose assumptions and conclusion that contain
             no constants or operators beyond ``'->'`` and ``'~'``, to prove.
+        workers: number of processes in which to prove the tautology that
+            encodes the given rule, see `prove_tautology`.
+        max_lines: the maximal number of lines of the proof, or ``None`` for
+            no limit.
 
     Returns:
         A valid assumptionless proof of the given sound inference rule via
         `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM`.
+
+    Raises:
+        ProofTooLongError: if the proof would have more than `max_lines`
+            lines, which is computed before any line is built.
     """
     assert is_sound_inference(rule)
     for formula in rule.assumptions + (rule.conclusion,):
@@ -318,8 +943,16 @@ def prove_sound_inference(rule: InferenceRule) -> Proof:
     # rules AXIOMATIC_SYSTEM
     statement  = rule
     encoded_formula = encode_as_formula(rule) # = (p1->(p2->(p3->(p4->q))))
+    if max_lines is not None:
+        # the proof of the encoded formula, and two lines per assumption
+        lines = shape_size(tautology_proof_shape(
+            encoded_formula, frozendict(), variable_bits(encoded_formula))) + \
+            2 * len(rule.assumptions)
+        if lines > max_lines:
+            raise ProofTooLongError(max_lines, lines)
     # all lines = proof where the last line is : (p1->(p2->(p3->(p4->q))))
-    all_lines = list(prove_tautology(encode_as_formula(rule), {}).lines)
+    all_lines = list(prove_tautology(encode_as_formula(rule), {},
+                                     workers).lines)
     # using MP number of times and len(assumption) would get us q
     # running on assumption p1 and than p2, ....p4
     for assumption in rule.assumptions:
@@ -344,21 +977,248 @@ def prove_sound_inference(rule: InferenceRule) -> Proof:
 
 
 
-def model_or_inconsistency(formulae: List[Formula]) -> Union[Model, Proof]:
+# a refutation of formulae in a partial model: either the index of a formula
+# that is False in the model, or a triple of a variable that is not in the
+# model, and of the refutations in the model extended with that variable
+# True and with it False
+Refutation = Union[int, Tuple[str, 'Refutation', 'Refutation']]
+
+def model_or_refutation(formulae: List[Formula], model: frozendict,
+                        deadline: Optional[float] = None) -> \
+        Union[frozendict, Refutation]:
+    """Searches for an extension of the given partial model in which all the
+    given formulae hold, by branching on one variable at a time, and records
+    the branches in which none was found as a tree-like resolution refutation.
+
+    Parameters:
+        formulae: formulae that use only the operators ``'->'`` and ``'~'``, to
+            find a model for.
+        model: partial model to extend.
+        deadline: the value of `time.monotonic` by which to be done, or
+            ``None`` for no limit.
+
+    Returns:
+        A partial model that extends the given one, in which all the given
+        formulae are ``True`` (see
+        `~propositions.semantics.evaluate_in_partial_model`), if there is one,
+        otherwise a refutation of the given formulae in the given model.
+
+    Raises:
+        TimeoutError: if the deadline passed.
+    """
+    check_deadline(deadline)
+    undetermined = list()
+    for index, formula in enumerate(formulae):
+        value = evaluate_in_partial_model(formula, model)
+        if value is False:
+            return index
+        if value is None:
+            undetermined.append(formula)
+    if len(undetermined) == 0:
+        return model
+    var, value = choose_branch(undetermined, model)
+    first = model_or_refutation(formulae, model.set(var, value), deadline)
+    if isinstance(first, frozendict):
+        return first
+    second = model_or_refutation(formulae, model.set(var, not value),
+                                 deadline)
+    if isinstance(second, frozendict):
+        return second
+    if value:
+        return var, first, second
+    return var, second, first
+
+def choose_branch(formulae: List[Formula], model: frozendict) -> \
+        Tuple[str, bool]:
+    # prefers a variable with a value that makes one of the formulae False,
+    # whose branch is then refuted right away (that is, unit propagation),
+    # otherwise takes a variable of the formula with the fewest variables
+    # that are not in the model yet
+    best = None
+    for formula in formulae:
+        free = sorted(var for var in formula.variables() if var not in model)
+        for var in free:
+            for value in (True, False):
+                if evaluate_in_partial_model(formula,
+                                             model.set(var, value)) is False:
+                    return var, value
+        if best is None or len(free) < len(best):
+            best = free
+    return best[0], True
+
+def prove_refutation(formulae: List[Formula], refutation: Refutation,
+                     model: Model, decisions: List[Formula]) -> Proof:
+    """Converts the given refutation into a proof of ``'~(p->p)'``.
+
+    Parameters:
+        formulae: formulae that use only the operators ``'->'`` and ``'~'``.
+        refutation: refutation of the given formulae in the given model.
+        model: partial model.
+        decisions: the formulae that capture the given model, in the order in
+            which its variables were branched on.
+
+    Returns:
+        A valid proof of ``'~(p->p)'`` from the given formulae followed by the
+        given decisions, via
+        `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM`.
+    """
+    if isinstance(refutation, int):
+        # the formula f is False in the model, so ~f is proven from the model
+        # and with the assumption f, I2 gives (f->~(p->p)) and then ~(p->p).
+        # the four lines are appended as they are, even if some formula is
+        # already justified (e.g., if f is ~(p->p)), so that the proof has
+        # the shape that refutation_proof_shape computes
+        formula = formulae[refutation]
+        lines = list(prove_in_partial_model(formula, model).lines)
+        not_formula_line = len(lines) - 1
+        conditional = Formula('->', formula, FALSE)
+        lines.append(Proof.Line(formula))
+        lines.append(Proof.Line(
+            Formula('->', Formula('~', formula), conditional), I2, ()))
+        lines.append(Proof.Line(conditional, MP,
+                                (not_formula_line, not_formula_line + 2)))
+        lines.append(Proof.Line(FALSE, MP,
+                                (not_formula_line + 1, not_formula_line + 3)))
+        return Proof(InferenceRule(list(formulae) + decisions, FALSE),
+                     AXIOMATIC_SYSTEM, lines)
+    # a resolution on var, which is what R does in reduce_assumption
+    var, if_true, if_false = refutation
+    model = frozendict(model)
+    proof1 = prove_refutation(formulae, if_true, model.set(var, True),
+                              decisions + [Formula(var)])
+    proof2 = prove_refutation(formulae, if_false, model.set(var, False),
+                              decisions + [Formula('~', Formula(var))])
+    return reduce_assumption(proof1, proof2)
+
+def prove_refutation_in_parallel(formulae: List[Formula],
+                                 refutation: Refutation, workers: int) -> \
+        Proof:
+    """Converts the given refutation into a proof of ``'~(p->p)'``, like
+    `prove_refutation`, but converts the branches of its top levels in a pool
+    of processes.
+
+    Parameters:
+        formulae: formulae that use only the operators ``'->'`` and ``'~'``.
+        refutation: refutation of the given formulae.
+        workers: number of processes to convert the branches in.
+
+    Returns:
+        The same proof as `prove_refutation`\ ``(``\ `formulae`\ ``,``
+        `refutation`\ ``, {}, [])``.
+    """
+    # 2**levels branches, at least one per process
+    levels = (workers - 1).bit_length()
+    with ProcessPoolExecutor(workers) as executor:
+        branches = submit_refutation_branches(executor, formulae, refutation,
+                                              frozendict(), [], levels)
+        return combine_branches(branches)
+
+def submit_refutation_branches(executor: ProcessPoolExecutor,
+                               formulae: List[Formula],
+                               refutation: Refutation, model: frozendict,
+                               decisions: List[Formula], levels: int) -> \
+        Branches:
+    # as submit_branches, but the branches are those of the refutation
+    if levels > 0 and not isinstance(refutation, int):
+        var, if_true, if_false = refutation
+        return (submit_refutation_branches(
+                    executor, formulae, if_true, model.set(var, True),
+                    decisions + [Formula(var)], levels - 1),
+                submit_refutation_branches(
+                    executor, formulae, if_false, model.set(var, False),
+                    decisions + [Formula('~', Formula(var))], levels - 1))
+    return executor.submit(prove_refutation, formulae, refutation,
+                           dict(model), decisions)
+
+def conjuncts(formula: Formula) -> List[Formula]:
+    # ~(a->b) is a and ~b, and ~~a is a
+    if formula.root == '~' and formula.first.root == '->':
+        return conjuncts(formula.first.first) + \
+               conjuncts(Formula('~', formula.first.second))
+    if formula.root == '~' and formula.first.root == '~':
+        return conjuncts(formula.first.first)
+    return [formula]
+
+def prove_tautology_from_refutation(tautology: Formula,
+                                    refutation: Refutation, model: Model,
+                                    decisions: List[Formula],
+                                    max_lines: Optional[int] = None,
+                                    deadline: Optional[float] = None) -> \
+        Proof:
+    """Proves the given tautology by branching on the variables as the given
+    refutation of its negation does.
+
+    Parameters:
+        tautology: tautology that contains no constants or operators beyond
+            ``'->'`` and ``'~'``, to prove.
+        refutation: refutation of ``'~``\ `tautology`\ ``'``, or of its
+            conjuncts, in the given model.
+        model: partial model.
+        decisions: the formulae that capture the given model, in the order in
+            which its variables were branched on.
+        max_lines: the maximal number of lines of the proof, or ``None`` for
+            no limit.
+        deadline: the value of `time.monotonic` by which to be done, or
+            ``None`` for no limit.
+
+    Returns:
+        A valid proof of the given tautology from the given decisions, via
+        `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM`.
+
+    Raises:
+        ProofTooLongError: if the proof would have more than `max_lines`
+            lines.
+        TimeoutError: if the deadline passed.
+    """
+    check_deadline(deadline)
+    if isinstance(refutation, int):
+        # ~tautology (or one of its conjuncts) is False in the model, so the
+        # tautology is True in it
+        proof = restate(prove_in_partial_model(tautology, model), decisions)
+    else:
+        # as in prove_tautology, but the variable is the one that the
+        # refutation branched on, and the branches are no deeper than its
+        var, if_true, if_false = refutation
+        model = frozendict(model)
+        proof = reduce_assumption(
+            prove_tautology_from_refutation(
+                tautology, if_true, model.set(var, True),
+                decisions + [Formula(var)], max_lines, deadline),
+            prove_tautology_from_refutation(
+                tautology, if_false, model.set(var, False),
+                decisions + [Formula('~', Formula(var))], max_lines,
+                deadline))
+    if max_lines is not None and len(proof.lines) > max_lines:
+        raise ProofTooLongError(max_lines, len(proof.lines))
+    return proof
+
+def model_or_inconsistency(formulae: List[Formula], workers: int = 1,
+                           max_lines: Optional[int] = None) -> \
+        Union[Model, Proof]:
     """Either finds a model in which all the given formulae hold, or proves
     ``'~(p->p)'`` from these formula.
 
     Parameters:
         formulae: formulae that use only the operators ``'->'`` and ``'~'``, to
             either find a model for or prove ``'~(p->p)'`` from.
+        workers: number of processes in which to prove ``'~(p->p)'`` if there
+            is no such model, see `prove_refutation_in_parallel`.
+        max_lines: the maximal number of lines of the proof, or ``None`` for
+            no limit.
 
     Returns:
         A model in which all of the given formulae hold if such exists,
         otherwise a proof of '~(p->p)' from the given formulae via
         `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM`.
+
+    Raises:
+        ProofTooLongError: if there is no such model, and the proof would have
+            more than `max_lines` lines, which is computed from the refutation
+            that was found before any line is built.
     """
     for formula in formulae:
         assert formula.operators().issubset({'->', '~'})
+    assert workers > 0
     # Task 6.5
 
     # all_var - union of all the variables in all of the formulas
@@ -367,20 +1227,23 @@ def model_or_inconsistency(formulae: List[Formula]) -> Union[Model, Proof]:
         for var in form.variables():
             all_var.add(var)
 
-    for model in all_models(list(all_var)):
-        for idx,form in enumerate(formulae):
-            if not evaluate(form, model):
-                break
-            # if got to the last formula, and it evaluate to true as well,
-            # than on this model all formula holds
-            if idx == len(formulae) - 1:
-                return model
-    # if got here, than there isn't a model on which all formula holds
-    # therefor, from False we can prove anything, even false things.
-    # therefor prove_sound_inference would give us a proof for False thing
-    # (because the assumption are False for every model)
-    # F -> anything even False
-    return prove_sound_inference(InferenceRule(formulae, Formula.parse("~(p->p)")))
+    # instead of going over all the models, search for one and keep the
+    # refutation of every branch in which none was found
+    result = model_or_refutation(formulae, frozendict())
+    if isinstance(result, frozendict):
+        # the variables that were not needed can have any value
+        return {var: result.get(var, False) for var in all_var}
+    # if got here, than there isn't a model on which all formula holds, and
+    # the refutation is turned into a proof of False (~(p->p)), with a size
+    # that depends on the size of the refutation rather than on 2^n
+    if max_lines is not None:
+        lines = shape_size(refutation_proof_shape(
+            formulae, result, frozendict(), variable_bits(*formulae)))
+        if lines > max_lines:
+            raise ProofTooLongError(max_lines, lines)
+    if workers > 1:
+        return prove_refutation_in_parallel(formulae, result, workers)
+    return prove_refutation(formulae, result, frozendict(), [])
 
 def prove_in_model_full(formula: Formula, model: Model) -> Proof:
     """Either proves the given formula or proves its negation, from the formulae
@@ -389,7 +1252,10 @@ def prove_in_model_full(formula: Formula, model: Model) -> Proof:
     Parameters:
         formula: formula that contains no operators beyond ``'->'``, ``'~'``,
             ``'&'``, and ``'|'``, whose affirmation or negation is to prove.
-        model: model from whose formulae to prove.
+        model: model from whose formulae to prove. The model may also be
+            defined over only some of the variables of the formula, as long as
+            it determines its truth value, see
+            `~propositions.semantics.evaluate_in_partial_model`.
 
     Returns:
         If the given formula evaluates to ``True`` in the given model, then
@@ -401,3 +1267,40 @@ def prove_in_model_full(formula: Formula, model: Model) -> Proof:
     assert formula.operators().issubset({'T', 'F', '->', '~', '&', '|'})
     assert is_model(model)
     # Optional Task 6.6
+    # as in prove_in_model, the proofs of the subformulae are memoized, and
+    # there are more cases for the constants and the operators & and |
+    proof = prove_in_partial_model(formula, model, AXIOMATIC_SYSTEM_FULL)
+    return restate(proof, formulae_capturing_model(model),
+                   AXIOMATIC_SYSTEM_FULL)
+
+def prove_tautology_full(tautology: Formula, model: Model = frozendict()) -> \
+        Proof:
+    """Proves the given tautology from the formulae that capture the given
+    model, like `prove_tautology`, but natively for the constants and the
+    operators ``'&'`` and ``'|'`` (rather than after converting them into
+    ``'->'`` and ``'~'``, which would make the tautology larger).
+
+    Parameters:
+        tautology: tautology that contains no operators beyond ``'->'``,
+            ``'~'``, ``'&'``, and ``'|'``, to prove.
+        model: model over a (possibly empty) prefix (with respect to the
+            alphabetical order) of the variables of `tautology`, from whose
+            formulae to prove.
+
+    Returns:
+        A valid proof of the given tautology from the formulae that capture the
+        given model, in the order returned by
+        `formulae_capturing_model`\ ``(``\ `model`\ ``)``, via
+        `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM_FULL`.
+    """
+    assert is_tautology(tautology)
+    assert tautology.operators().issubset({'T', 'F', '->', '~', '&', '|'})
+    assert is_model(model)
+    assert sorted(tautology.variables())[:len(model)] == sorted(model.keys())
+    if proof_store is not None and len(model) == 0:
+        # a proof of the same tautology up to renaming of variables is reused
+        return proof_store.prove(
+            InferenceRule([], tautology), AXIOMATIC_SYSTEM_FULL,
+            lambda: prove_tautology_helper(tautology, model,
+                                           AXIOMATIC_SYSTEM_FULL))
+    return prove_tautology_helper(tautology, model, AXIOMATIC_SYSTEM_FULL)
@@ -68,12 +68,13 @@ class Model(Generic[T]):
                 argument n-tuple (of universe elements) to a universe element
                 that the function is to output given these arguments.
         """
-        self.universe = frozenset(universe)
+        object.__setattr__(self, 'universe', frozenset(universe))
 
         for constant in constant_meanings:
             assert is_constant(constant)
             assert constant_meanings[constant] in universe
-        self.constant_meanings = frozendict(constant_meanings)
+        object.__setattr__(self, 'constant_meanings',
+                           frozendict(constant_meanings))
 
         relation_arities = {}
         for relation in relation_meanings:
@@ -89,10 +90,11 @@ class Model(Generic[T]):
                     for argument in arguments:
                         assert argument in universe
             relation_arities[relation] = arity
-        self.relation_meanings = \
+        object.__setattr__(self, 'relation_meanings',
             frozendict({relation: frozenset(relation_meanings[relation]) for
-                        relation in relation_meanings})
-        self.relation_arities = frozendict(relation_arities)
+                        relation in relation_meanings}))
+        object.__setattr__(self, 'relation_arities',
+                           frozendict(relation_arities))
 
         function_arities = {}
         for function in function_meanings:
@@ -109,10 +111,11 @@ class Model(Generic[T]):
                     assert argument in universe
                 assert function_meaning[arguments] in universe
             function_arities[function] = arity
-        self.function_meanings = \
+        object.__setattr__(self, 'function_meanings',
             frozendict({function: frozendict(function_meanings[function]) for
-                        function in function_meanings})
-        self.function_arities = frozendict(function_arities)
+                        function in function_meanings}))
+        object.__setattr__(self, 'function_arities',
+                           frozendict(function_arities))
 
     def __repr__(self) -> str:
         """Computes a string representation of the current model.
@@ -6,7 +6,8 @@
 """Syntactic handling of first-order formulas and terms."""
 
 from __future__ import annotations
-from typing import AbstractSet, Mapping, Optional, Sequence, Set, Tuple, Union
+from typing import AbstractSet, Iterable, Mapping, Optional, Sequence, Set, \
+    Tuple, Union
 
 from logic_utils import fresh_variable_name_generator, frozen
 
@@ -94,12 +95,12 @@ class Term:
         """
         if is_constant(root) or is_variable(root):
             assert arguments is None
-            self.root = root
+            object.__setattr__(self, 'root', root)
         else:
             assert is_function(root)
             assert arguments is not None
-            self.root = root
-            self.arguments = tuple(arguments)
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'arguments', tuple(arguments))
             assert len(self.arguments) > 0
 
     def __repr__(self) -> str:
@@ -414,29 +415,34 @@ class Formula:
             assert second_or_predicate is None
             assert isinstance(arguments_or_first_or_variable, Sequence) and \
                    not isinstance(arguments_or_first_or_variable, str)
-            self.root, self.arguments = \
-                root, tuple(arguments_or_first_or_variable)
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'arguments',
+                               tuple(arguments_or_first_or_variable))
             if is_equality(root):
                 assert len(self.arguments) == 2
         elif is_unary(root):
             # Populate self.first
             assert isinstance(arguments_or_first_or_variable, Formula) and \
                    second_or_predicate is None
-            self.root, self.first = root, arguments_or_first_or_variable
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'first', arguments_or_first_or_variable)
         elif is_binary(root):
             # Populate self.first and self.second
             assert isinstance(arguments_or_first_or_variable, Formula) and \
                    second_or_predicate is not None
-            self.root, self.first, self.second = \
-                root, arguments_or_first_or_variable, second_or_predicate           
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'first', arguments_or_first_or_variable)
+            object.__setattr__(self, 'second', second_or_predicate)
         else:
             assert is_quantifier(root)
             # Populate self.variable and self.predicate
             assert isinstance(arguments_or_first_or_variable, str) and \
                    is_variable(arguments_or_first_or_variable) and \
                    second_or_predicate is not None
-            self.root, self.variable, self.predicate = \
-                root, arguments_or_first_or_variable, second_or_predicate
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'variable',
+                               arguments_or_first_or_variable)
+            object.__setattr__(self, 'predicate', second_or_predicate)
 
     def __repr__(self) -> str:
         """Computes the string representation of the current formula.
@@ -848,3 +854,91 @@ class Formula:
         for key in substitution_map:
             assert is_propositional_variable(key)
         # Task 9.10
+
+
+def join_formulas(operator: str, formulas: Iterable[Formula],
+                  shape: str = 'balanced') -> Formula:
+    """Joins the given formulas, in order, with the given binary operator.
+
+    Parameters:
+        operator: binary operator to join the formulas with.
+        formulas: nonempty formulas to join.
+        shape: ``'left'`` for a chain nested to the left, e.g.,
+            ``((f1&f2)&f3)``, ``'right'`` for a chain nested to the right,
+            e.g., ``(f1&(f2&f3))``, or ``'balanced'`` for a tree whose depth
+            is logarithmic in the number of formulas, e.g.,
+            ``((f1&f2)&(f3&f4))``.
+
+    Returns:
+        The joined formula, or the single given formula if only one is given.
+
+    Examples:
+        >>> join_formulas('->', [Formula('R', []), Formula('Q', []),
+        ...                      Formula('S', [])], 'right')
+        (R()->(Q()->S()))
+    """
+    assert is_binary(operator)
+    assert shape in ('balanced', 'left', 'right')
+    formulas = tuple(formulas)
+    assert len(formulas) > 0
+    if shape == 'left':
+        joined = formulas[0]
+        for formula in formulas[1:]:
+            joined = Formula(operator, joined, formula)
+        return joined
+    if shape == 'right':
+        joined = formulas[-1]
+        for formula in reversed(formulas[:-1]):
+            joined = Formula(operator, formula, joined)
+        return joined
+    return join_balanced_helper(operator, formulas, 0, len(formulas))
+
+
+# join formulas[start:end] by splitting it in the middle, so the recursion is
+# only as deep as the returned formula
+def join_balanced_helper(operator, formulas, start, end):
+    if end - start == 1:
+        return formulas[start]
+    middle = (start + end) // 2
+    return Formula(operator,
+                   join_balanced_helper(operator, formulas, start, middle),
+                   join_balanced_helper(operator, formulas, middle, end))
+
+
+def conjoin(formulas: Iterable[Formula], shape: str = 'balanced') -> Formula:
+    """Computes the conjunction of the given formulas.
+
+    Parameters:
+        formulas: nonempty formulas to conjoin.
+        shape: the nesting of the conjunction, as in `join_formulas`.
+
+    Returns:
+        The conjunction of the given formulas.
+
+    Examples:
+        >>> conjoin([Formula('R', []), Formula('Q', []), Formula('S', []),
+        ...          Formula('T', [])])
+        ((R()&Q())&(S()&T()))
+        >>> conjoin([Formula('R', []), Formula('Q', []), Formula('S', [])],
+        ...         'left')
+        ((R()&Q())&S())
+    """
+    return join_formulas('&', formulas, shape)
+
+
+def disjoin(formulas: Iterable[Formula], shape: str = 'balanced') -> Formula:
+    """Computes the disjunction of the given formulas.
+
+    Parameters:
+        formulas: nonempty formulas to disjoin.
+        shape: the nesting of the disjunction, as in `join_formulas`.
+
+    Returns:
+        The disjunction of the given formulas.
+
+    Examples:
+        >>> disjoin([Formula('R', []), Formula('Q', []), Formula('S', [])],
+        ...         'right')
+        (R()|(Q()|S()))
+    """
+    return join_formulas('|', formulas, shape)
@@ -457,17 +457,15 @@ def replace_equality_with_SAME_in_formulas(formulas: AbstractSet[Formula]) -> \
     relations = list(relations)
     for relation in relations:
         args1 = list(); args2 = list()
-        same = None
+        sames = list()
         for i in range(relation[1]):
             xi = Term("x"+str(i+1))
             yi = Term("y"+str(i+1))
             args1.append(xi)
             args2.append(yi)
-            same_xi_yi = Formula('SAME', (xi, yi))
-            if same is not None:
-                same = Formula('&', same, same_xi_yi)
-            else:
-                same = same_xi_yi
+            sames.append(Formula('SAME', (xi, yi)))
+        # balanced, so that relations of large arities stay shallow
+        same = conjoin(sames)
         relation_formula = Formula('->', Formula(relation[0], args1),
                                    Formula(relation[0], args2))
         # same (x1,...,xn), (y1,...,yn) -> relation(x1,...,xn) -> relation(y1,...,yn)
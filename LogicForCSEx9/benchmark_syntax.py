@@ -0,0 +1,89 @@
+"""Measures the memory taken by each node of propositional and first-order
+formula trees, and the speed of the main traversals over them.
+
+Run from the root of the code tree (next to logic_utils.py and the
+propositions and predicates packages):
+
+    python benchmark_syntax.py
+"""
+
+import sys
+import timeit
+import tracemalloc
+
+from propositions.syntax import Formula as PropositionalFormula
+from predicates.syntax import Formula, Term
+
+DEPTH = 10
+NUMBER = 20
+
+def propositional_tree(depth: int, index: int = 0) -> PropositionalFormula:
+    if depth == 0:
+        return PropositionalFormula('p' + str(index))
+    if depth % 3 == 0:
+        return PropositionalFormula('~', propositional_tree(depth - 1, index))
+    return PropositionalFormula('->' if depth % 2 else '&',
+                                propositional_tree(depth - 1, 2 * index),
+                                propositional_tree(depth - 1, 2 * index + 1))
+
+def predicate_tree(depth: int, index: int = 0) -> Formula:
+    if depth == 0:
+        if index % 2:
+            return Formula('=', [Term('x' + str(index)), Term('c')])
+        return Formula('R', [Term('f', [Term('x' + str(index)), Term('c')])])
+    if depth % 4 == 0:
+        return Formula('A', 'x' + str(index),
+                       predicate_tree(depth - 1, index))
+    if depth % 3 == 0:
+        return Formula('~', predicate_tree(depth - 1, index))
+    return Formula('->' if depth % 2 else '&',
+                   predicate_tree(depth - 1, 2 * index),
+                   predicate_tree(depth - 1, 2 * index + 1))
+
+def count_nodes(node) -> int:
+    count = 1
+    for child in (getattr(node, 'first', None), getattr(node, 'second', None),
+                  getattr(node, 'predicate', None)):
+        if child is not None:
+            count += count_nodes(child)
+    for argument in getattr(node, 'arguments', None) or ():
+        count += count_nodes(argument)
+    return count
+
+def bytes_per_node(build) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tree = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / count_nodes(tree)
+
+def report(name: str, statement) -> None:
+    best = min(timeit.repeat(statement, number=NUMBER, repeat=5))
+    print('%-32s %9.3f msec' % (name, best / NUMBER * 1e3))
+
+def main() -> None:
+    sys.setrecursionlimit(10000)
+    print('%-32s %9.1f bytes' % (
+        'propositional bytes/node',
+        bytes_per_node(lambda: propositional_tree(DEPTH))))
+    print('%-32s %9.1f bytes' % (
+        'first-order bytes/node',
+        bytes_per_node(lambda: predicate_tree(DEPTH))))
+    propositional = propositional_tree(DEPTH)
+    predicate = predicate_tree(DEPTH)
+    substitution = {'p0': PropositionalFormula.parse('(q&r)')}
+    term_substitution = {'c': Term.parse('g(d)')}
+    report('propositional repr', lambda: repr(propositional))
+    report('propositional variables', lambda: propositional.variables())
+    report('propositional operators', lambda: propositional.operators())
+    report('propositional substitute',
+           lambda: propositional.substitute_variables(substitution))
+    report('first-order repr', lambda: repr(predicate))
+    report('first-order free_variables', lambda: predicate.free_variables())
+    report('first-order constants', lambda: predicate.constants())
+    report('first-order substitute',
+           lambda: predicate.substitute(term_substitution))
+
+if __name__ == '__main__':
+    main()
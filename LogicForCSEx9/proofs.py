@@ -7,7 +7,7 @@
 
 from __future__ import annotations
 from typing import AbstractSet, Iterable, FrozenSet, List, Mapping, Optional, \
-                   Set, Tuple, Union
+                   Sequence, Set, Tuple, Union
 
 from logic_utils import frozen
 
@@ -15,6 +15,95 @@ from propositions.syntax import *
 
 SpecializationMap = Mapping[str, Formula]
 
+# Instructions of a compiled matcher program, see `compile_matcher`
+MATCH_ROOT = 0  # the formula must have the given root, its operands are next
+BIND = 1        # first occurrence of a variable - bind the formula to its slot
+CHECK = 2       # later occurrence - the formula must equal the bound one
+
+Matcher = Tuple[Tuple[Tuple[int, Union[str, int]], ...], Tuple[str, ...]]
+
+def compile_matcher(formulas: Sequence[Formula]) -> Matcher:
+    """Compiles the given general formulae into a matcher program, which
+    checks in a single pass whether a sequence of formulae specializes them.
+
+    Parameters:
+        formulas: the general formulae, in order.
+
+    Returns:
+        A pair of a flat tuple of ``(instruction, argument)`` pairs, one per
+        node of the given formulae in preorder, and of the variable names in
+        the order of their slots.
+    """
+    program = list()
+    variables = list()
+    slots = dict()
+    stack = list(reversed(formulas))
+    while len(stack) > 0:
+        formula = stack.pop()
+        if formula.opcode == OP_VARIABLE:
+            slot = slots.get(formula.root)
+            if slot is None:
+                slot = slots[formula.root] = len(variables)
+                variables.append(formula.root)
+                program.append((BIND, slot))
+            else:
+                program.append((CHECK, slot))
+        else:
+            program.append((MATCH_ROOT, formula.root))
+            if formula.second is not None:
+                stack.append(formula.second)
+            if formula.first is not None:
+                stack.append(formula.first)
+    return tuple(program), tuple(variables)
+
+def run_matcher(matcher: Matcher, formulas: Sequence[Formula]) -> \
+        Union[SpecializationMap, None]:
+    """Runs the given matcher program over the given formulae.
+
+    Parameters:
+        matcher: matcher program compiled by `compile_matcher` from as many
+            general formulae as given here.
+        formulas: the candidate specializations of the general formulae.
+
+    Returns:
+        The minimal specialization map by which the general formulae
+        specialize to the given ones, or ``None`` if they do not.
+    """
+    program, variables = matcher
+    bindings = [None] * len(variables)
+    stack = list(reversed(formulas))
+    for instruction, argument in program:
+        formula = stack.pop()
+        if instruction == MATCH_ROOT:
+            # equal roots take the same number of operands, so the stack stays
+            # aligned with the program
+            if formula.root != argument:
+                return None
+            if formula.second is not None:
+                stack.append(formula.second)
+            if formula.first is not None:
+                stack.append(formula.first)
+        elif instruction == BIND:
+            bindings[argument] = formula
+        elif not same_formula(bindings[argument], formula):
+            return None
+    return dict(zip(variables, bindings))
+
+# structural equality of the two formulae, without computing their strings
+def same_formula(formula1: Formula, formula2: Formula) -> bool:
+    stack = [(formula1, formula2)]
+    while len(stack) > 0:
+        formula1, formula2 = stack.pop()
+        if formula1 is formula2:
+            continue
+        if formula1.root != formula2.root:
+            return False
+        if formula1.first is not None:
+            stack.append((formula1.first, formula2.first))
+        if formula1.second is not None:
+            stack.append((formula1.second, formula2.second))
+    return True
+
 @frozen
 class InferenceRule:
     """An immutable inference rule in propositional logic, comprised by zero
@@ -28,6 +117,7 @@ class InferenceRule:
     """
     assumptions: Tuple[Formula, ...]
     conclusion: Formula
+    _matcher: Matcher
 
     def __init__(self, assumptions: Iterable[Formula], conclusion: Formula) -> \
         None:
@@ -37,8 +127,8 @@ class InferenceRule:
             assumptions: the assumptions for the rule.
             conclusion: the conclusion for the rule.
         """
-        self.assumptions = tuple(assumptions)
-        self.conclusion = conclusion
+        object.__setattr__(self, 'assumptions', tuple(assumptions))
+        object.__setattr__(self, 'conclusion', conclusion)
 
     def __eq__(self, other: object) -> bool:
         """Compares the current inference rule with the given one.
@@ -178,31 +268,9 @@ class InferenceRule:
             The computed specialization map, or ``None`` if `specialization` is
             in fact not a specialization of `general`.
         """
-        # general.root is a constant check if specialized root is same constant
-        if is_constant(general.root) and is_constant(specialization.root):
-            if general.root == specialization.root:
-                return {}
-            # else, the constants aren't equal
-            return None
-
-        # general.root is a variable
-        if is_variable(general.root):
-            return {general.root: specialization}
-
-        # general.root is an unary operation
-        if is_unary(general.root) and is_unary(specialization.root) and \
-                general.root == specialization.root:
-            return InferenceRule.formula_specialization_map(general.first, specialization.first)
-
-        # general.root is a binary operation
-        if is_binary(general.root) and is_binary(specialization.root) and \
-                general.root == specialization.root:
-            map1 = InferenceRule.formula_specialization_map(general.first, specialization.first)
-            map2 = InferenceRule.formula_specialization_map(general.second, specialization.second)
-            return InferenceRule.merge_specialization_maps(map1, map2)
-
-        # else, no fitting between the two formulae
-        return None
+        # a single pass over the specialization, binding the variables of
+        # general as they occur
+        return run_matcher(compile_matcher((general,)), (specialization,))
         # Task 4.5b
 
     def specialization_map(self, specialization: InferenceRule) -> \
@@ -217,30 +285,43 @@ class InferenceRule:
             The computed specialization map, or ``None`` if `specialization` is
             in fact not a specialization of the current rule.
         """
-        assumptions = self.assumptions
-        s_assumptions = specialization.assumptions
+        return self.match(specialization.assumptions, specialization.conclusion)
+        # Task 4.5c
+
+    def matcher(self) -> Matcher:
+        """Returns the matcher program of the current inference rule, compiling
+        it on first use.
+
+        Returns:
+            The program compiled by `compile_matcher` from the assumptions and
+            then the conclusion of the current inference rule.
+        """
+        try:
+            return self._matcher
+        except AttributeError:
+            matcher = compile_matcher(self.assumptions + (self.conclusion,))
+            object.__setattr__(self, '_matcher', matcher)
+            return matcher
+
+    def match(self, assumptions: Sequence[Formula], conclusion: Formula) -> \
+            Union[SpecializationMap, None]:
+        """Computes the minimal specialization map by which the current
+        inference rule specializes to the inference rule with the given
+        assumptions and conclusion, without constructing that rule.
+
+        Parameters:
+            assumptions: the assumptions of the specialization, in order.
+            conclusion: the conclusion of the specialization.
+
+        Returns:
+            The computed specialization map, or ``None`` if the given
+            assumptions and conclusion are in fact not a specialization of the
+            current rule.
+        """
         # check if there is an equal number of assumptions in both rules
-        if len(assumptions) == len(s_assumptions):
-            specialization_map = {}
-            # go over all assumptions in the two inference rules and check if
-            # the s_assumption[i] is assumption[i] that was specialized
-            for i in range(len(assumptions)):
-                f_specialization_map = InferenceRule.formula_specialization_map(assumptions[i], s_assumptions[i])
-                specialization_map = InferenceRule.merge_specialization_maps(
-                        specialization_map, f_specialization_map)
-                if not specialization_map:  # the map is None
-                    return None
-
-            f_specialization_map = InferenceRule.formula_specialization_map(
-                self.conclusion, specialization.conclusion)
-            specialization_map = InferenceRule.merge_specialization_maps(specialization_map, f_specialization_map)
-
-            return specialization_map
-
-        else:  # different number of assumptions in the two inference rules
+        if len(self.assumptions) != len(assumptions):
             return None
-
-        # Task 4.5c
+        return run_matcher(self.matcher(), tuple(assumptions) + (conclusion,))
 
     def is_specialization_of(self, general: InferenceRule) -> bool:
         """Checks if the current inference rule is a specialization of the given
@@ -268,7 +349,7 @@ class Proof:
             the proof.
         lines (`~typing.Tuple`\\[`Line`]): the lines of the proof.
     """
-    statment: InferenceRule
+    statement: InferenceRule
     rules: FrozenSet[InferenceRule]
     lines: Tuple[Proof.Line, ...]
 
@@ -283,9 +364,9 @@ class Proof:
             rules: the allowed rules for the proof.
             lines: the lines for the proof.
         """
-        self.statement = statement
-        self.rules = frozenset(rules)
-        self.lines = tuple(lines)
+        object.__setattr__(self, 'statement', statement)
+        object.__setattr__(self, 'rules', frozenset(rules))
+        object.__setattr__(self, 'lines', tuple(lines))
 
     @frozen
     class Line:
@@ -332,10 +413,10 @@ class Proof:
             """
             assert (rule is None and assumptions is None) or \
                    (rule is not None and assumptions is not None)
-            self.formula = formula
-            self.rule = rule
+            object.__setattr__(self, 'formula', formula)
+            object.__setattr__(self, 'rule', rule)
             if assumptions is not None:
-                self.assumptions = tuple(assumptions)
+                object.__setattr__(self, 'assumptions', tuple(assumptions))
 
         def __repr__(self) -> str:
             """Computes a string representation of the current proof line.
@@ -425,13 +506,14 @@ class Proof:
         """
         assert line_number < len(self.lines)
         line = self.lines[line_number]
-        line_rule = self.rule_for_line(line_number)
-        if line_rule:  # line_rule is an Inference rule
+        if not line.is_assumption():  # line is concluded by an Inference rule
             # check if the assumptions appear before the conclusion
             for assumption in line.assumptions:
                 if assumption >= line_number:
                     return False
-            return line_rule.is_specialization_of(line.rule) and line.rule in self.rules
+            assumptions = [self.lines[i].formula for i in line.assumptions]
+            return line.rule.match(assumptions, line.formula) is not None \
+                and line.rule in self.rules
         else:  # line is an assumption
             formula = line.formula
             if formula in self.statement.assumptions:
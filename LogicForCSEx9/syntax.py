@@ -6,7 +6,8 @@
 """Syntactic handling of first-order formulas and terms."""
 
 from __future__ import annotations
-from typing import AbstractSet, Mapping, Optional, Sequence, Set, Tuple, Union
+from typing import AbstractSet, Iterable, Mapping, Optional, Sequence, Set, \
+    Tuple, Union
 
 from logic_utils import fresh_variable_name_generator, frozen
 
@@ -14,6 +15,22 @@ from propositions.syntax import Formula as PropositionalFormula, \
     is_variable as is_propositional_variable
 
 
+# Opcodes of the kind of the root of a term or a formula, stored in every
+# `Term` and `Formula` so that traversals do not need to classify the root
+# string again
+OP_CONSTANT = 0
+OP_VARIABLE = 1
+OP_FUNCTION = 2
+OP_EQUALITY = 3
+OP_RELATION = 4
+OP_UNARY = 5
+OP_BINARY = 6
+OP_QUANTIFIER = 7
+
+# The opcode of every distinct root string seen so far, filled by `root_opcode`
+_root_opcodes = {}
+
+
 class ForbiddenVariableError(Exception):
     """Raised by `Term.substitute` and `Formula.substitute` when a substituted
     term contains a variable name that is forbidden in that context."""
@@ -75,6 +92,42 @@ def is_function(s: str) -> bool:
     return s[0] >= 'f' and s[0] <= 't' and s.isalnum()
 
 
+def root_opcode(s: str) -> Optional[int]:
+    """Classifies the given string as a root of a term or of a formula, caching
+    the result per distinct string.
+
+    Parameters:
+        s: string to classify.
+
+    Returns:
+        One of `OP_CONSTANT`, `OP_VARIABLE`, `OP_FUNCTION`, `OP_EQUALITY`,
+        `OP_RELATION`, `OP_UNARY`, `OP_BINARY` and `OP_QUANTIFIER`, or ``None``
+        if the given string is none of those.
+    """
+    opcode = _root_opcodes.get(s)
+    if opcode is None:
+        if is_constant(s):
+            opcode = OP_CONSTANT
+        elif is_variable(s):
+            opcode = OP_VARIABLE
+        elif is_function(s):
+            opcode = OP_FUNCTION
+        elif is_equality(s):
+            opcode = OP_EQUALITY
+        elif is_relation(s):
+            opcode = OP_RELATION
+        elif is_unary(s):
+            opcode = OP_UNARY
+        elif is_binary(s):
+            opcode = OP_BINARY
+        elif is_quantifier(s):
+            opcode = OP_QUANTIFIER
+        else:
+            return None
+        _root_opcodes[s] = opcode
+    return opcode
+
+
 """
 Helper function for task 9.1
 get a term, and return True if term contain illegal variable,
@@ -86,7 +139,7 @@ def check_if_term_contain_illegal_var(_term: Term,
                                       forbidden_variables: AbstractSet[str]
                                       = frozenset()):
     # if its function, check all the arguments of the function
-    if is_function(_term.root):
+    if _term.opcode == OP_FUNCTION:
         for _arg in _term.arguments:
             check_if_term_contain_illegal_var(_arg, forbidden_variables)
     else:
@@ -104,10 +157,14 @@ class Term:
         root (`str`): the constant name, variable name, or function name at the
             root of the term tree.
         arguments (`~typing.Optional`\\[`~typing.Tuple`\\[`Term`, ...]]): the
-            arguments to the root, if the root is a function name.
+            arguments to the root, if the root is a function name, ``None``
+            otherwise.
+        opcode (`int`): the kind of the root, one of `OP_CONSTANT`,
+            `OP_VARIABLE` and `OP_FUNCTION`.
     """
     root: str
     arguments: Optional[Tuple[Term, ...]]
+    opcode: int
 
     def __init__(self, root: str,
                  arguments: Optional[Sequence[Term]] = None) -> None:
@@ -118,14 +175,18 @@ class Term:
             arguments: the arguments to the root, if the root is a function
                 name.
         """
-        if is_constant(root) or is_variable(root):
+        opcode = root_opcode(root)
+        if opcode == OP_CONSTANT or opcode == OP_VARIABLE:
             assert arguments is None
-            self.root = root
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'arguments', None)
+            object.__setattr__(self, 'opcode', opcode)
         else:
-            assert is_function(root)
+            assert opcode == OP_FUNCTION
             assert arguments is not None
-            self.root = root
-            self.arguments = tuple(arguments)
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'arguments', tuple(arguments))
+            object.__setattr__(self, 'opcode', OP_FUNCTION)
             assert len(self.arguments) > 0
 
     def __repr__(self) -> str:
@@ -136,19 +197,16 @@ class Term:
         """
         # Task 7.1
         final_str = ""
-        if is_function(self.root):
+        if self.opcode == OP_FUNCTION:
             final_str += self.root
             final_str += "("
-            try:
-                for idx, term in enumerate(self.arguments):
-                    final_str += str(term)
-                    # avoid situation like f(a,) - meaning
-                    # if its the last arg, dont add ','
-                    if idx != len(self.arguments) - 1:
-                        final_str += ","
-                return final_str + ")"
-            except AttributeError:
-                pass
+            for idx, term in enumerate(self.arguments):
+                final_str += str(term)
+                # avoid situation like f(a,) - meaning
+                # if its the last arg, dont add ','
+                if idx != len(self.arguments) - 1:
+                    final_str += ","
+            return final_str + ")"
         else:
             return self.root
 
@@ -249,13 +307,11 @@ class Term:
         """
         # Task 7.5.1
         lst_of_constant = list()
-        if is_constant(self.root):
+        if self.opcode == OP_CONSTANT:
             lst_of_constant.append(self.root)
-        try:
+        elif self.opcode == OP_FUNCTION:
             for _term in self.arguments:
                 lst_of_constant += _term.constants()
-        except AttributeError:
-            pass
         return set(lst_of_constant)
 
     def variables(self) -> Set[str]:
@@ -266,13 +322,11 @@ class Term:
         """
         # Task 7.5.2
         lst_of_variable = list()
-        if is_variable(self.root):
+        if self.opcode == OP_VARIABLE:
             lst_of_variable.append(self.root)
-        try:
+        elif self.opcode == OP_FUNCTION:
             for _term in self.arguments:
                 lst_of_variable += _term.variables()
-        except AttributeError:
-            pass
         return set(lst_of_variable)
 
     def functions(self) -> Set[Tuple[str, int]]:
@@ -285,13 +339,10 @@ class Term:
         """
         # Task 7.5.3
         lst_of_functions = list()
-        if is_function(self.root):
+        if self.opcode == OP_FUNCTION:
             lst_of_functions.append((self.root, len(self.arguments),))
-        try:
             for _term in self.arguments:
                 lst_of_functions += _term.functions()
-        except AttributeError:
-            pass
         return set(lst_of_functions)
 
     def substitute(self, substitution_map: Mapping[str, Term],
@@ -332,9 +383,9 @@ class Term:
             assert is_variable(variable)
         # Task 9.1
         new_arg_lst = list()
-        if is_function(self.root):
+        if self.opcode == OP_FUNCTION:
             for idx, arg in enumerate(self.arguments):
-                if is_function(arg.root):
+                if arg.opcode == OP_FUNCTION:
                     new_arg_lst.append(arg.substitute(substitution_map,
                                                       forbidden_variables))
                 else:
@@ -464,6 +515,11 @@ class Formula:
             the root, if the root is a quantification.
         predicate (`~typing.Optional`\\[`Formula`]): the predicate quantified by
             the root, if the root is a quantification.
+        opcode (`int`): the kind of the root, one of `OP_EQUALITY`,
+            `OP_RELATION`, `OP_UNARY`, `OP_BINARY` and `OP_QUANTIFIER`.
+
+    Every field is populated, the fields that the root does not take are
+    ``None``.
     """
     root: str
     arguments: Optional[Tuple[Term, ...]]
@@ -471,6 +527,7 @@ class Formula:
     second: Optional[Formula]
     variable: Optional[str]
     predicate: Optional[Formula]
+    opcode: int
 
     def __init__(self, root: str,
                  arguments_or_first_or_variable: Union[Sequence[Term],
@@ -490,34 +547,42 @@ class Formula:
                 a binary operator; the predicate quantified by the root, if the
                 root is a quantification.
         """
-        if is_equality(root) or is_relation(root):
+        arguments = first = second = variable = predicate = None
+        opcode = root_opcode(root)
+        if opcode == OP_EQUALITY or opcode == OP_RELATION:
             # Populate self.root and self.arguments
             assert second_or_predicate is None
             assert isinstance(arguments_or_first_or_variable, Sequence) and \
                    not isinstance(arguments_or_first_or_variable, str)
-            self.root, self.arguments = \
-                root, tuple(arguments_or_first_or_variable)
-            if is_equality(root):
-                assert len(self.arguments) == 2
-        elif is_unary(root):
+            arguments = tuple(arguments_or_first_or_variable)
+            if opcode == OP_EQUALITY:
+                assert len(arguments) == 2
+        elif opcode == OP_UNARY:
             # Populate self.first
             assert isinstance(arguments_or_first_or_variable, Formula) and \
                    second_or_predicate is None
-            self.root, self.first = root, arguments_or_first_or_variable
-        elif is_binary(root):
+            first = arguments_or_first_or_variable
+        elif opcode == OP_BINARY:
             # Populate self.first and self.second
             assert isinstance(arguments_or_first_or_variable, Formula) and \
                    second_or_predicate is not None
-            self.root, self.first, self.second = \
-                root, arguments_or_first_or_variable, second_or_predicate
+            first = arguments_or_first_or_variable
+            second = second_or_predicate
         else:
-            assert is_quantifier(root)
+            assert opcode == OP_QUANTIFIER
             # Populate self.variable and self.predicate
             assert isinstance(arguments_or_first_or_variable, str) and \
-                   is_variable(arguments_or_first_or_variable) and \
-                   second_or_predicate is not None
-            self.root, self.variable, self.predicate = \
-                root, arguments_or_first_or_variable, second_or_predicate
+                   root_opcode(arguments_or_first_or_variable) == \
+                   OP_VARIABLE and second_or_predicate is not None
+            variable = arguments_or_first_or_variable
+            predicate = second_or_predicate
+        object.__setattr__(self, 'root', root)
+        object.__setattr__(self, 'arguments', arguments)
+        object.__setattr__(self, 'first', first)
+        object.__setattr__(self, 'second', second)
+        object.__setattr__(self, 'variable', variable)
+        object.__setattr__(self, 'predicate', predicate)
+        object.__setattr__(self, 'opcode', opcode)
 
     def __repr__(self) -> str:
         """Computes the string representation of the current formula.
@@ -527,13 +592,14 @@ class Formula:
         """
         # Task 7.2
         final_str = ""
-        if is_unary(self.root):
+        opcode = self.opcode
+        if opcode == OP_UNARY:
             return "~" + str(self.first)
-        elif is_binary(self.root):
+        elif opcode == OP_BINARY:
             return "(" + str(self.first) + self.root + str(self.second) + ")"
-        elif is_equality(self.root):
+        elif opcode == OP_EQUALITY:
             return str(self.arguments[0]) + "=" + str(self.arguments[1])
-        elif is_function(self.root) or is_relation(self.root):
+        elif opcode == OP_RELATION:
             final_str += self.root + "("
             for idx, arg in enumerate(self.arguments):
                 final_str += str(arg)
@@ -542,7 +608,7 @@ class Formula:
             final_str += ")"
             return final_str
         # if root is A or E
-        elif is_quantifier(self.root):
+        else:
             return self.root + self.variable + "[" + str(self.predicate) + "]"
 
     def __eq__(self, other: object) -> bool:
@@ -674,31 +740,25 @@ class Formula:
         """
         # Task 7.6.1
         set_of_constants = set()
-        if is_unary(self.root):
+        opcode = self.opcode
+        if opcode == OP_UNARY:
             for const in self.first.constants():
                 set_of_constants.add(const)
 
-        elif is_binary(self.root):
+        elif opcode == OP_BINARY:
             for const in self.first.constants():
                 set_of_constants.add(const)
             for const in self.second.constants():
                 set_of_constants.add(const)
 
-        elif is_relation(self.root) or is_equality(self.root):
+        elif opcode == OP_RELATION or opcode == OP_EQUALITY:
             for _term in self.arguments:
                 for const in _term.constants():
                     set_of_constants.add(const)
 
-        elif is_function(self.root):
-            for _term in self.arguments:
-                set_of_constants.add(_term.constants())
-
-        elif is_quantifier(self.root):
+        else:
             for const in self.predicate.constants():
                 set_of_constants.add(const)
-        else:
-            if is_constant(self.root):
-                set_of_constants.add(self.root)
         return set_of_constants
 
     def variables(self) -> Set[str]:
@@ -709,32 +769,26 @@ class Formula:
         """
         # Task 7.6.2
         set_of_variables = set()
-        if is_unary(self.root):
+        opcode = self.opcode
+        if opcode == OP_UNARY:
             for var in self.first.variables():
                 set_of_variables.add(var)
 
-        elif is_binary(self.root):
+        elif opcode == OP_BINARY:
             for var in self.first.variables():
                 set_of_variables.add(var)
             for var in self.second.variables():
                 set_of_variables.add(var)
 
-        elif is_relation(self.root) or is_equality(self.root):
+        elif opcode == OP_RELATION or opcode == OP_EQUALITY:
             for _term in self.arguments:
                 for var in _term.variables():
                     set_of_variables.add(var)
 
-        elif is_function(self.root):
-            for _term in self.arguments:
-                set_of_variables.add(_term.variables())
-
-        elif is_quantifier(self.root):
+        else:
             for var in self.predicate.variables():
                 set_of_variables.add(var)
             set_of_variables.add(self.variable)
-        else:
-            if is_variable(self.root):
-                set_of_variables.add(self.root)
 
         return set_of_variables
 
@@ -747,30 +801,25 @@ class Formula:
         """
         # Task 7.6.3
         lst_of_variables = set()
-        if is_quantifier(self.root):
+        opcode = self.opcode
+        if opcode == OP_QUANTIFIER:
             for var in self.predicate.free_variables():
                 lst_of_variables.add(var)
             # remove e.g Ax(Q(x,w)) - removing x as its not free var
             if self.variable in lst_of_variables:
                 lst_of_variables.remove(self.variable)
-        elif is_function(self.root):
-            for var in self.arguments:
-                lst_of_variables.add(var.variables())
-        elif is_binary(self.root):
+        elif opcode == OP_BINARY:
             for var in self.first.free_variables():
                 lst_of_variables.add(var)
             for var in self.second.free_variables():
                 lst_of_variables.add(var)
-        elif is_relation(self.root) or is_equality(self.root):
+        elif opcode == OP_RELATION or opcode == OP_EQUALITY:
             for _term in self.arguments:
                 for var in _term.variables():
                     lst_of_variables.add(var)
-        elif is_unary(self.root):
+        else:
             for var in self.first.free_variables():
                 lst_of_variables.add(var)
-        else:
-            if is_variable(self.root):
-                lst_of_variables.add(self.root)
 
         return lst_of_variables
 
@@ -784,30 +833,25 @@ class Formula:
         """
         # Task 7.6.4
         set_of_functions = set()
-        if is_unary(self.root):
+        opcode = self.opcode
+        if opcode == OP_UNARY:
             for func_tuple in self.first.functions():
                 set_of_functions.add(func_tuple)
 
-        elif is_binary(self.root):
+        elif opcode == OP_BINARY:
             for func_tuple in self.first.functions():
                 set_of_functions.add(func_tuple)
             for func_tuple in self.second.functions():
                 set_of_functions.add(func_tuple)
 
-        elif is_relation(self.root) or is_equality(self.root):
+        elif opcode == OP_RELATION or opcode == OP_EQUALITY:
             for _term in self.arguments:
                 for func_tuple in _term.functions():
                     set_of_functions.add(func_tuple)
 
-        elif is_function(self.root):
-            set_of_functions.add((self.root, len(self.arguments)))
-
-        elif is_quantifier(self.root):
+        else:
             for var in self.predicate.functions():
                 set_of_functions.add(var)
-        else:
-            if is_function(self.root):
-                set_of_functions.add((self.root, len(self.arguments)))
 
         return set_of_functions
 
@@ -821,26 +865,24 @@ class Formula:
         """
         # Task 7.6.5
         set_of_relations = set()
+        opcode = self.opcode
 
-        if is_relation(self.root):
+        if opcode == OP_RELATION:
             set_of_relations.add((self.root, len(self.arguments)))
 
-        elif is_unary(self.root):
+        elif opcode == OP_UNARY:
             for relations_tuple in self.first.relations():
                 set_of_relations.add(relations_tuple)
 
-        elif is_binary(self.root):
+        elif opcode == OP_BINARY:
             for relations_tuple in self.first.relations():
                 set_of_relations.add(relations_tuple)
             for relations_tuple in self.second.relations():
                 set_of_relations.add(relations_tuple)
 
-        elif is_quantifier(self.root):
+        elif opcode == OP_QUANTIFIER:
             for _relations in self.predicate.relations():
                 set_of_relations.add(_relations)
-        else:
-            if is_function(self.root):
-                set_of_relations.add((self.root, len(self.arguments)))
 
         return set_of_relations
 
@@ -889,7 +931,8 @@ class Formula:
         for variable in forbidden_variables:
             assert is_variable(variable)
         # Task 9.2
-        if is_relation(self.root) or is_equality(self.root):
+        opcode = self.opcode
+        if opcode == OP_RELATION or opcode == OP_EQUALITY:
             new_arg = list()
             for arg in self.arguments:
                 if arg.root in forbidden_variables:
@@ -906,7 +949,7 @@ class Formula:
                                               new_forbidden_var))
             return Formula(self.root, new_arg)
 
-        elif is_binary(self.root):
+        elif opcode == OP_BINARY:
             # add for forbidden var the Ax 0
             if var_of_quantifer is not None:
                 # recursively call first and second (first , binary_operator, second)
@@ -924,7 +967,7 @@ class Formula:
                                                      forbidden_variables),
                                self.second.substitute(substitution_map,
                                                       forbidden_variables))
-        elif is_unary(self.root):
+        elif opcode == OP_UNARY:
             # add for forbidden var the Ax 0
             if var_of_quantifer is not None:
                 # recursively call first and second (first , binary_operator, second)
@@ -940,7 +983,7 @@ class Formula:
 
         else:
             # must be quantifier (for example Ax(x=plus(x,0)))
-            assert is_quantifier(self.root)
+            assert opcode == OP_QUANTIFIER
             # creating new_forbidden_var in order to raise an error when :
             #  'variable occurrence that becomes bound when that term is
             #    substituted into the current formula'
@@ -972,7 +1015,7 @@ class Formula:
             substituted.
         """
         # Task 9.8
-        if not is_binary(self.root) and not is_unary(self.root):
+        if self.opcode != OP_BINARY and self.opcode != OP_UNARY:
             if mapping is not None:
                 # check if the formula was already seen, if so, don't remap it
                 if self in mapping.keys():
@@ -983,13 +1026,13 @@ class Formula:
             m = {new: self}
             # return propositional skeleton of the Formula
             return pf, m
-        if is_unary(self.root):
+        if self.opcode == OP_UNARY:
             # get the first's side propositional skeleton
             ps1 = Formula.propositional_skeleton(self.first, mapping)
             pf = PropositionalFormula(self.root, first=ps1[0])
             # return new propositional formula and the map
             return pf, ps1[1]
-        if is_binary(self.root):
+        if self.opcode == OP_BINARY:
             # get the first's side propositional skeleton
             ps1 = Formula.propositional_skeleton(self.first, mapping)
             if mapping is not None:
@@ -1039,3 +1082,90 @@ class Formula:
             return Formula(skeleton.root, Formula.from_propositional_skeleton(skeleton.first, substitution_map),
                            Formula.from_propositional_skeleton(skeleton.second, substitution_map))
 
+
+def join_formulas(operator: str, formulas: Iterable[Formula],
+                  shape: str = 'balanced') -> Formula:
+    """Joins the given formulas, in order, with the given binary operator.
+
+    Parameters:
+        operator: binary operator to join the formulas with.
+        formulas: nonempty formulas to join.
+        shape: ``'left'`` for a chain nested to the left, e.g.,
+            ``((f1&f2)&f3)``, ``'right'`` for a chain nested to the right,
+            e.g., ``(f1&(f2&f3))``, or ``'balanced'`` for a tree whose depth
+            is logarithmic in the number of formulas, e.g.,
+            ``((f1&f2)&(f3&f4))``.
+
+    Returns:
+        The joined formula, or the single given formula if only one is given.
+
+    Examples:
+        >>> join_formulas('->', [Formula('R', []), Formula('Q', []),
+        ...                      Formula('S', [])], 'right')
+        (R()->(Q()->S()))
+    """
+    assert is_binary(operator)
+    assert shape in ('balanced', 'left', 'right')
+    formulas = tuple(formulas)
+    assert len(formulas) > 0
+    if shape == 'left':
+        joined = formulas[0]
+        for formula in formulas[1:]:
+            joined = Formula(operator, joined, formula)
+        return joined
+    if shape == 'right':
+        joined = formulas[-1]
+        for formula in reversed(formulas[:-1]):
+            joined = Formula(operator, formula, joined)
+        return joined
+    return join_balanced_helper(operator, formulas, 0, len(formulas))
+
+
+# join formulas[start:end] by splitting it in the middle, so the recursion is
+# only as deep as the returned formula
+def join_balanced_helper(operator, formulas, start, end):
+    if end - start == 1:
+        return formulas[start]
+    middle = (start + end) // 2
+    return Formula(operator,
+                   join_balanced_helper(operator, formulas, start, middle),
+                   join_balanced_helper(operator, formulas, middle, end))
+
+
+def conjoin(formulas: Iterable[Formula], shape: str = 'balanced') -> Formula:
+    """Computes the conjunction of the given formulas.
+
+    Parameters:
+        formulas: nonempty formulas to conjoin.
+        shape: the nesting of the conjunction, as in `join_formulas`.
+
+    Returns:
+        The conjunction of the given formulas.
+
+    Examples:
+        >>> conjoin([Formula('R', []), Formula('Q', []), Formula('S', []),
+        ...          Formula('T', [])])
+        ((R()&Q())&(S()&T()))
+        >>> conjoin([Formula('R', []), Formula('Q', []), Formula('S', [])],
+        ...         'left')
+        ((R()&Q())&S())
+    """
+    return join_formulas('&', formulas, shape)
+
+
+def disjoin(formulas: Iterable[Formula], shape: str = 'balanced') -> Formula:
+    """Computes the disjunction of the given formulas.
+
+    Parameters:
+        formulas: nonempty formulas to disjoin.
+        shape: the nesting of the disjunction, as in `join_formulas`.
+
+    Returns:
+        The disjunction of the given formulas.
+
+    Examples:
+        >>> disjoin([Formula('R', []), Formula('Q', []), Formula('S', [])],
+        ...         'right')
+        (R()|(Q()|S()))
+    """
+    return join_formulas('|', formulas, shape)
@@ -51,8 +51,8 @@ class Schema:
                 arities = {arity for relation,arity in formula.relations() if
                            relation == template}
                 assert arities == {0} or arities == {1}
-        self.formula = formula
-        self.templates = frozenset(templates)
+        object.__setattr__(self, 'formula', formula)
+        object.__setattr__(self, 'templates', frozenset(templates))
 
     def __repr__(self) -> str:
         """Computes a string representation of the current schema.
@@ -442,9 +442,9 @@ class Proof:
             conclusion: the conclusion for the proof.
             lines: the lines for the proof.
         """
-        self.assumptions = frozenset(assumptions)
-        self.conclusion = conclusion
-        self.lines = tuple(lines)
+        object.__setattr__(self, 'assumptions', frozenset(assumptions))
+        object.__setattr__(self, 'conclusion', conclusion)
+        object.__setattr__(self, 'lines', tuple(lines))
 
     @frozen
     class AssumptionLine:
@@ -475,8 +475,8 @@ class Proof:
                 instantiation_map: the map instantiating the formula from the
                     assumption/axiom.
             """
-            self.formula = formula
-            self.assumption = assumption
+            object.__setattr__(self, 'formula', formula)
+            object.__setattr__(self, 'assumption', assumption)
             for key in instantiation_map:
                 if is_variable(key):
                     assert is_variable(instantiation_map[key])
@@ -485,7 +485,8 @@ class Proof:
                 else:
                     assert is_relation(key)
                     assert isinstance(instantiation_map[key], Formula)
-            self.instantiation_map = frozendict(instantiation_map)
+            object.__setattr__(self, 'instantiation_map',
+                               frozendict(instantiation_map))
 
         def __repr__(self) -> str:
             """Computes a string representation of the current line.
@@ -546,9 +547,11 @@ class Proof:
                 conditional_line_number: the line number of the conditional of
                     the MP inference justifying the line.
             """
-            self.formula = formula
-            self.antecedent_line_number = antecedent_line_number
-            self.conditional_line_number = conditional_line_number
+            object.__setattr__(self, 'formula', formula)
+            object.__setattr__(self, 'antecedent_line_number',
+                               antecedent_line_number)
+            object.__setattr__(self, 'conditional_line_number',
+                               conditional_line_number)
 
         def __repr__(self) -> str:
             """Computes a string representation of the current line.
@@ -606,8 +609,9 @@ class Proof:
                 predicate_line_number: the line number of the predicate of the
                     UG inference justifying the line.
             """
-            self.formula = formula
-            self.predicate_line_number = predicate_line_number
+            object.__setattr__(self, 'formula', formula)
+            object.__setattr__(self, 'predicate_line_number',
+                               predicate_line_number)
 
         def __repr__(self) -> str:
             """Computes a string representation of the current line.
@@ -654,7 +658,7 @@ class Proof:
             Parameters:
                 formula: the formula to be justified by the line.
             """
-            self.formula = formula
+            object.__setattr__(self, 'formula', formula)
 
         def __repr__(self) -> str:
             """Computes a string representation of the current line.
@@ -111,12 +111,12 @@ class Term:
         """
         if is_constant(root) or is_variable(root):
             assert arguments is None
-            self.root = root
+            object.__setattr__(self, 'root', root)
         else:
             assert is_function(root)
             assert arguments is not None
-            self.root = root
-            self.arguments = tuple(arguments)
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'arguments', tuple(arguments))
             assert len(self.arguments) > 0
 
     def __repr__(self) -> str:
@@ -477,29 +477,34 @@ class Formula:
             assert second_or_predicate is None
             assert isinstance(arguments_or_first_or_variable, Sequence) and \
                    not isinstance(arguments_or_first_or_variable, str)
-            self.root, self.arguments = \
-                root, tuple(arguments_or_first_or_variable)
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'arguments',
+                               tuple(arguments_or_first_or_variable))
             if is_equality(root):
                 assert len(self.arguments) == 2
         elif is_unary(root):
             # Populate self.first
             assert isinstance(arguments_or_first_or_variable, Formula) and \
                    second_or_predicate is None
-            self.root, self.first = root, arguments_or_first_or_variable
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'first', arguments_or_first_or_variable)
         elif is_binary(root):
             # Populate self.first and self.second
             assert isinstance(arguments_or_first_or_variable, Formula) and \
                    second_or_predicate is not None
-            self.root, self.first, self.second = \
-                root, arguments_or_first_or_variable, second_or_predicate           
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'first', arguments_or_first_or_variable)
+            object.__setattr__(self, 'second', second_or_predicate)
         else:
             assert is_quantifier(root)
             # Populate self.variable and self.predicate
             assert isinstance(arguments_or_first_or_variable, str) and \
                    is_variable(arguments_or_first_or_variable) and \
                    second_or_predicate is not None
-            self.root, self.variable, self.predicate = \
-                root, arguments_or_first_or_variable, second_or_predicate
+            object.__setattr__(self, 'root', root)
+            object.__setattr__(self, 'variable',
+                               arguments_or_first_or_variable)
+            object.__setattr__(self, 'predicate', second_or_predicate)
 
     def __repr__(self) -> str:
         """Computes the string representation of the current formula.
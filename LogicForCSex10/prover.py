@@ -3,21 +3,35 @@
 # by Gonczarowski and Nisan.
 # File name: predicates/prover.py
 
-from typing import AbstractSet, Collection, FrozenSet, List, Mapping, \
-                   Sequence, Tuple, Union
+from typing import AbstractSet, Callable, Collection, FrozenSet, List, \
+                   Mapping, Optional, Sequence, Tuple, Union
 
 from logic_utils import fresh_variable_name_generator
+from proof_store import ProofStore
 
 from predicates.syntax import *
 from predicates.proofs import *
 
+# store of proofs consulted by Prover.add_lemma before building a lemma, see
+# `use_proof_store`
+proof_store: Optional[ProofStore] = None
+
+def use_proof_store(store: Optional[ProofStore]) -> None:
+    """Sets the store of proofs that `Prover.add_lemma` consults before
+    building a lemma, and in which it stores the lemmas that it builds.
+
+    Parameters:
+        store: the store to use, or ``None`` to build every lemma.
+    """
+    global proof_store
+    proof_store = store
+
 # lst is a union of assumptions and conclusion
 # this function returning the formula encode
 # meaning : (p1->(p2->(p3->(p4->q))))
+# (nested to the right, see `propositions.tautology.encode_helper`)
 def encode_helper(lst):
-    if len(lst) > 1:
-        return Formula('->', lst[0], encode_helper(lst[1:]))
-    return lst[0]
+    return join_formulas('->', lst, 'right')
 
 class Prover:
     """A class for gradually creating a first-order logic proof from given
@@ -69,12 +83,7 @@ class Prover:
             print_as_proof_forms: flag specifying whether the proof is to be
                 printed in real time as it forms.
         """
-        self._assumptions = \
-            Prover.AXIOMS.union(
-                {assumption if isinstance(assumption, Schema)
-                 else Schema(assumption) if isinstance(assumption, Formula)
-                 else Schema(Formula.parse(assumption))
-                 for assumption in assumptions})
+        self._assumptions = Prover._schemas(assumptions)
         self._lines = []
         self._print_as_proof_forms = print_as_proof_forms
         if self._print_as_proof_forms:
@@ -84,6 +93,16 @@ class Prover:
                   print('  ' + str(assumption))
             print('Lines:')
 
+    @staticmethod
+    def _schemas(assumptions: Collection[Union[Schema, Formula, str]]) -> \
+            FrozenSet[Schema]:
+        # the given assumptions/additional axioms as schemas, with AXIOMS
+        return Prover.AXIOMS.union(
+            {assumption if isinstance(assumption, Schema)
+             else Schema(assumption) if isinstance(assumption, Formula)
+             else Schema(Formula.parse(assumption))
+             for assumption in assumptions})
+
     def qed(self) -> Proof:
         """Concludes the proof created by the current prover.
 
@@ -273,6 +292,37 @@ class Prover:
         assert self._lines[line_number].formula == conclusion
         return line_number                
 
+    def add_lemma(self, conclusion: Union[Formula, str],
+                  assumptions: Collection[Union[Schema, Formula, str]],
+                  build: Callable[[], Proof]) -> int:
+        """Appends to the proof being created by the current prover a validly
+        justified inlined version of a proof of the given conclusion from the
+        given assumptions, taken from `proof_store` if it is stored there, and
+        otherwise built by the given function (and stored).
+
+        Parameters:
+            conclusion: conclusion of the lemma, specified as either a formula
+                or its string representation.
+            assumptions: the assumptions/axioms beyond `AXIOMS` of the lemma,
+                specified as for the constructor of `Prover`, all of which
+                are assumptions/axioms of the current prover.
+            build: function that builds a valid proof of the given conclusion
+                from exactly the given assumptions and `AXIOMS`, e.g., by
+                creating another `Prover` from the given assumptions.
+
+        Returns:
+            The line number of the newly appended line that justifies the given
+            formula in the proof being created by the current prover.
+        """
+        if isinstance(conclusion, str):
+            conclusion = Formula.parse(conclusion)
+        if proof_store is None:
+            proof = build()
+        else:
+            proof = proof_store.prove(
+                (Prover._schemas(assumptions), conclusion), (), build)
+        return self.add_proof(conclusion, proof)
+
     def add_universal_instantiation(self, instantiation: Union[Formula, str],
                                     line_number: int, term: Union[Term, str]) \
             -> int: